@@ -0,0 +1,83 @@
+"""Бенчмарк записи ответов: коммит на каждый ответ против групповой записи.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_answer_writer --answers 1000
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_answer_writer
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+async def run(args):
+    from database.db import Database, User, PlayerAnswer
+    from database.answer_writer import AnswerWriter
+    from sqlalchemy import delete, func, select
+
+    async with Database() as db:
+        async with db.transaction() as repo:
+            game = await repo.create_game()
+            # Один игрок отвечает в раунд один раз, поэтому у каждого пути свой раунд
+            rnd = await repo.create_round(game.id, 1, "Бенчмарк: коммит на ответ")
+            grouped_rnd = await repo.create_round(game.id, 2, "Бенчмарк: групповая запись")
+            await repo.session.execute(delete(User).where(User.id >= 1_000_000))
+            repo.session.add_all(User(id=1_000_000 + i, first_name=f"Игрок {i}") for i in range(args.answers))
+        user_ids = [1_000_000 + i for i in range(args.answers)]
+
+        async def submit_per_row(uid):
+            async with db.transaction() as repo:
+                await repo.submit_answer(uid, rnd.id, str(uid))
+
+        async def count(round_id):
+            async with db.transaction() as repo:
+                result = await repo.session.execute(
+                    select(func.count()).select_from(PlayerAnswer).where(PlayerAnswer.round_id == round_id)
+                )
+                return result.scalar_one()
+
+        print(f"{db.engine.dialect.name}: {args.answers} одновременных ответов")
+
+        def errors(results):
+            return sum(isinstance(r, Exception) for r in results)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(submit_per_row(uid) for uid in user_ids),
+                                       return_exceptions=True)
+        per_row = time.perf_counter() - started
+        print(f"  коммит на ответ:   {per_row:7.3f} с  {args.answers / per_row:9.0f} ответов/с  "
+              f"(записано {await count(rnd.id)}, ошибок {errors(results)})")
+
+        writer = AnswerWriter(db, max_batch=args.batch, max_delay=args.delay)
+        await writer.start()
+        started = time.perf_counter()
+        results = await asyncio.gather(*(writer.submit(uid, grouped_rnd.id, str(uid)) for uid in user_ids),
+                                       return_exceptions=True)
+        grouped = time.perf_counter() - started
+        await writer.close()
+        print(f"  групповая запись:  {grouped:7.3f} с  {args.answers / grouped:9.0f} ответов/с  "
+              f"(записано {await count(grouped_rnd.id)}, ошибок {errors(results)})")
+
+        async with db.transaction() as repo:
+            await repo.session.execute(
+                delete(PlayerAnswer).where(PlayerAnswer.round_id.in_([rnd.id, grouped_rnd.id]))
+            )
+            await repo.session.execute(delete(User).where(User.id >= 1_000_000))
+            await repo.finish_game(game.id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Бенчмарк архива: старт игры на базе с длинной историей и перенос истории в архив.
+
+База наполняется завершёнными играми (раунды, ответы, ставки, таблица лидеров).
+Для каждого размера истории меряется старт новой игры: как было (глобальный
+сброс — DELETE FROM player_answers и UPDATE всех раундов, игр и пользователей)
+и сейчас (создать игру, посадить игроков, открыть раунд со ставками и
+закрыть игру — всё только по строкам этой игры). Потом вся история уходит в архив пачками —
+видно скорость архивации и размер живых таблиц до и после.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_archive --history 0 1000 5000 --players 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+LIVE_TABLES = ["games", "rounds", "player_answers", "bets", "standings", "game_players"]
+
+
+async def seed(db, first_game: int, games: int, players: int):
+    from sqlalchemy import insert
+    from config import MAX_ROUNDS, STARTING_BALANCE
+    from database.db import Bet, Game, GamePlayer, PlayerAnswer, Round, Standing
+
+    user_ids = [10_000 + i for i in range(players)]
+    finished_at = datetime.utcnow() - timedelta(days=30)
+    async with db.transaction() as repo:
+        session = repo.session
+        for game_id in range(first_game, first_game + games):
+            rounds, answers, bets = [], [], []
+            for number in range(1, MAX_ROUNDS + 1):
+                round_id = game_id * MAX_ROUNDS + number
+                rounds.append({"id": round_id, "game_id": game_id, "round_number": number, "question": "?",
+                               "is_active": False, "winner_id": user_ids[number % players]})
+                answers += [{"round_id": round_id, "user_id": u, "answer": str(u)} for u in user_ids]
+                bets += [{"round_id": round_id, "user_id": u, "kind": "ante", "amount": 10} for u in user_ids]
+            await session.execute(insert(Game), [{"id": game_id, "is_active": False, "host_id": 1,
+                                                  "finished_at": finished_at}])
+            await session.execute(insert(GamePlayer), [{"game_id": game_id, "user_id": u} for u in user_ids])
+            await session.execute(insert(Round), rounds)
+            await session.execute(insert(PlayerAnswer), answers)
+            await session.execute(insert(Bet), bets)
+            await session.execute(insert(Standing), [{"game_id": game_id, "user_id": u,
+                                                      "balance": STARTING_BALANCE} for u in user_ids])
+
+
+async def legacy_start(repo, user_ids):
+    # Как было до комнат: каждая новая игра переписывала всю историю
+    from sqlalchemy import text, update
+    from database.db import Game, Round, User
+
+    await repo.session.execute(update(Round).where(Round.is_active == True).values(is_active=False))
+    await repo.session.execute(update(Game).where(Game.is_active == True).values(is_active=False))
+    await repo.session.execute(update(User).values(is_ready=False))
+    await repo.session.execute(text("DELETE FROM player_answers"))
+
+
+async def scoped_start(repo, user_ids):
+    game = await repo.create_game(1)
+    await repo.add_game_players(game.id, user_ids)
+    round_obj = await repo.create_round(game.id, 1, "?")
+    await repo.collect_antes(round_obj.id, game.id, user_ids, 10)
+    await repo.finish_game(game.id)
+
+
+async def timed(db, start, repeat: int) -> float:
+    from database.db import Repository
+
+    total = 0.0
+    for _ in range(repeat):
+        # Каждый замер — в откатываемой транзакции, чтобы история не менялась
+        async with db.session_factory() as session:
+            repo = Repository(session)
+            started = time.perf_counter()
+            await start(repo)
+            await session.flush()
+            total += time.perf_counter() - started
+            await session.rollback()
+    return total / repeat * 1000
+
+
+async def live_rows(db) -> int:
+    from sqlalchemy import text
+    async with db.session_factory() as session:
+        return sum([(await session.execute(text(f"SELECT count(*) FROM {table}"))).scalar_one()
+                    for table in LIVE_TABLES])
+
+
+async def run(args):
+    from sqlalchemy import insert
+    from database.db import Database, User
+    from utils.archiver import GameArchiver
+
+    user_ids = [10_000 + i for i in range(args.players)]
+    async with Database() as db:
+        async with db.transaction() as repo:
+            await repo.session.execute(insert(User), [{"id": u, "first_name": f"Игрок {u}"} for u in user_ids])
+
+        print(f"{db.engine.dialect.name}, {args.players} игроков")
+        print(f"{'игр в истории':>14} {'строк':>9} {'глобальный сброс, мс':>21} {'старт игры, мс':>15}")
+        seeded = 0
+        for history in args.history:
+            await seed(db, seeded + 1, history - seeded, args.players)
+            seeded = history
+            legacy = await timed(db, lambda repo: legacy_start(repo, user_ids), args.repeat)
+            scoped = await timed(db, lambda repo: scoped_start(repo, user_ids), args.repeat)
+            print(f"{history:14d} {await live_rows(db):9d} {legacy:21.2f} {scoped:15.2f}")
+
+        archiver = GameArchiver(db, after=0, batch=args.batch)
+        rows = await live_rows(db)
+        started = time.perf_counter()
+        archived = await archiver.run_once()
+        elapsed = time.perf_counter() - started
+        print(f"\nархивация: {archived} игр за {elapsed:.2f} с "
+              f"({elapsed / max(archived, 1) * 1000:.2f} мс на игру, пачки по {args.batch}); "
+              f"строк в живых таблицах: {rows} -> {await live_rows(db)}")
+        scoped = await timed(db, lambda repo: scoped_start(repo, user_ids), args.repeat)
+        print(f"старт игры после архивации: {scoped:.2f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 1000, 5000])
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Бенчмарк рассылки: старый последовательный цикл против Broadcaster.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_broadcast --recipients 50,200,1000 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fake_bot_api import FakeBotAPI
+from utils.broadcast import Broadcaster
+
+
+async def sequential(bot, chat_ids, text):
+    """Как было в receive_admin_hint: по одному сообщению за раз"""
+    for chat_id in chat_ids:
+        try:
+            await bot.send_message(chat_id, text)
+        except Exception:
+            pass
+
+
+async def run(args):
+    api = FakeBotAPI(latency=args.latency, rate_limit=args.fake_limit)
+    await api.start()
+    bot = api.make_bot()
+    text = "💡 Подсказка 1/3\n\nБенчмарк"
+
+    print(f"latency={args.latency}s rate={args.rate}/s concurrency={args.concurrency} "
+          f"fake_limit={args.fake_limit}")
+    print(f"{'N':>6} {'sequential, s':>14} {'broadcast, s':>13} {'delivered':>10} {'429':>5}")
+    try:
+        for n in args.recipients:
+            chat_ids = list(range(1, n + 1))
+
+            seq_time = float("nan")
+            if n <= args.max_sequential:
+                api.reset()
+                started = time.perf_counter()
+                await sequential(bot, chat_ids, text)
+                seq_time = time.perf_counter() - started
+
+            api.reset()
+            broadcaster = Broadcaster(bot, concurrency=args.concurrency, rate=args.rate)
+            started = time.perf_counter()
+            result = await broadcaster.send_message(chat_ids, text)
+            fan_out = time.perf_counter() - started
+
+            print(f"{n:>6} {seq_time:>14.2f} {fan_out:>13.2f} {result.delivered:>10} {api.throttled:>5}")
+    finally:
+        await bot.session.close()
+        await api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", default="50,200,1000",
+                        type=lambda s: [int(x) for x in s.split(",")])
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка фейкового API, с")
+    parser.add_argument("--rate", type=float, default=30, help="глобальный лимит Broadcaster, сообщений/с")
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--fake-limit", type=int, default=None,
+                        help="отвечать 429 при превышении этого числа запросов в секунду")
+    parser.add_argument("--max-sequential", type=int, default=200,
+                        help="не гонять последовательный цикл для больших N")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Бенчмарк отложенного удаления: спящая задача на сообщение против планировщика.
+
+Тысячи сообщений ждут удаления одновременно. Меряется память, которую
+занимает очередь, число вызовов Bot API и сколько сообщений так и не удалось
+удалить из-за 429 (фейковый API держит лимит --rate запросов в секунду).
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_deletions --chats 200 --per-chat 10
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+
+def report(title, memory, api, wall, left):
+    calls = api.calls["deleteMessage"] + api.calls["deleteMessages"]
+    print(f"  {title:<32} память {memory / 1024:8.0f} КБ  вызовов API {calls:6d}  "
+          f"429: {api.throttled:5d}  не удалено {left:5d}  {wall:6.2f} с")
+
+
+async def per_message_tasks(api, bot, messages, delay):
+    async def delete_after_delay(chat_id, message_id):
+        # Как было в handlers/player.py: своя задача на каждое сообщение
+        await asyncio.sleep(delay)
+        try:
+            await bot.delete_message(chat_id, message_id)
+            return True
+        except Exception:
+            return False
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(delete_after_delay(*m)) for m in messages]
+    await asyncio.sleep(0)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results = await asyncio.gather(*tasks)
+    report("задача на сообщение", memory, api, time.perf_counter() - started, results.count(False))
+
+
+async def scheduler(api, bot, db, messages, delay, rate, bulk):
+    from sqlalchemy import func, select
+    from database.db import ScheduledDeletion
+    from utils.broadcast import Broadcaster
+    from utils.deletion_scheduler import DeletionScheduler
+
+    deletions = DeletionScheduler(db, Broadcaster(bot, rate=rate), bulk=bulk)
+    await deletions.start()
+    tracemalloc.start()
+    started = time.perf_counter()
+    for chat_id, message_id in messages:
+        deletions.schedule(chat_id, message_id, delay)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Сообщение считается удалённым, когда его строка ушла из scheduled_deletions
+    left = len(messages)
+    while deletions.pending or left:
+        await asyncio.sleep(0.05)
+        async with db.session_factory() as session:
+            left = (await session.execute(select(func.count()).select_from(ScheduledDeletion))).scalar_one()
+    await deletions.close()
+    title = "планировщик, deleteMessages" if bulk else "планировщик, по одному"
+    report(title, memory, api, time.perf_counter() - started, 0)
+
+
+async def run(args):
+    from benchmarks.fake_bot_api import FakeBotAPI
+    from database.db import Database
+
+    logging.getLogger().setLevel(logging.ERROR)
+    api = FakeBotAPI(latency=args.latency, rate_limit=args.rate)
+    await api.start()
+    bot = api.make_bot()
+    messages = [(chat_id, message_id) for message_id in range(1, args.per_chat + 1)
+                for chat_id in range(1, args.chats + 1)]
+    print(f"{len(messages)} сообщений в {args.chats} чатах, лимит API {args.rate} запросов/с")
+
+    async with Database() as db:
+        await per_message_tasks(api, bot, messages, args.delay)
+        for bulk in ((True, False) if args.fallback else (True,)):
+            api.reset()
+            await asyncio.sleep(1)  # окно лимита фейкового API
+            await scheduler(api, bot, db, messages, args.delay, args.rate, bulk)
+
+    await bot.session.close()
+    await api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--per-chat", type=int, default=10, help="сообщений на чат")
+    parser.add_argument("--delay", type=float, default=2.0)
+    parser.add_argument("--rate", type=int, default=30, help="лимит фейкового API, запросов/с")
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--fallback", action="store_true",
+                        help="ещё и удаление по одному сообщению (долго: упирается в лимит)")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Бенчмарк выгрузки истории: миллион ответов в CSV и Parquet при плоской памяти.
+
+База наполняется завершёнными играми, часть из них сразу уходит в архив —
+выгрузка читает оба источника. Меряется время и пик памяти потоковой
+выгрузки, для сравнения — пик памяти того же запроса через .all(), и
+инкрементальная выгрузка с метки (только вторая половина истории).
+Parquet — только если установлен pyarrow.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_export --games 5000 --players 30 --archived 0.5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+
+async def seed(db, games: int, players: int, archived: float) -> datetime:
+    """Наполнить базу; возвращает момент завершения игры посередине истории"""
+    from sqlalchemy import insert
+    from config import MAX_ROUNDS
+    from database.db import Game, GameQuestion, Payout, PlayerAnswer, Question, Round, User
+
+    user_ids = [10_000 + i for i in range(players)]
+    started = datetime.utcnow() - timedelta(days=30)
+    async with db.transaction() as repo:
+        session = repo.session
+        await session.execute(insert(User), [{"id": u, "first_name": f"Игрок {u}"} for u in user_ids])
+        await session.execute(insert(Question), [
+            {"id": q, "question": f"Вопрос {q}", "answer": str(q * 1000)} for q in range(1, 1001)
+        ])
+        for first in range(1, games + 1, 500):
+            chunk = range(first, min(first + 500, games + 1))
+            rounds, answers, questions, payouts = [], [], [], []
+            for game_id in chunk:
+                for number in range(1, MAX_ROUNDS + 1):
+                    round_id = game_id * MAX_ROUNDS + number
+                    winner = user_ids[(game_id + number) % players]
+                    question_id = (game_id * MAX_ROUNDS + number) % 1000 + 1
+                    rounds.append({"id": round_id, "game_id": game_id, "round_number": number,
+                                   "question": f"Вопрос {question_id}", "is_active": False, "winner_id": winner})
+                    questions.append({"game_id": game_id, "round_number": number, "question_id": question_id})
+                    payouts.append({"round_id": round_id, "user_id": winner, "amount": 10 * players})
+                    answers += [{"round_id": round_id, "user_id": u, "answer": f"примерно {u * number}"}
+                                for u in user_ids]
+            await session.execute(insert(Game), [
+                {"id": g, "is_active": False, "host_id": 1, "finished_at": started + timedelta(minutes=g)}
+                for g in chunk
+            ])
+            await session.execute(insert(Round), rounds)
+            await session.execute(insert(GameQuestion), questions)
+            await session.execute(insert(Payout), payouts)
+            await session.execute(insert(PlayerAnswer), answers)
+
+    # Старшая часть истории — в архиве, как после работы архиватора
+    while True:
+        async with db.transaction() as repo:
+            count = await repo.archive_finished_games(started + timedelta(minutes=int(games * archived)), 200)
+        if count < 200:
+            break
+    return started + timedelta(minutes=games // 2)
+
+
+async def measured(coro):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = await coro
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+async def load_all(db, until: datetime) -> int:
+    # Как без потоковой выгрузки: весь результат в память разом
+    from database.export import live_query
+
+    async with db.session_factory() as session:
+        return len((await session.execute(live_query(None, until))).all())
+
+
+async def run(args):
+    from sqlalchemy import text
+    from database.db import Database
+    from database.export import export
+
+    async with Database() as db:
+        started = time.perf_counter()
+        middle = await seed(db, args.games, args.players, args.archived)
+        async with db.session_factory() as session:
+            live = (await session.execute(text("SELECT count(*) FROM player_answers"))).scalar_one()
+            archived = (await session.execute(text("SELECT count(*) FROM archived_games"))).scalar_one()
+        print(f"{db.engine.dialect.name}: {args.games} игр ({archived} в архиве), ответов в живых таблицах "
+              f"{live} (наполнение {time.perf_counter() - started:.0f} с)")
+
+        until = datetime.utcnow()
+        directory = tempfile.mkdtemp()
+        formats = ["csv"]
+        try:
+            import pyarrow  # noqa: F401
+            formats.append("parquet")
+        except ImportError:
+            print("  pyarrow не установлен — Parquet пропущен")
+
+        for fmt in formats:
+            path = os.path.join(directory, f"history.{fmt}")
+            report, elapsed, peak = await measured(export(db, path, fmt, until=until))
+            print(f"  {fmt:<8} {report.rows:>9} строк за {elapsed:6.1f} с ({report.rows / elapsed:>9,.0f} строк/с), "
+                  f"пик памяти {peak / 2**20:6.1f} МБ, файл {os.path.getsize(path) / 2**20:6.1f} МБ")
+
+        path = os.path.join(directory, "increment.csv")
+        report, elapsed, peak = await measured(export(db, path, "csv", since=middle, until=until))
+        print(f"  с метки  {report.rows:>9} строк за {elapsed:6.1f} с, пик памяти {peak / 2**20:6.1f} МБ")
+
+        rows, elapsed, peak = await measured(load_all(db, until))
+        print(f"  .all()   {rows:>9} строк из живых таблиц за {elapsed:6.1f} с, пик памяти {peak / 2**20:6.1f} МБ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=5000)
+    parser.add_argument("--players", type=int, default=30)
+    parser.add_argument("--archived", type=float, default=0.5, help="доля старых игр, уже ушедших в архив")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Бенчмарк FSM-хранилища: MemoryStorage против хранилища в базе.
+
+Для хранилища в базе меряются попадания в кеш (горячие игроки), промахи
+(кеш размером 1 — каждый апдейт читает строку из базы) и запись в базу
+сразу на каждое изменение против записи пачкой.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_fsm_storage --users 1000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+async def update_cycle(storage, keys):
+    """Как апдейт игрока: прочитать состояние и данные, сменить состояние"""
+    for key in keys:
+        await storage.get_state(key)
+        data = await storage.get_data(key)
+        await storage.set_data(key, {**data, "current_round_id": 1})
+        await storage.set_state(key, "PlayerGameStates:waiting_hints")
+
+
+async def measure(title, storage, keys, repeats):
+    await update_cycle(storage, keys)  # прогрев: строки в базе, кеш заполнен
+    started = time.perf_counter()
+    for _ in range(repeats):
+        await update_cycle(storage, keys)
+    elapsed = time.perf_counter() - started
+    await storage.close()
+    ops = len(keys) * repeats
+    print(f"  {title:<28} {elapsed / ops * 1e6:9.1f} мкс на апдейт  ({ops / elapsed:9.0f} апдейтов/с)")
+
+
+async def run(args):
+    from aiogram.fsm.storage.base import StorageKey
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from database.db import Database
+    from database.fsm_storage import SQLAlchemyStorage
+
+    keys = [StorageKey(bot_id=1, chat_id=uid, user_id=uid) for uid in range(1, args.users + 1)]
+    async with Database() as db:
+        print(f"{db.engine.dialect.name}: {args.users} игроков, {args.repeats} проходов")
+        await measure("MemoryStorage", MemoryStorage(), keys, args.repeats)
+        await measure("база, попадания в кеш", SQLAlchemyStorage(db), keys, args.repeats)
+        await measure("база, промахи кеша", SQLAlchemyStorage(db, cache_size=1), keys, args.repeats)
+        await measure("база, запись сразу", SQLAlchemyStorage(db, flush_interval=0), keys, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Нагрузочная симуляция полной игры: задержки по фазам и запросы к базе на апдейт.
+
+Диспетчер собирается как в бою (create_dispatcher из main.py) и говорит с
+локальным фейковым Bot API. Виртуальные игроки проходят всю игру: /start,
+«готов», вход в комнату по ссылке, затем MAX_ROUNDS раундов — ответ, ставка,
+подсказка ведущего, просмотр подсказки, показ ответов и выбор победителя —
+и конец игры. Для каждой фазы считаются p50/p95/p99 времени обработки
+апдейта и число SQL-запросов на апдейт (те, что DbSessionMiddleware
+собирает в транзакции апдейта; пачки AnswerWriter пишутся отдельно).
+
+Результат можно сохранить в JSON (--json) и сравнить с прошлым прогоном
+(--baseline), чтобы ловить регрессии между версиями.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_game --rooms 10 --players 100 --json game.json
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_game --baseline game.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, q: int) -> float:
+    """Перцентиль по ближайшему рангу; values отсортированы"""
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+class Simulator:
+    """Шлёт апдейты в диспетчер; время и запросы к базе — по фазам игры"""
+
+    def __init__(self, dp, bot, concurrency: int):
+        self.dp = dp
+        self.bot = bot
+        self.slots = asyncio.Semaphore(concurrency)
+        self.ids = itertools.count(1)
+        self.latencies = defaultdict(list)
+        self.statements = defaultdict(list)
+        # Статистика запросов апдейта — из DbSessionMiddleware, по update_id
+        self._query_stats = {}
+        dp.update.outer_middleware(self._remember_query_stats)
+
+    async def _remember_query_stats(self, handler, event, data):
+        self._query_stats[event.update_id] = data["query_stats"]
+        return await handler(event, data)
+
+    async def _feed(self, phase: str, payload: dict):
+        from aiogram.types import Update
+
+        update_id = next(self.ids)
+        update = Update.model_validate({"update_id": update_id, **payload}, context={"bot": self.bot})
+        async with self.slots:
+            started = time.perf_counter()
+            await self.dp.feed_update(self.bot, update)
+            self.latencies[phase].append(time.perf_counter() - started)
+        query_stats = self._query_stats.pop(update_id, None)
+        self.statements[phase].append(query_stats.statements if query_stats else 0)
+
+    async def message(self, phase: str, user_id: int, text: str):
+        await self._feed(phase, {"message": {
+            "message_id": next(self.ids), "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Игрок {user_id}"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+            if text.startswith("/") else None,
+        }})
+
+    async def callback(self, phase: str, user_id: int, data: str):
+        await self._feed(phase, {"callback_query": {
+            "id": str(next(self.ids)), "chat_instance": "bench", "data": data,
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Игрок {user_id}"},
+            "message": {"message_id": 1, "date": int(time.time()),
+                        "chat": {"id": user_id, "type": "private"}, "text": "…"},
+        }})
+
+    def report(self) -> dict:
+        phases = {}
+        for phase, latencies in self.latencies.items():
+            latencies = sorted(latencies)
+            statements = self.statements[phase]
+            phases[phase] = {
+                "updates": len(latencies),
+                **{f"p{q}_ms": round(percentile(latencies, q) * 1000, 3) for q in PERCENTILES},
+                "statements_per_update": round(sum(statements) / len(statements), 2),
+                "statements_max": max(statements),
+            }
+        return phases
+
+
+async def play_game(sim: Simulator, db, registry, host_id: int, player_ids, rounds: int):
+    """Одна комната от /newroom до конца игры"""
+    async def everyone(phase: str, send):
+        await asyncio.gather(*(send(phase, p) for p in player_ids))
+
+    await everyone("start", lambda phase, p: sim.message(phase, p, "/start"))
+    await everyone("ready", lambda phase, p: sim.message(phase, p, "✅ Я готов играть!"))
+    await sim.message("newroom", host_id, "/newroom")
+    game_id = registry.hosted_by(host_id).game_id
+    await everyone("join", lambda phase, p: sim.message(phase, p, f"/start room_{game_id}"))
+    await sim.callback("start_game", host_id, "admin_start_game")
+
+    room = registry.hosted_by(host_id)
+    for number in range(1, rounds + 1):
+        round_id = room.round_id
+        await everyone("answer", lambda phase, p: sim.message(phase, p, str(p % 1000 * number)))
+        # Половина повышает ставку, остальные оставляют прежнюю
+        await everyone("stake", lambda phase, p: sim.callback(phase, p, f"stake_{'raise' if p % 2 else 'hold'}_{round_id}"))
+        await sim.message("hint", host_id, f"Подсказка к раунду {number}")
+        await everyone("hint_view", lambda phase, p: sim.callback(phase, p, f"hint_1_{round_id}"))
+        await sim.callback("show_answers", host_id, f"admin_show_answers_{round_id}")
+        async with db.transaction() as repo:
+            answers = await repo.get_round_answers(round_id)
+        await sim.callback("winner", host_id, f"admin_select_winner_{answers[0].id}")
+        if number < rounds:
+            await sim.callback("next_round", host_id, f"admin_next_round_{number}")
+    await sim.callback("end_game", host_id, "admin_end_game")
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(phases: dict, baseline: dict):
+    """Изменение p95 и запросов на апдейт по фазам относительно прошлого прогона"""
+    print(f"сравнение с {baseline.get('revision') or 'baseline'} ({baseline.get('dialect')}):")
+    for phase, now in phases.items():
+        before = baseline.get("phases", {}).get(phase)
+        if before is None:
+            print(f"  {phase:13} — нет в baseline")
+            continue
+        change = (now["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        print(f"  {phase:13} p95 {before['p95_ms']:8.2f} → {now['p95_ms']:8.2f} мс ({change:+6.1f}%), "
+              f"запросов {before['statements_per_update']:5.1f} → {now['statements_per_update']:5.1f}")
+
+
+async def run(args):
+    from benchmarks.fake_bot_api import FakeBotAPI
+    from config import MAX_ROUNDS
+    from database.db import Database, Question
+    from main import create_dispatcher
+
+    logging.getLogger().setLevel(logging.ERROR)
+    rounds = min(args.rounds or MAX_ROUNDS, MAX_ROUNDS)
+    api = FakeBotAPI(latency=args.latency)
+    await api.start()
+    bot = api.make_bot()
+
+    async with Database() as db:
+        async with db.transaction() as repo:
+            repo.session.add_all(
+                Question(question=f"Вопрос {i}", answer=str(i), hint1="1", hint2="2", hint3="3")
+                for i in range(args.rooms * MAX_ROUNDS + 10)
+            )
+        dp = create_dispatcher(bot, db)
+        # Лимиты Bot API здесь не меряем: фейковый сервер их не держит
+        dp["broadcaster"].bucket.rate = dp["broadcaster"].bucket.capacity = 10_000
+        dp["broadcaster"].chat_limiter.interval = 0
+        # Антиспам не меряем: виртуальные игроки жмут быстрее живых
+        dp.update.outer_middleware.unregister(dp["throttle"])
+        # Подсказки шлёт ведущий — фаза hint; таймер автоподсказок выключен
+        dp["hint_scheduler"].interval = 0
+        await dp.emit_startup(bot=bot, **dp.workflow_data)
+
+        sim = Simulator(dp, bot, args.concurrency)
+        registry = dp["room_registry"]
+        dialect = db.engine.dialect.name
+        print(f"{dialect}: {args.rooms} комнат по {args.players} игроков ({args.rooms * args.players} всего), "
+              f"{rounds} раундов, до {args.concurrency} апдейтов одновременно")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            play_game(sim, db, registry, 10_000 + r, [1_000_000 + r * 10_000 + p for p in range(args.players)],
+                      rounds)
+            for r in range(args.rooms)
+        ))
+        elapsed = time.perf_counter() - started
+        await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+
+    await bot.session.close()
+    await api.stop()
+
+    phases = sim.report()
+    updates = sum(phase["updates"] for phase in phases.values())
+    print(f"  {updates} апдейтов за {elapsed:.2f} с ({updates / elapsed:.0f} апдейтов/с), "
+          f"{sum(api.calls.values())} запросов к Bot API")
+    print(f"  {'фаза':13} {'апдейтов':>8} {'p50, мс':>8} {'p95, мс':>8} {'p99, мс':>8} {'SQL/апдейт':>11}")
+    for phase, row in phases.items():
+        print(f"  {phase:13} {row['updates']:8d} {row['p50_ms']:8.2f} {row['p95_ms']:8.2f} {row['p99_ms']:8.2f} "
+              f"{row['statements_per_update']:11.1f}")
+
+    result = {
+        "revision": git_revision(),
+        "dialect": dialect,
+        "python": platform.python_version(),
+        "rooms": args.rooms,
+        "players": args.players,
+        "rounds": rounds,
+        "concurrency": args.concurrency,
+        "latency": args.latency,
+        "seconds": round(elapsed, 3),
+        "updates_per_second": round(updates / elapsed, 1),
+        "api_calls": dict(api.calls),
+        "phases": phases,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(phases, json.load(f))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"результат: {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=5)
+    parser.add_argument("--players", type=int, default=20, help="игроков в комнате")
+    parser.add_argument("--rounds", type=int, default=0, help="раундов в игре (0 — MAX_ROUNDS)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка фейкового Bot API, с")
+    parser.add_argument("--json", help="сохранить результат в JSON")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
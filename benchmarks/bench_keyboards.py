@@ -0,0 +1,58 @@
+"""Бенчмарк клавиатур ведущего: цена одной страницы выбора победителя.
+
+Сравнивается клавиатура со всеми ответами сразу (как было) и одна страница
+из отсортированного списка; для всех — размер JSON, который уходит в Telegram.
+Отдельно — статичная клавиатура раунда: сборка заново против готовой из кеша.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_keyboards --answers 10 100 1000 10000
+"""
+import argparse
+import time
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+
+def full_keyboard(answers):
+    # Как было в get_winner_selection_keyboard: кнопка на каждый ответ
+    rows = [[InlineKeyboardButton(text=f"👑 {a['username']}: {a['answer']}",
+                                  callback_data=f"admin_select_winner_{a['id']}")] for a in answers]
+    rows.append([InlineKeyboardButton(text="❌ Без победителя", callback_data="admin_no_winner")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1e6, result
+
+
+def main():
+    from keyboards.admin_kb import get_round_control_keyboard, get_winner_selection_keyboard
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'ответов':>8} {'все сразу, мкс':>15} {'кнопок':>7} {'JSON, КБ':>9}   "
+          f"{'страница, мкс':>14} {'кнопок':>7} {'JSON, КБ':>9}")
+    for count in args.answers:
+        answers = [{"id": 1_000_000 + i, "user_id": i, "username": f"Игрок {i}",
+                    "answer": f"примерно {i * 37} тысяч километров", "distance": float(i)}
+                   for i in range(count)]
+        full_us, full = timed(lambda: full_keyboard(answers), args.repeat)
+        page_us, page = timed(lambda: get_winner_selection_keyboard(answers, answers[0], 1, count // 16),
+                              args.repeat)
+        print(f"{count:8d} {full_us:15.0f} {sum(map(len, full.inline_keyboard)):7d} "
+              f"{len(full.model_dump_json()) / 1024:9.1f}   {page_us:14.0f} "
+              f"{sum(map(len, page.inline_keyboard)):7d} {len(page.model_dump_json()) / 1024:9.1f}")
+
+    rebuild_us, _ = timed(lambda: get_round_control_keyboard.__wrapped__(1), 10_000)
+    cached_us, _ = timed(lambda: get_round_control_keyboard(1), 10_000)
+    print(f"\nклавиатура раунда: сборка {rebuild_us:.1f} мкс, из кеша {cached_us:.2f} мкс")
+
+
+if __name__ == "__main__":
+    main()
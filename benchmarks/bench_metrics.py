@@ -0,0 +1,113 @@
+"""Бенчмарк метрик: сколько стоит измерение на горячем пути.
+
+Меряется: одно наблюдение гистограммы, мидлварь времени обработчика и
+мидлварь запросов к Bot API вокруг пустого вызова (против того же вызова
+без неё), SQL-запрос с хуками движка против движка без хуков и сборка
+текста /metrics при реалистичном числе серий.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_metrics --repeat 100000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+
+async def per_call(action, repeat: int) -> float:
+    """Среднее время вызова в микросекундах"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await action()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+async def middlewares(repeat: int):
+    from aiogram.methods import SendMessage
+    from middlewares.metrics import ApiMetricsMiddleware, HandlerMetricsMiddleware
+
+    async def handler(event, data):
+        return None
+
+    async def make_request(bot, method):
+        return None
+
+    data = {"handler": SimpleNamespace(callback=handler)}
+    handler_metrics = HandlerMetricsMiddleware()
+    bare = await per_call(lambda: handler(None, data), repeat)
+    measured = await per_call(lambda: handler_metrics(handler, None, data), repeat)
+    print(f"  обработчик: {measured - bare:6.2f} мкс на апдейт сверх вызова")
+
+    method = SendMessage(chat_id=1, text="x")
+    api_metrics = ApiMetricsMiddleware()
+    bare = await per_call(lambda: make_request(None, method), repeat)
+    measured = await per_call(lambda: api_metrics(make_request, None, method), repeat)
+    print(f"  Bot API:    {measured - bare:6.2f} мкс на запрос сверх вызова")
+
+
+async def queries(repeat: int):
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from database import stats
+    from database.db import Database, User
+
+    async with Database() as db:
+        # Тот же файл базы, но движок без хуков stats.install
+        bare_engine = create_async_engine(db.engine.url)
+        query = select(User).where(User.id == 1)
+        try:
+            for engine, label in ((bare_engine, "без хуков"), (db.engine, "с хуками ")):
+                async with engine.connect() as conn:
+                    await conn.execute(query)
+                    elapsed = await per_call(lambda: conn.execute(query), repeat)
+                print(f"  SQL-запрос {label}: {elapsed:7.1f} мкс")
+        finally:
+            await bare_engine.dispose()
+    print(f"  метка запроса: {stats.query_label(str(query.compile()))!r}")
+
+
+def render(series: int):
+    from utils.metrics import Registry
+
+    registry = Registry()
+    handlers = registry.histogram("bot_handler_seconds", "Время обработчика", ("handler",))
+    queries = registry.histogram("bot_db_query_seconds", "Время запроса", ("query",))
+    for n in range(series):
+        handlers.labels(f"handlers.module.handler_{n}").observe(0.01)
+        queries.labels(f"SELECT table_{n}").observe(0.001)
+    started = time.perf_counter()
+    text = registry.render()
+    print(f"  /metrics на {2 * series} серий: {(time.perf_counter() - started) * 1000:.1f} мс, "
+          f"{len(text.encode()) / 1024:.0f} КБ")
+
+
+async def run(args):
+    from utils.metrics import Histogram, DEFAULT_BUCKETS
+
+    histogram = Histogram(DEFAULT_BUCKETS)
+    started = time.perf_counter()
+    for n in range(args.repeat):
+        histogram.observe(0.003)
+    print(f"  observe():  {(time.perf_counter() - started) / args.repeat * 1e9:6.0f} нс")
+
+    await middlewares(args.repeat)
+    await queries(args.queries)
+    render(args.series)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--series", type=int, default=50, help="серий на гистограмму при сборке /metrics")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Бенчмарк горячих запросов на базе с историей из тысяч игр: с индексами и без.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_queries --games 2000 --players 20
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_queries
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+INDEXES = ["uq_player_answers_round_user", "ix_rounds_game_active", "ix_games_is_active", "ix_users_is_ready"]
+
+
+async def seed(db, games: int, players: int, history_users: int):
+    from sqlalchemy import insert
+    from database.db import User, Game, Round, PlayerAnswer
+
+    async with db.transaction() as repo:
+        session = repo.session
+        # Все, кто когда-либо играл; готовы только участники текущей игры
+        await session.execute(insert(User), [
+            {"id": 10_000 + i, "first_name": f"Игрок {i}", "is_ready": i < players}
+            for i in range(history_users)
+        ])
+        await session.execute(insert(Game), [
+            {"id": g, "is_active": g == games} for g in range(1, games + 1)
+        ])
+        await session.execute(insert(Round), [
+            {"id": (g - 1) * 7 + r, "game_id": g, "round_number": r, "question": "?",
+             "is_active": g == games and r == 7}
+            for g in range(1, games + 1) for r in range(1, 8)
+        ])
+        batch = []
+        for round_id in range(1, games * 7 + 1):
+            for p in range(players):
+                batch.append({"user_id": 10_000 + (round_id + p) % history_users,
+                              "round_id": round_id, "answer": str(p)})
+            if len(batch) >= 50_000:
+                await session.execute(insert(PlayerAnswer), batch)
+                batch = []
+        if batch:
+            await session.execute(insert(PlayerAnswer), batch)
+
+
+async def measure(db, repeat: int) -> dict:
+    from database.db import Repository
+
+    # Без кеша пользователей: меряем сами запросы к базе
+    async with db.session_factory() as session:
+        repo = Repository(session)
+        game = (await repo.get_active_games())[0]
+        rnd = await repo.get_current_round(game.id)
+        queries = {
+            "get_active_games": lambda: repo.get_active_games(),
+            "get_current_round": lambda: repo.get_current_round(game.id),
+            "get_round_answers": lambda: repo.get_round_answers(rnd.id),
+            "get_ready_players": lambda: repo.get_ready_players(),
+        }
+        timings = {}
+        for name, query in queries.items():
+            await query()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                await query()
+            timings[name] = (time.perf_counter() - started) / repeat * 1e6
+            repo.session.expunge_all()
+        return timings
+
+
+async def run(args):
+    from sqlalchemy import text
+    from database.db import Database
+
+    async with Database() as db:
+        print(f"{db.engine.dialect.name}: {args.games} игр, {args.games * 7} раундов, "
+              f"{args.games * 7 * args.players} ответов")
+        started = time.perf_counter()
+        await seed(db, args.games, args.players, args.history_users)
+        print(f"  наполнение: {time.perf_counter() - started:.1f} с")
+
+        with_indexes = await measure(db, args.repeat)
+        async with db.engine.begin() as conn:
+            for name in INDEXES:
+                await conn.execute(text(f"DROP INDEX {name}"))
+            if db.engine.dialect.name == "sqlite":
+                await conn.execute(text("ANALYZE"))
+        without_indexes = await measure(db, args.repeat)
+
+        print(f"  {'запрос':<20} {'без индексов, мкс':>18} {'с индексами, мкс':>17}")
+        for name in with_indexes:
+            print(f"  {name:<20} {without_indexes[name]:>18.0f} {with_indexes[name]:>17.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=20, help="игроков в каждой игре")
+    parser.add_argument("--history-users", type=int, default=5000, help="всего пользователей в базе")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    elif input("Бенчмарк удалит индексы в базе DATABASE_URL. Продолжить? [y/N] ").lower() != "y":
+        return
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
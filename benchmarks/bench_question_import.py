@@ -0,0 +1,84 @@
+"""Бенчмарк импорта банка вопросов: время и пиковая память.
+
+Генерирует синтетический questions.json (с дубликатами и битыми элементами),
+импортирует его потоково и для сравнения показывает пик памяти json.loads всего файла.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_question_import --questions 100000
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+
+def synthetic_bank(count: int, duplicate_share: float, invalid_share: float) -> bytes:
+    rng = random.Random(42)
+    items = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < invalid_share:
+            items.append({"question": "", "answer": None})
+        elif roll < invalid_share + duplicate_share and i:
+            items.append(items[rng.randrange(len(items))])
+        else:
+            items.append({
+                "question": f"Синтетический вопрос №{i}: сколько будет {rng.randint(1, 10**6)}?",
+                "answer": str(rng.randint(1, 10**6)),
+                "hints": [f"Подсказка {n} к вопросу {i}" for n in range(1, 4)],
+            })
+    return json.dumps(items, ensure_ascii=False, indent=1).encode("utf-8")
+
+
+def peak_of(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+async def run(args):
+    from database.db import Database
+
+    raw = synthetic_bank(args.questions, args.duplicates, args.invalid)
+    print(f"Файл: {args.questions} элементов, {len(raw) / 2**20:.1f} МБ")
+
+    _, parse_time, parse_peak = peak_of(lambda: json.loads(raw))
+    print(f"  json.loads целиком:   {parse_time:6.2f} с, пик памяти {parse_peak / 2**20:7.1f} МБ")
+
+    async with Database() as db:
+        tracemalloc.start()
+        started = time.perf_counter()
+        async with db.transaction() as repo:
+            report = await repo.import_questions(io.BytesIO(raw))
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"  потоковый импорт:     {elapsed:6.2f} с, пик памяти {peak / 2**20:7.1f} МБ, "
+              f"{report.inserted / elapsed:,.0f} вопросов/с в базу ({db.engine.dialect.name})")
+        print(f"  {report.summary()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--duplicates", type=float, default=0.05, help="доля дубликатов")
+    parser.add_argument("--invalid", type=float, default=0.01, help="доля битых элементов")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Бенчмарк подбора вопросов под кривую сложности на банке в 50k вопросов.
+
+Статистика вопросов генерируется случайно. Меряется: загрузка индекса
+сложности в память (один раз на процесс), подбор вопросов на игру из
+индекса и для сравнения — тот же подбор запросами к базе (перцентиль через
+ORDER BY difficulty ... OFFSET на каждый раунд), а также цена учёта
+сыгранного раунда в статистике (один upsert).
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_question_stats --questions 50000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+
+async def seed(db, questions: int, rated: float):
+    from sqlalchemy import insert
+    from database.db import Question, QuestionStat
+
+    rng = random.Random(1)
+    async with db.transaction() as repo:
+        await repo.session.execute(insert(Question), [
+            {"id": q, "question": f"Вопрос {q}", "answer": str(rng.randint(1, 10**6))}
+            for q in range(1, questions + 1)
+        ])
+        stats = []
+        for q in range(1, questions + 1):
+            if rng.random() < rated:
+                played = rng.randint(1, 20)
+                answers = played * rng.randint(3, 30)
+                relative = answers * rng.betavariate(2, 3)
+                stats.append({"question_id": q, "played": played, "answers": answers,
+                              "error_sum": relative * 1000, "relative_error_sum": relative, "wins": played,
+                              "margin_sum": relative / answers * played / 2, "difficulty": relative / answers})
+        await repo.session.execute(insert(QuestionStat), stats)
+    return len(stats)
+
+
+async def sql_pick(session, curve):
+    # Без индекса в памяти: перцентиль сложности — запросом на каждый раунд
+    from sqlalchemy import func, select
+    from database.db import QuestionStat
+
+    rated = (await session.execute(
+        select(func.count()).select_from(QuestionStat).where(QuestionStat.difficulty.is_not(None))
+    )).scalar_one()
+    picked = []
+    for target in curve:
+        result = await session.execute(
+            select(QuestionStat.question_id).where(QuestionStat.difficulty.is_not(None),
+                                                   QuestionStat.question_id.not_in(picked or [0]))
+            .order_by(QuestionStat.difficulty).offset(round(target * (rated - 1))).limit(1)
+        )
+        picked.append(result.scalar())
+    return picked
+
+
+async def run(args):
+    from database import question_stats
+    from database.db import Database, Repository
+    from database.difficulty_index import DifficultyIndex
+    from utils.game_logic import difficulty_curve
+
+    curve = difficulty_curve(7)
+    async with Database() as db:
+        rated = await seed(db, args.questions, args.rated)
+        print(f"{db.engine.dialect.name}: {args.questions} вопросов, со статистикой {rated}")
+
+        index = DifficultyIndex()
+        async with db.session_factory() as session:
+            started = time.perf_counter()
+            index.load(await question_stats.load_difficulty(session))
+            print(f"  загрузка индекса:        {(time.perf_counter() - started) * 1000:8.1f} мс (один раз)")
+
+            started = time.perf_counter()
+            for _ in range(args.games):
+                picked = index.pick(curve)
+            pick_us = (time.perf_counter() - started) / args.games * 1e6
+            print(f"  подбор из индекса:       {pick_us:8.1f} мкс на игру")
+
+            started = time.perf_counter()
+            for _ in range(args.sql_games):
+                await sql_pick(session, curve)
+            print(f"  подбор запросами:        {(time.perf_counter() - started) / args.sql_games * 1e6:8.1f} мкс на игру")
+
+        async with db.session_factory() as session:
+            repo = Repository(session, difficulty=index)
+            started = time.perf_counter()
+            for n in range(args.games):
+                await repo.record_question_stats(picked[n % len(picked)], 1000.0, [900.0, 1500.0, 1000.0], 1000.0)
+            await session.commit()
+            print(f"  учёт раунда в статистике: {(time.perf_counter() - started) / args.games * 1e6:7.1f} мкс "
+                  f"(upsert + обновление индекса)")
+
+        difficulties = [index.get(qid) for qid in index.pick(curve)]
+        print("  сложность вопросов игры: " + ", ".join(f"{d:.2f}" for d in difficulties))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=50_000)
+    parser.add_argument("--rated", type=float, default=0.8, help="доля вопросов, у которых уже есть статистика")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--sql-games", type=int, default=20)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Бенчмарк ранжирования ответов: сколько стоит найти ближайший ответ в раунде.
+
+Ответы генерируются в разных записях: цифры с разделителями, «тыс.»/«млн»,
+диапазоны, числа словами, единицы измерения, нечисловой мусор. «Холодный» проход —
+с пустым кешем разбора, «тёплый» — когда те же ответы уже встречались.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_ranking --answers 1000 5000 20000
+"""
+import argparse
+import random
+import time
+
+FORMS = [
+    lambda n: str(n),
+    lambda n: f"{n:,}".replace(",", " "),
+    lambda n: f"{n / 1000:.1f} тыс.".replace(".", ",", 1),
+    lambda n: f"около {n} км",
+    lambda n: f"{n - 5}-{n + 5}",
+    lambda n: f"от {n} до {n + 10}",
+    lambda n: "двадцать пять" if n % 2 else "сто сорок",
+    lambda n: f"{n / 1e6:g} млн",
+    lambda n: "не знаю",
+]
+
+
+def make_answers(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [rng.choice(FORMS)(rng.randint(1, 2_000_000)) for _ in range(count)]
+
+
+def main():
+    from utils.ranking import parse_number, rank_answers
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'ответов':>8} {'холодный, мс':>14} {'тёплый, мс':>12} {'мкс на ответ':>14}  ничья  нечисловых")
+    for count in args.answers:
+        answers = make_answers(count)
+        parse_number.cache_clear()
+        started = time.perf_counter()
+        ranking = rank_answers(answers, "1 000 000")
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            rank_answers(answers, "1 000 000")
+        warm = (time.perf_counter() - started) / args.repeat
+
+        non_numeric = sum(distance is None for distance in ranking.distances)
+        print(f"{count:8d} {cold * 1000:14.1f} {warm * 1000:12.1f} {cold / count * 1e6:14.1f}  "
+              f"{'да' if ranking.is_tie else 'нет':>5}  {non_numeric:10d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Повтор записанного потока апдейтов (RECORD_UPDATES) на стенде.
+
+Лог проигрывается в диспетчер из main.py с исходными паузами между
+апдейтами — в реальном времени (--speed 1), в N раз быстрее (--speed N)
+или без пауз (--speed 0) — через тот же пул воркеров с порядком внутри
+чата, что и webhook. Bot API — локальный фейковый, база — временная
+(или DATABASE_URL), банк вопросов наполняется синтетическими вопросами.
+Антиспам работает только на --speed 1: в логе записан и флуд, который он
+отбросил в проде.
+
+В новой базе у игр, раундов и ответов другие id, чем в проде, поэтому
+перед обработкой апдейт переписывается под текущее состояние: ссылка
+room_<id> ведёт в комнату, открытую на повторе под тем же порядковым
+номером, а id раунда и ответа в кнопках — в текущий раунд комнаты
+пользователя и его первый ответ. Действия ведущего (кнопки admin_*,
+/newroom, сообщения ведущего комнаты) — барьер: они обрабатываются после
+всех апдейтов до них и раньше всех после, иначе без пауз ответ игрока
+обогнал бы рассылку вопроса, которая переводит его в ожидание ответа.
+
+Отчёт — пропускная способность и p50/p95/p99 каждого обработчика. Чтобы
+сравнить две сборки, прогоните один лог на каждой с --json и передайте
+результат первой второй через --baseline:
+    python -m benchmarks.bench_replay updates.log.gz --speed 0 --json before.json
+    python -m benchmarks.bench_replay updates.log.gz --speed 0 --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.bench_game import PERCENTILES, git_revision, percentile
+
+# Кнопки с id раунда в конце (или перед номером страницы ответов)
+_ROUND_BUTTON = re.compile(r"^(stake_\w+_|hint_\d_|admin_show_answers_|admin_skip_round_|admin_hint\d_|"
+                           r"admin_autohint_\w+_|admin_answers_)(\d+)(_\d+)?$")
+_WINNER_BUTTON = re.compile(r"^admin_select_winner_\d+$")
+_ROOM_LINK = re.compile(r"^/start room_(\d+)$")
+
+
+class Rebinder:
+    """Переписывает id из прод-базы в id базы повтора"""
+
+    def __init__(self, db, registry):
+        self.db = db
+        self.registry = registry
+        self.rooms = {}
+
+    def is_host_action(self, update: dict) -> bool:
+        """Апдейт ведущего, от которого зависит состояние игроков комнаты"""
+        message = update.get("message")
+        if message:
+            author = message.get("from", {}).get("id")
+            return message.get("text") == "/newroom" or self.registry.hosted_by(author) is not None
+        callback = update.get("callback_query")
+        return bool(callback) and str(callback.get("data", "")).startswith("admin_")
+
+    def _room(self, user_id: int):
+        return self.registry.hosted_by(user_id) or self.registry.room_of(user_id)
+
+    async def _game_id(self, recorded: int) -> int:
+        # Комнаты открываются на повторе в том же порядке, что и в проде
+        if recorded not in self.rooms:
+            async with self.db.transaction() as repo:
+                games = sorted(game.id for game in await repo.get_active_games())
+            free = [game_id for game_id in games if game_id not in self.rooms.values()]
+            if not free:
+                return recorded
+            self.rooms[recorded] = free[0]
+        return self.rooms[recorded]
+
+    async def rebind(self, update: dict) -> dict:
+        message = update.get("message")
+        if message and isinstance(message.get("text"), str):
+            match = _ROOM_LINK.match(message["text"])
+            if match:
+                message["text"] = f"/start room_{await self._game_id(int(match.group(1)))}"
+            return update
+
+        callback = update.get("callback_query")
+        if not callback or not isinstance(callback.get("data"), str):
+            return update
+        room = self._room(callback["from"]["id"])
+        if room is None or room.round_id is None:
+            return update
+        data = callback["data"]
+        match = _ROUND_BUTTON.match(data)
+        if match:
+            callback["data"] = f"{match.group(1)}{room.round_id}{match.group(3) or ''}"
+        elif _WINNER_BUTTON.match(data):
+            async with self.db.transaction() as repo:
+                answers = await repo.get_round_answers(room.round_id)
+            if answers:
+                callback["data"] = f"admin_select_winner_{answers[0].id}"
+        return update
+
+
+class ReplayDispatcher:
+    """Прослойка между пулом воркеров и диспетчером: переписать апдейт перед обработкой"""
+
+    def __init__(self, dp, rebinder: Rebinder):
+        self.dp = dp
+        self.rebinder = rebinder
+        self.raw = {}
+        self.failed = 0
+
+    async def feed_update(self, bot, update):
+        from aiogram.types import Update
+
+        raw = await self.rebinder.rebind(self.raw.pop(update.update_id))
+        try:
+            await self.dp.feed_update(bot, Update.model_validate(raw, context={"bot": bot}))
+        except Exception:
+            self.failed += 1
+            raise
+
+
+def handler_timer(latencies):
+    """Внутренняя мидлварь: время обработчика по имени модуль.функция"""
+    async def middleware(handler, event, data):
+        callback = data["handler"].callback
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            latencies[f"{callback.__module__}.{callback.__qualname__}"].append(time.perf_counter() - started)
+    return middleware
+
+
+def compare(result: dict, baseline: dict):
+    print(f"сравнение с {baseline.get('revision') or 'baseline'}: пропускная способность "
+          f"{baseline['updates_per_second']:.0f} → {result['updates_per_second']:.0f} апдейтов/с "
+          f"({(result['updates_per_second'] / baseline['updates_per_second'] - 1) * 100:+.1f}%)")
+    for name, now in result["handlers"].items():
+        before = baseline["handlers"].get(name)
+        if before is None:
+            print(f"  {name:45} — нет в baseline")
+            continue
+        deltas = ", ".join(
+            f"p{q} {before[f'p{q}_ms']:7.2f} → {now[f'p{q}_ms']:7.2f} мс"
+            f" ({(now[f'p{q}_ms'] / before[f'p{q}_ms'] - 1) * 100 if before[f'p{q}_ms'] else 0.0:+5.0f}%)"
+            for q in (50, 95)
+        )
+        print(f"  {name:45} {deltas}")
+
+
+async def run(args):
+    from benchmarks.fake_bot_api import FakeBotAPI
+    from aiogram.types import Update
+    from database.db import Database, Question
+    from main import create_dispatcher
+    from utils.update_log import read_log
+    from utils.webhook import OrderedUpdateProcessor
+
+    logging.getLogger().setLevel(logging.ERROR)
+    records = list(read_log(args.log))
+    if not records:
+        print(f"{args.log}: апдейтов нет")
+        return
+    api = FakeBotAPI(latency=args.latency)
+    await api.start()
+    bot = api.make_bot()
+
+    async with Database() as db:
+        async with db.transaction() as repo:
+            repo.session.add_all(
+                Question(question=f"Вопрос {i}", answer=str(i), hint1="1", hint2="2", hint3="3")
+                for i in range(args.questions)
+            )
+        dp = create_dispatcher(bot, db)
+        dp["broadcaster"].bucket.rate = dp["broadcaster"].bucket.capacity = 10_000
+        dp["broadcaster"].chat_limiter.interval = 0
+        if args.speed != 1:
+            # Сжатое время делает игроков быстрее живых — антиспам резал бы то, что в проде прошло
+            dp.update.outer_middleware.unregister(dp["throttle"])
+        latencies = defaultdict(list)
+        timer = handler_timer(latencies)
+        dp.message.middleware(timer)
+        dp.callback_query.middleware(timer)
+        await dp.emit_startup(bot=bot, **dp.workflow_data)
+
+        rebinder = Rebinder(db, dp["room_registry"])
+        replay = ReplayDispatcher(dp, rebinder)
+        processor = OrderedUpdateProcessor(bot, replay, workers=args.workers)
+        await processor.start()
+
+        recorded = records[-1][0] - records[0][0]
+        speed = f"x{args.speed:g}" if args.speed else "без пауз"
+        print(f"{db.engine.dialect.name}: {len(records)} апдейтов, записано за {recorded:.0f} с, повтор {speed}")
+        started = time.perf_counter()
+        offset, previous = 0.0, records[0][0]
+        for update_id, (received, raw) in enumerate(records, 1):
+            # Длинные простои (бот стоял, ночь между играми) сжимаются до max_gap
+            offset += min(received - previous, args.max_gap)
+            previous = received
+            if args.speed:
+                delay = started + offset / args.speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            raw["update_id"] = update_id
+            replay.raw[update_id] = raw
+            barrier = rebinder.is_host_action(raw)
+            if barrier:
+                await processor.drain()
+            await processor.submit(Update.model_validate(raw, context={"bot": bot}))
+            if barrier:
+                await processor.drain()
+        await processor.close()
+        elapsed = time.perf_counter() - started
+        await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+
+    await bot.session.close()
+    await api.stop()
+
+    handlers = {}
+    for name, values in sorted(latencies.items(), key=lambda item: -sum(item[1])):
+        values = sorted(values)
+        handlers[name] = {"calls": len(values),
+                          **{f"p{q}_ms": round(percentile(values, q) * 1000, 3) for q in PERCENTILES}}
+    result = {
+        "revision": git_revision(),
+        "dialect": db.engine.dialect.name,
+        "log": os.path.basename(args.log),
+        "updates": len(records),
+        "failed": replay.failed,
+        "speed": args.speed,
+        "seconds": round(elapsed, 3),
+        "updates_per_second": round(len(records) / elapsed, 1),
+        "api_calls": dict(api.calls),
+        "handlers": handlers,
+    }
+    print(f"  {len(records)} апдейтов за {elapsed:.2f} с ({result['updates_per_second']:.0f} апдейтов/с), "
+          f"с ошибкой: {replay.failed}")
+    print(f"  {'обработчик':45} {'вызовов':>7} {'p50, мс':>8} {'p95, мс':>8} {'p99, мс':>8}")
+    for name, row in handlers.items():
+        print(f"  {name:45} {row['calls']:7d} {row['p50_ms']:8.2f} {row['p95_ms']:8.2f} {row['p99_ms']:8.2f}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(result, json.load(f))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"результат: {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="лог апдейтов (RECORD_UPDATES)")
+    parser.add_argument("--speed", type=float, default=1.0, help="во сколько раз быстрее записи (0 — без пауз)")
+    parser.add_argument("--max-gap", type=float, default=30.0, help="простой дольше стольких секунд сжимается")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--questions", type=int, default=1000, help="синтетических вопросов в банке")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка фейкового Bot API, с")
+    parser.add_argument("--json", help="сохранить результат в JSON")
+    parser.add_argument("--baseline", help="JSON прогона другой сборки для сравнения")
+    args = parser.parse_args()
+
+    from utils.update_log import REPLAY_ADMIN_ID
+
+    # Повтор сам ничего не записывает; админ в логе — под псевдонимом REPLAY_ADMIN_ID
+    os.environ["RECORD_UPDATES"] = ""
+    os.environ["ADMIN_ID"] = str(REPLAY_ADMIN_ID)
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/replay.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Нагрузочный тест комнат: десятки игр одновременно в одном процессе.
+
+Каждая комната — ведущий и несколько игроков: /newroom, вход по ссылке,
+старт игры, ответы всех игроков, выбор победителя, следующий раунд, конец игры.
+Апдейты идут через create_dispatcher (как в бою) и фейковый Bot API; одновременно
+обрабатывается не больше --concurrency апдейтов, как у пула воркеров webhook.
+В конце проверяется, что ответы каждого раунда пришли ровно от игроков своей комнаты.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_rooms --rooms 50 --players 6 --rounds 3
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+
+class Driver:
+    """Шлёт апдейты в диспетчер и меряет время обработки каждого"""
+
+    def __init__(self, dp, bot, concurrency: int):
+        self.dp = dp
+        self.bot = bot
+        self.slots = asyncio.Semaphore(concurrency)
+        self.ids = itertools.count(1)
+        self.latencies = []
+
+    async def _feed(self, payload: dict):
+        from aiogram.types import Update
+
+        update_id = next(self.ids)
+        update = Update.model_validate({"update_id": update_id, **payload}, context={"bot": self.bot})
+        async with self.slots:
+            started = time.perf_counter()
+            await self.dp.feed_update(self.bot, update)
+            self.latencies.append(time.perf_counter() - started)
+
+    async def message(self, user_id: int, text: str):
+        message_id = next(self.ids)
+        await self._feed({"message": {
+            "message_id": message_id, "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Игрок {user_id}"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+            if text.startswith("/") else None,
+        }})
+
+    async def callback(self, user_id: int, data: str):
+        query_id = next(self.ids)
+        await self._feed({"callback_query": {
+            "id": str(query_id), "chat_instance": "bench", "data": data,
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Ведущий {user_id}"},
+            "message": {"message_id": 1, "date": int(time.time()),
+                        "chat": {"id": user_id, "type": "private"}, "text": "…"},
+        }})
+
+
+async def play_room(driver: Driver, registry, db, host_id: int, player_ids, rounds: int) -> dict:
+    await driver.message(host_id, "/newroom")
+    room = registry.hosted_by(host_id)
+    game_id = room.game_id
+    await asyncio.gather(*(driver.message(p, f"/start room_{game_id}") for p in player_ids))
+    await driver.callback(host_id, "admin_start_game")
+
+    answered = []
+    for number in range(1, rounds + 1):
+        round_id = room.round_id
+        await asyncio.gather(*(driver.message(p, f"{p * number}") for p in player_ids))
+        async with db.transaction() as repo:
+            answers = await repo.get_round_answers(round_id)
+        answered.append({a.user_id for a in answers})
+        await driver.callback(host_id, f"admin_show_answers_{round_id}")
+        await driver.callback(host_id, f"admin_select_winner_{answers[0].id}")
+        if number < rounds:
+            await driver.callback(host_id, f"admin_next_round_{number}")
+    await driver.callback(host_id, "admin_end_game")
+    return {"game_id": game_id, "answered": answered}
+
+
+async def run(args):
+    from benchmarks.fake_bot_api import FakeBotAPI
+    from database.db import Database, Question
+    from main import create_dispatcher
+
+    logging.getLogger().setLevel(logging.ERROR)
+    api = FakeBotAPI(latency=args.latency)
+    await api.start()
+    bot = api.make_bot()
+
+    async with Database() as db:
+        async with db.transaction() as repo:
+            repo.session.add_all(
+                Question(question=f"Вопрос {i}", answer=str(i), hint1="1", hint2="2", hint3="3")
+                for i in range(args.rooms * args.rounds + 10)
+            )
+        dp = create_dispatcher(bot, db)
+        # Лимиты Bot API здесь не меряем: фейковый сервер их не держит
+        dp["broadcaster"].bucket.rate = dp["broadcaster"].bucket.capacity = 10_000
+        dp["broadcaster"].chat_limiter.interval = 0
+        # Антиспам не меряем: виртуальные игроки жмут быстрее живых
+        dp.update.outer_middleware.unregister(dp["throttle"])
+        await dp.emit_startup(bot=bot, **dp.workflow_data)
+
+        driver = Driver(dp, bot, args.concurrency)
+        registry = dp["room_registry"]
+        rooms = [
+            (10_000 + r, [1_000_000 + r * 1000 + p for p in range(args.players)])
+            for r in range(args.rooms)
+        ]
+        print(f"{db.engine.dialect.name}: {args.rooms} комнат по {args.players} игроков, "
+              f"{args.rounds} раунда, до {args.concurrency} апдейтов одновременно")
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            play_room(driver, registry, db, host_id, players, args.rounds) for host_id, players in rooms
+        ))
+        elapsed = time.perf_counter() - started
+
+        broken = sum(
+            any(answered != set(players) for answered in result["answered"])
+            for (_, players), result in zip(rooms, results)
+        )
+        latencies = sorted(driver.latencies)
+        print(f"  {len(latencies)} апдейтов за {elapsed:.2f} с ({len(latencies) / elapsed:.0f} апдейтов/с)")
+        print(f"  обработка апдейта: p50 {statistics.median(latencies) * 1000:.1f} мс, "
+              f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} мс")
+        print(f"  комнат с потерянными или чужими ответами: {broken}, открытых комнат осталось: {len(registry)}")
+
+        await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+
+    await bot.session.close()
+    await api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--players", type=int, default=6, help="игроков в комнате")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка фейкового Bot API, с")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Бенчмарк таблицы лидеров: готовая таблица standings против пересчёта по ставкам.
+
+База наполняется историей игр: обязательные ставки и повышения каждого игрока
+в каждом раунде, выплаты победителям. Таблица лидеров игры читается из
+standings (строка на игрока) и для сравнения собирается агрегацией по журналу
+bets/payouts — так пришлось бы делать без поддерживаемой таблицы.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_standings --games 500 --players 20 --raises 3
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+
+async def seed(db, games: int, players: int, raises: int):
+    from sqlalchemy import insert
+    from config import MAX_ROUNDS, STARTING_BALANCE
+    from database.db import Bet, Game, Payout, Round, Standing, User
+    from utils.stakes import ante_for_round
+
+    rng = random.Random(1)
+    user_ids = [10_000 + i for i in range(players)]
+    async with db.transaction() as repo:
+        session = repo.session
+        await session.execute(insert(User), [{"id": u, "first_name": f"Игрок {u}"} for u in user_ids])
+        for game_id in range(1, games + 1):
+            balances = dict.fromkeys(user_ids, STARTING_BALANCE)
+            stats = {u: {"staked": 0, "won": 0, "rounds_won": 0} for u in user_ids}
+            rounds, bets, payouts = [], [], []
+            for number in range(1, MAX_ROUNDS + 1):
+                round_id = (game_id - 1) * MAX_ROUNDS + number
+                bank, step = 0, ante_for_round(number)
+                for user_id in user_ids:
+                    for kind in ["ante"] + ["raise"] * rng.randint(0, raises):
+                        amount = min(step, balances[user_id])
+                        if amount <= 0:
+                            break
+                        bets.append({"round_id": round_id, "user_id": user_id, "kind": kind, "amount": amount})
+                        balances[user_id] -= amount
+                        stats[user_id]["staked"] += amount
+                        bank += amount
+                winner = rng.choice(user_ids)
+                balances[winner] += bank
+                stats[winner]["won"] += bank
+                stats[winner]["rounds_won"] += 1
+                rounds.append({"id": round_id, "game_id": game_id, "round_number": number, "question": "?",
+                               "is_active": False, "winner_id": winner, "bank": 0})
+                payouts.append({"round_id": round_id, "user_id": winner, "amount": bank})
+            await session.execute(insert(Game), [{"id": game_id, "is_active": False}])
+            await session.execute(insert(Round), rounds)
+            await session.execute(insert(Bet), bets)
+            await session.execute(insert(Payout), payouts)
+            await session.execute(insert(Standing), [
+                {"game_id": game_id, "user_id": u, "balance": balances[u], **stats[u]} for u in user_ids
+            ])
+
+
+async def ledger_standings(repo, game_id: int):
+    # Без standings: баланс = старт − ставки + выплаты, по всей истории игры
+    from sqlalchemy import func, select
+    from config import STARTING_BALANCE
+    from database.db import Bet, Payout, Round
+
+    staked = (select(Bet.user_id, func.sum(Bet.amount).label("amount"))
+              .join(Round, Round.id == Bet.round_id).where(Round.game_id == game_id)
+              .group_by(Bet.user_id).subquery())
+    won = (select(Payout.user_id, func.sum(Payout.amount).label("amount"), func.count().label("rounds"))
+           .join(Round, Round.id == Payout.round_id).where(Round.game_id == game_id)
+           .group_by(Payout.user_id).subquery())
+    balance = STARTING_BALANCE - staked.c.amount + func.coalesce(won.c.amount, 0)
+    result = await repo.session.execute(
+        select(staked.c.user_id, balance.label("balance"), func.coalesce(won.c.rounds, 0))
+        .outerjoin(won, won.c.user_id == staked.c.user_id)
+        .order_by(balance.desc())
+    )
+    return result.all()
+
+
+async def run(args):
+    from sqlalchemy import text
+    from database.db import Database, Repository
+
+    async with Database() as db:
+        started = time.perf_counter()
+        await seed(db, args.games, args.players, args.raises)
+        async with db.session_factory() as session:
+            repo = Repository(session)
+            bets = (await session.execute(text("SELECT count(*) FROM bets"))).scalar_one()
+            print(f"{db.engine.dialect.name}: {args.games} игр по {args.players} игроков, {bets} ставок "
+                  f"(наполнение {time.perf_counter() - started:.1f} с)")
+
+            game_id = args.games
+            table = [(row.user_id, row.balance) for row in await repo.get_standings(game_id)]
+            ledger = [(row[0], row[1]) for row in await ledger_standings(repo, game_id)]
+            print(f"  standings совпадает с журналом: {'да' if sorted(table) == sorted(ledger) else 'НЕТ'}")
+
+            for title, query in (("standings", lambda: repo.get_standings(game_id)),
+                                 ("агрегация по журналу", lambda: ledger_standings(repo, game_id))):
+                await query()
+                started = time.perf_counter()
+                for _ in range(args.repeat):
+                    await query()
+                print(f"  {title:<22} {(time.perf_counter() - started) / args.repeat * 1e6:9.0f} мкс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--raises", type=int, default=3, help="до скольких повышений за раунд у игрока")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Бенчмарк старта бота: время до первого обработанного апдейта.
+
+Бот запускается как в проде — отдельным процессом `python main.py` в режиме
+polling — и говорит с фейковым Bot API (TELEGRAM_API_URL). Ещё до запуска в
+очереди getUpdates лежит /start; замер — от запуска процесса до ответа бота
+на него, то есть импорты, проверка схемы, восстановление комнат и первый
+апдейт вместе. Два случая: первый запуск на пустой базе и перезапуск на
+рабочей базе (банк вопросов, история игр и идущие игры, которые надо
+поднять в комнаты). Для сравнения — голый импорт main.
+
+Отдельно, в процессе бенчмарка, — слагаемые старта: проверка версии схемы
+одним SELECT против полного пути миграций (блокировка и inspect),
+восстановление комнат пачкой против трёх запросов на игру, и вопрос раунда
+из снимка на диске против запроса к базе.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_startup --runs 5 --active-games 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_bot_api import BOT_TOKEN, FakeBotAPI
+from benchmarks.bench_webhook import start_update
+
+
+async def seed(questions: int, finished: int, active: int, players: int):
+    from sqlalchemy import insert
+    from config import MAX_ROUNDS
+    from database.db import Database, Game, GamePlayer, GameQuestion, PlayerAnswer, Question, Round, User
+
+    user_ids = [10_000 + i for i in range(players)]
+    async with Database() as db:
+        async with db.transaction() as repo:
+            session = repo.session
+            await session.execute(insert(User), [{"id": u, "first_name": f"Игрок {u}"} for u in user_ids])
+            await session.execute(insert(Question), [
+                {"id": q, "question": f"Вопрос {q}", "answer": str(q), "hint1": "a", "hint2": "b", "hint3": "c"}
+                for q in range(1, questions + 1)
+            ])
+            for game_id in range(1, finished + active + 1):
+                is_active = game_id > finished
+                played = 3 if is_active else MAX_ROUNDS
+                rounds = [{"id": game_id * MAX_ROUNDS + n, "game_id": game_id, "round_number": n,
+                           "question": f"Вопрос {n}", "is_active": is_active and n == played}
+                          for n in range(1, played + 1)]
+                await session.execute(insert(Game), [{"id": game_id, "is_active": is_active, "host_id": game_id}])
+                await session.execute(insert(GamePlayer), [{"game_id": game_id, "user_id": u} for u in user_ids])
+                await session.execute(insert(GameQuestion), [
+                    {"game_id": game_id, "round_number": n, "question_id": (game_id * MAX_ROUNDS + n) % questions + 1}
+                    for n in range(1, MAX_ROUNDS + 1)
+                ])
+                await session.execute(insert(Round), rounds)
+                await session.execute(insert(PlayerAnswer), [
+                    {"round_id": r["id"], "user_id": u, "answer": str(u)} for r in rounds for u in user_ids
+                ])
+
+
+async def legacy_load(registry, repo):
+    # Как было: по три запроса на каждую идущую игру
+    for game in await repo.get_active_games():
+        room = registry.open(game.id, game.host_id)
+        registry.join(room, await repo.get_game_player_ids(game.id))
+        room.current_round = await repo.count_rounds(game.id)
+        current = await repo.get_current_round(game.id)
+        room.round_id = current.id if current else None
+
+
+async def average(action, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await action()
+    return (time.perf_counter() - started) / repeat
+
+
+async def breakdown(args):
+    """Слагаемые старта на рабочей базе, в мс/мкс"""
+    from config import MAX_ROUNDS
+    from database import migrations
+    from database.db import Base, Database
+    from utils.rooms import RoomRegistry
+
+    async with Database() as db:
+        async def full_migrate():
+            async with db.engine.begin() as conn:
+                await conn.run_sync(migrations._upgrade, Base.metadata)
+
+        fast = await average(lambda: migrations.migrate(db.engine, Base.metadata), 20)
+        full = await average(full_migrate, 20)
+        print(f"  версия схемы: один SELECT {fast * 1000:6.2f} мс, блокировка + inspect {full * 1000:6.2f} мс")
+
+        async def load(method):
+            async with db.transaction() as repo:
+                await method(RoomRegistry(), repo)
+
+        batched = await average(lambda: load(lambda registry, repo: registry.load(repo, 1)), 5)
+        legacy = await average(lambda: load(legacy_load), 5)
+        print(f"  комнаты {args.active_games} игр: пачкой {batched * 1000:6.1f} мс, по запросам на игру "
+              f"{legacy * 1000:6.1f} мс")
+
+        snapshot = db.questions
+        started = time.perf_counter()
+        await snapshot.refresh(db)
+        print(f"  снимок вопросов: сборка {time.perf_counter() - started:5.2f} с (в фоне после старта), "
+              f"файл {os.path.getsize(snapshot.path) / 2**20:.1f} МБ")
+
+        game_ids = range(args.finished_games + 1, args.finished_games + args.active_games + 1)
+        async with db.transaction() as repo:
+            question_ids = await repo.get_question_ids_by_game(game_ids)
+            rounds = [(game_id, n) for game_id in game_ids for n in range(1, MAX_ROUNDS + 1)]
+            started = time.perf_counter()
+            for game_id, number in rounds:
+                await repo.get_game_question(game_id, number)
+            query = (time.perf_counter() - started) / len(rounds)
+            repo.session.expunge_all()
+            started = time.perf_counter()
+            for game_id, number in rounds:
+                await repo.get_game_question(game_id, number, question_ids[game_id][number - 1])
+            mapped = (time.perf_counter() - started) / len(rounds)
+        print(f"  вопрос раунда: из снимка {mapped * 1e6:6.1f} мкс, запросом к базе {query * 1e6:6.1f} мкс")
+
+
+async def time_to_first_update(api: FakeBotAPI, url: str, update_id: int) -> float:
+    """Запустить бота, дождаться ответа на /start, остановить; секунды от запуска до ответа"""
+    api.reset()
+    api.push_update(start_update(update_id, 1))
+    env = dict(os.environ, BOT_TOKEN=BOT_TOKEN, TELEGRAM_API_URL=api.base_url, DATABASE_URL=url,
+               BOT_MODE="polling", ADMIN_ID="1")
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "main.py", env=env,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        while not api.sent:
+            if process.returncode is not None:
+                raise RuntimeError(f"бот завершился с кодом {process.returncode}")
+            await asyncio.sleep(0.002)
+        return api.sent[0][0] - started
+    finally:
+        process.terminate()
+        await process.wait()
+
+
+async def time_import(runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(sys.executable, "-c", "import main")
+        await process.wait()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+async def run(args):
+    api = FakeBotAPI(latency=args.latency)
+    await api.start()
+    directory = tempfile.mkdtemp()
+    update_id = 0
+    try:
+        print(f"импорт main: {await time_import(args.runs) * 1000:6.0f} мс")
+
+        cold = []
+        for n in range(args.runs):
+            update_id += 1
+            cold.append(await time_to_first_update(api, f"sqlite:///{directory}/cold{n}.db", update_id))
+        print(f"пустая база (создание схемы): {statistics.median(cold) * 1000:6.0f} мс до первого ответа")
+
+        # Бот в дочернем процессе берёт ту же базу, что и наполнение
+        url = os.environ.setdefault("DATABASE_URL", f"sqlite:///{directory}/warm.db")
+        started = time.perf_counter()
+        await seed(args.questions, args.finished_games, args.active_games, args.players)
+        print(f"рабочая база: {args.questions} вопросов, {args.finished_games} прошлых игр, "
+              f"{args.active_games} идущих по {args.players} игроков (наполнение {time.perf_counter() - started:.0f} с)")
+        warm = []
+        for _ in range(args.runs):
+            update_id += 1
+            warm.append(await time_to_first_update(api, url, update_id))
+        print(f"рабочая база (перезапуск):    {statistics.median(warm) * 1000:6.0f} мс до первого ответа "
+              f"(мин {min(warm) * 1000:.0f}, макс {max(warm) * 1000:.0f})")
+        await breakdown(args)
+    finally:
+        await api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=50_000)
+    parser.add_argument("--finished-games", type=int, default=1000)
+    parser.add_argument("--active-games", type=int, default=50)
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.03, help="сетевая задержка фейкового Bot API, с")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Бенчмарк антиспама: цена мидлвари и флуд через полный диспетчер.
+
+Сначала — сама ThrottlingMiddleware вокруг пустого обработчика: сколько
+микросекунд стоит пропущенный и отброшенный апдейт и какая это доля
+одного ядра при 10 000 апдейтов/с от тысяч пользователей.
+
+Потом — флуд через create_dispatcher с антиспамом и без: игроки во время
+подсказок шлют сообщения пачками (их всё равно выбросит
+ignore_messages_during_hints) и жмут «✅ Я готов играть!» по много раз
+(каждое нажатие — set_user_ready). Считаются время, апдейты/с, SQL-запросы
+и сколько апдейтов отброшено до FSM и базы.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_throttle --users 5000 --players 50 --spam 40
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+def make_update(update_id: int, user_id: int, text: str):
+    from aiogram.types import Update
+
+    return Update.model_validate({"update_id": update_id, "message": {
+        "message_id": update_id, "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": {"id": user_id, "is_bot": False, "first_name": f"Игрок {user_id}"},
+        "text": text,
+    }})
+
+
+async def middleware_cost(users: int, repeat: int):
+    from middlewares.throttling import ThrottlingMiddleware
+    from utils.rooms import RoomRegistry
+
+    async def handler(event, data):
+        return None
+
+    throttle = ThrottlingMiddleware(RoomRegistry())
+    # Каждый пользователь пишет разное и редко — всё проходит
+    updates = [make_update(n, 10_000 + n % users, f"ответ {n}") for n in range(repeat)]
+    contexts = [{"event_from_user": update.message.from_user} for update in updates]
+    started = time.perf_counter()
+    for update, data in zip(updates, contexts):
+        await throttle(handler, update, data)
+    passed = (time.perf_counter() - started) / repeat
+
+    # Один пользователь шлёт одно и то же — после первого всё отбрасывается
+    flood = make_update(0, 42, "спам")
+    data = {"event_from_user": flood.message.from_user}
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await throttle(handler, flood, data)
+    dropped = (time.perf_counter() - started) / repeat
+
+    baseline_started = time.perf_counter()
+    for update, data in zip(updates, contexts):
+        await handler(update, data)
+    bare = (time.perf_counter() - baseline_started) / repeat
+    print(f"мидлварь, {users} пользователей:")
+    print(f"  пропущенный апдейт: {(passed - bare) * 1e6:5.2f} мкс, отброшенный: {(dropped - bare) * 1e6:5.2f} мкс")
+    print(f"  при 10 000 апдейтов/с: {(passed - bare) * 10_000 * 100:.1f}% одного ядра")
+    slots = throttle.policies["message"].slots
+    print(f"  таблица корзин: {slots} ячеек, {slots * 40 * len(throttle.policies) / 1024:.0f} КБ на все политики")
+
+
+def dropped_total() -> int:
+    from middlewares.throttling import THROTTLED
+
+    return sum(series.value for series in THROTTLED._series.values())
+
+
+async def flood(dp, bot, sim, db, player_ids, spam: int, title: str):
+    from aiogram.fsm.storage.base import StorageKey
+    from handlers.player import PlayerGameStates
+
+    storage = dp.fsm.storage
+    for user_id in player_ids:
+        await storage.set_state(StorageKey(bot_id=bot.id, chat_id=user_id, user_id=user_id),
+                                PlayerGameStates.waiting_hints)
+    # Первое нажатие «готов» должно пройти: игрок заводится в базе
+    await asyncio.gather(*(sim.message("start", p, "/start") for p in player_ids))
+
+    dropped_before = dropped_total()
+    statements_before = sum(sum(values) for values in sim.statements.values())
+    updates_before = sum(len(values) for values in sim.latencies.values())
+    started = time.perf_counter()
+
+    async def player(user_id: int):
+        for n in range(spam):
+            await sim.message("spam", user_id, f"спам {n}")
+            await sim.message("ready", user_id, "✅ Я готов играть!")
+
+    await asyncio.gather(*(player(p) for p in player_ids))
+    elapsed = time.perf_counter() - started
+    updates = sum(len(values) for values in sim.latencies.values()) - updates_before
+    statements = sum(sum(values) for values in sim.statements.values()) - statements_before
+    print(f"  {title:18} {updates} апдейтов за {elapsed:5.2f} с ({updates / elapsed:6.0f}/с), "
+          f"SQL-запросов {statements:6d}, отброшено {dropped_total() - dropped_before}")
+
+
+async def run(args):
+    import logging
+    from benchmarks.bench_game import Simulator
+    from benchmarks.fake_bot_api import FakeBotAPI
+    from database.db import Database
+    from main import create_dispatcher
+
+    await middleware_cost(args.users, args.repeat)
+
+    logging.getLogger().setLevel(logging.ERROR)
+    api = FakeBotAPI(latency=0)
+    await api.start()
+    bot = api.make_bot()
+    async with Database() as db:
+        dp = create_dispatcher(bot, db)
+        await dp.emit_startup(bot=bot, **dp.workflow_data)
+        sim = Simulator(dp, bot, args.concurrency)
+        print(f"флуд {db.engine.dialect.name}: {args.players} игроков по {args.spam} сообщений и {args.spam} «готов»")
+        await flood(dp, bot, sim, db, [2_000_000 + p for p in range(args.players)], args.spam, "с антиспамом")
+        dp.update.outer_middleware.unregister(dp["throttle"])
+        await flood(dp, bot, sim, db, [3_000_000 + p for p in range(args.players)], args.spam, "без антиспама")
+        await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+    await bot.session.close()
+    await api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000, help="пользователей в замере мидлвари")
+    parser.add_argument("--repeat", type=int, default=100_000)
+    parser.add_argument("--players", type=int, default=50, help="игроков во флуде")
+    parser.add_argument("--spam", type=int, default=40, help="сообщений и нажатий «готов» на игрока")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
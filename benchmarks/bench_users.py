@@ -0,0 +1,124 @@
+"""Одновременные /start и «Я готов играть!»: SELECT + INSERT против upsert с кешем.
+
+Каждый из --users игроков шлёт /start --dup раз одновременно (двойной тап,
+повтор апдейта), потом все разом жмут «готов». Каждый апдейт — своя сессия
+и свой коммит, как в DbSessionMiddleware. Считаются запросы к базе, ошибки
+конфликта ключа и расхождения кеша готовых игроков с базой, в том числе
+после отката транзакции.
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_users --users 300 --dup 3
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+async def legacy_get_or_create_user(session, user_id, username, first_name):
+    # Как было в Repository.get_or_create_user: SELECT, потом INSERT при коммите
+    from sqlalchemy import select
+    from database.db import User
+
+    user = (await session.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if not user:
+        session.add(User(id=user_id, username=username, first_name=first_name, is_admin=False))
+    return user
+
+
+class Load:
+    """Апдейты параллельно, каждый в своей сессии; считает запросы и ошибки"""
+
+    def __init__(self, db, concurrency: int):
+        self.db = db
+        self.slots = asyncio.Semaphore(concurrency)
+        self.statements = 0
+        self.errors = 0
+
+    async def update(self, body):
+        from database import stats
+        from database.db import Repository
+
+        async with self.slots:
+            with stats.collect() as query_stats:
+                async with self.db.session_factory() as session:
+                    try:
+                        await body(Repository(session, self.db.users))
+                        await session.commit()
+                    except Exception:
+                        self.errors += 1
+                        await session.rollback()
+            self.statements += query_stats.statements
+
+    async def wave(self, title, bodies):
+        self.statements = self.errors = 0
+        started = time.perf_counter()
+        await asyncio.gather(*(self.update(body) for body in bodies))
+        elapsed = time.perf_counter() - started
+        print(f"  {title:<34} {len(bodies):6d} апдейтов  запросов {self.statements:6d}  "
+              f"ошибок {self.errors:4d}  {elapsed:6.2f} с")
+
+
+def start(user_id):
+    return lambda repo: repo.get_or_create_user(user_id, f"user{user_id}", f"Игрок {user_id}")
+
+
+def legacy_start(user_id):
+    return lambda repo: legacy_get_or_create_user(repo.session, user_id, f"user{user_id}", f"Игрок {user_id}")
+
+
+def ready(user_id):
+    return lambda repo: repo.set_user_ready(user_id, True)
+
+
+async def db_ready_ids(db):
+    from sqlalchemy import select
+    from database.db import User
+
+    async with db.session_factory() as session:
+        return set((await session.execute(select(User.id).where(User.is_ready == True))).scalars())
+
+
+async def run(args):
+    from database.db import Database, Repository
+
+    async with Database() as db:
+        load = Load(db, args.concurrency)
+        print(f"{db.engine.dialect.name}: {args.users} игроков, /start по {args.dup} раза одновременно")
+
+        legacy_ids = range(1, args.users + 1)
+        await load.wave("SELECT + INSERT", [legacy_start(u) for u in legacy_ids for _ in range(args.dup)])
+
+        user_ids = range(100_001, 100_001 + args.users)
+        await load.wave("upsert, холодный кеш", [start(u) for u in user_ids for _ in range(args.dup)])
+        await load.wave("upsert, повторный /start", [start(u) for u in user_ids])
+        await load.wave("«готов»", [ready(u) for u in user_ids])
+        await load.wave("лобби, первый сбор", [lambda repo: repo.get_ready_players()])
+        await load.wave("лобби, из памяти", [lambda repo: repo.get_ready_players()] * 10)
+
+        # Откат не должен оставить в кеше готовность, которой нет в базе
+        async with db.session_factory() as session:
+            await Repository(session, db.users).set_user_ready(1, True)
+            await session.rollback()
+
+        async with db.session_factory() as session:
+            cached = set(await Repository(session, db.users).get_ready_player_ids())
+        expected = await db_ready_ids(db)
+        print(f"  готовых в базе {len(expected)}, в кеше {len(cached)}, расхождений {len(cached ^ expected)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--dup", type=int, default=3, help="сколько раз каждый шлёт /start одновременно")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
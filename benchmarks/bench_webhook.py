@@ -0,0 +1,161 @@
+"""Бенчмарк задержки: polling против webhook.
+
+Бот собирается через create_dispatcher и говорит с фейковым Bot API. Игроки
+присылают /start; задержка — от момента, когда апдейт появился у "Telegram",
+до ответа бота этому игроку. В polling апдейт забирается через getUpdates,
+в webhook — POST на локальный сервер (с той же сетевой задержкой).
+
+Запуск из корня репозитория (по умолчанию — временная SQLite-база):
+    python -m benchmarks.bench_webhook --players 200
+
+Записанные апдейты можно отправить в запущенный бот (BOT_MODE=webhook) руками:
+    curl -H "X-Telegram-Bot-Api-Secret-Token: $WEBHOOK_SECRET" \\
+         -H "Content-Type: application/json" -d @update.json http://localhost:8080/webhook
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+SECRET = "bench-secret"
+PATH = "/webhook"
+
+
+def start_update(update_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Игрок {user_id}"},
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    }
+
+
+class Scenario:
+    """Раздаёт апдейты и ждёт ответа бота каждому игроку"""
+
+    def __init__(self, api, deliver, timeout):
+        self.api = api
+        self.deliver = deliver
+        self.timeout = timeout
+        self.update_id = 0
+
+    async def burst(self, user_ids):
+        self.api.sent.clear()
+        pushed = {}
+        for uid in user_ids:
+            self.update_id += 1
+            pushed[uid] = time.perf_counter()
+            await self.deliver(start_update(self.update_id, uid))
+        answered = {}
+        deadline = time.perf_counter() + self.timeout
+        # Апдейт, упавший с ошибкой в обработчике, ответа не получит — не ждём вечно
+        while len(answered) < len(user_ids) and time.perf_counter() < deadline:
+            for at, chat_id in self.api.sent:
+                if chat_id in pushed and chat_id not in answered:
+                    answered[chat_id] = at - pushed[chat_id]
+            await asyncio.sleep(0.001)
+        return list(answered.values()), len(user_ids) - len(answered)
+
+
+def percentiles(latencies):
+    if not latencies:
+        return "     нет ответов"
+    latencies = sorted(latencies)
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    return f"p50 {statistics.median(latencies) * 1000:7.1f} мс  p95 {p95 * 1000:7.1f} мс"
+
+
+async def measure(title, scenario, args, first_uid):
+    single, lost = [], 0
+    for i in range(args.samples):
+        latencies, missed = await scenario.burst([first_uid + i])
+        single += latencies
+        lost += missed
+    uids = list(range(first_uid + args.samples, first_uid + args.samples + args.players))
+    started = time.perf_counter()
+    burst, burst_lost = await scenario.burst(uids)
+    wall = time.perf_counter() - started
+
+    print(f"  {title}")
+    print(f"    один апдейт:  {percentiles(single)}  без ответа {lost}")
+    print(f"    пачка {args.players:>4}:   {percentiles(burst)}  без ответа {burst_lost}  всего {wall:6.2f} с")
+
+
+async def run(args):
+    import logging
+    import aiohttp
+    from aiohttp import web
+
+    from benchmarks.fake_bot_api import FakeBotAPI
+    from database.db import Database
+    from main import create_dispatcher
+    from utils.webhook import SECRET_HEADER, create_webhook_app
+
+    logging.getLogger().setLevel(logging.WARNING)
+    api = FakeBotAPI(latency=args.latency)
+    await api.start()
+    bot = api.make_bot()
+
+    async with Database() as db:
+        dp = create_dispatcher(bot, db)
+        print(f"{db.engine.dialect.name}: сетевая задержка {args.latency * 1000:.0f} мс, "
+              f"{args.samples} одиночных апдейтов и пачка из {args.players}")
+
+        # Polling
+        polling = asyncio.create_task(dp.start_polling(
+            bot, polling_timeout=10, handle_signals=False, close_bot_session=False
+        ))
+
+        async def push(update):
+            api.push_update(update)
+
+        await measure("polling", Scenario(api, push, args.timeout), args, 1_000_000)
+        await dp.stop_polling()
+        await polling
+
+        # Webhook
+        app = create_webhook_app(bot, dp, PATH, SECRET)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}{PATH}"
+
+        async with aiohttp.ClientSession() as http:
+            async def post(update):
+                async def send():
+                    # Telegram → бот идёт по той же сети, что и бот → Telegram
+                    await asyncio.sleep(args.latency)
+                    async with http.post(url, json=update, headers={SECRET_HEADER: SECRET}) as resp:
+                        assert resp.status == 200, resp.status
+                asyncio.create_task(send())
+
+            await measure("webhook", Scenario(api, post, args.timeout), args, 2_000_000)
+        await runner.cleanup()
+
+    await bot.session.close()
+    await api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=20, help="одиночных апдейтов подряд")
+    parser.add_argument("--latency", type=float, default=0.03, help="сетевая задержка до Telegram, с")
+    parser.add_argument("--timeout", type=float, default=30, help="сколько ждать ответа на пачку, с")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
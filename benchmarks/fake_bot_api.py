@@ -0,0 +1,133 @@
+"""Локальный фейковый Bot API для бенчмарков.
+
+Отвечает на запросы aiogram как настоящий сервер Telegram: с заданной задержкой,
+с 429 при превышении лимита и с 403 для чатов, которые "заблокировали" бота.
+Апдейты для polling подкладываются через push_update() и отдаются в getUpdates.
+"""
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Deque, List, Optional, Set, Tuple
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+BOT_TOKEN = "123456:fake-token-for-benchmarks"
+BOT_ID = 123456
+
+
+class FakeBotAPI:
+    def __init__(self, latency: float = 0.03, rate_limit: Optional[int] = None,
+                 blocked: Optional[Set[int]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.blocked = blocked or set()
+        self.host = host
+        self.port = port
+        self.calls: Counter = Counter()
+        self.throttled = 0
+        self._recent: Deque[float] = deque()
+        self._message_id = 0
+        self.sent: List[Tuple[float, int]] = []  # (perf_counter, chat_id) каждого send*
+        self._updates: List[dict] = []
+        self._new_update = asyncio.Event()
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/bot{token}/{method}", self._handle)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def make_bot(self) -> Bot:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(self.base_url))
+        return Bot(token=BOT_TOKEN, session=session)
+
+    def reset(self):
+        self.calls.clear()
+        self.throttled = 0
+        self._recent.clear()
+        self.sent.clear()
+
+    def push_update(self, update: dict):
+        """Положить апдейт в очередь getUpdates"""
+        self._updates.append(update)
+        self._new_update.set()
+
+    async def _get_updates(self, payload: dict) -> web.Response:
+        # Long polling: ждём апдейт до timeout секунд, как настоящий сервер
+        offset = int(payload.get("offset", 0) or 0)
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), float(payload.get("timeout", 0) or 0))
+            except asyncio.TimeoutError:
+                pass
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response({"ok": True, "result": list(self._updates)})
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        payload = dict(await request.post())
+        self.calls[method] += 1
+        if method == "getUpdates":
+            return await self._get_updates(payload)
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.rate_limit and self._over_limit():
+            self.throttled += 1
+            return web.json_response(
+                {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                 "parameters": {"retry_after": 1}},
+                status=429
+            )
+
+        chat_id = int(payload.get("chat_id", 0) or 0)
+        if chat_id in self.blocked:
+            return web.json_response(
+                {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"},
+                status=403
+            )
+
+        return web.json_response({"ok": True, "result": self._result(method, chat_id, payload)})
+
+    def _over_limit(self) -> bool:
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 1:
+            self._recent.popleft()
+        if len(self._recent) >= self.rate_limit:
+            return True
+        self._recent.append(now)
+        return False
+
+    def _result(self, method: str, chat_id: int, payload: dict):
+        if method == "getMe":
+            return {"id": BOT_ID, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+        if method.startswith("send"):
+            self.sent.append((time.perf_counter(), chat_id))
+            self._message_id += 1
+            return {
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": payload.get("text", ""),
+            }
+        return True
@@ -24,3 +24,81 @@ GAME_RULES = """
 """
 
 MAX_ROUNDS = 7
+
+# Ставки: стартовый баланс игрока в игре и обязательная ставка, растущая от раунда к раунду
+STARTING_BALANCE = int(os.getenv('STARTING_BALANCE', 1000))
+ANTE_BASE = int(os.getenv('ANTE_BASE', 10))
+ANTE_STEP = int(os.getenv('ANTE_STEP', 10))
+
+# Рассылка: лимиты Bot API (~30 сообщений/с на бота, ~1 сообщение/с в один чат)
+BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', 25))
+BROADCAST_RATE = float(os.getenv('BROADCAST_RATE', 30))
+BROADCAST_CHAT_INTERVAL = float(os.getenv('BROADCAST_CHAT_INTERVAL', 1.0))
+BROADCAST_MAX_RETRIES = int(os.getenv('BROADCAST_MAX_RETRIES', 3))
+
+# Групповая запись ответов: пачка уходит по размеру или по таймеру (секунды)
+ANSWER_BATCH_SIZE = int(os.getenv('ANSWER_BATCH_SIZE', 200))
+ANSWER_BATCH_DELAY = float(os.getenv('ANSWER_BATCH_DELAY', 0.02))
+
+# FSM-состояния в базе: размер кеша, срок жизни (секунды), период записи пачкой (0 — сразу)
+FSM_CACHE_SIZE = int(os.getenv('FSM_CACHE_SIZE', 10000))
+FSM_TTL = float(os.getenv('FSM_TTL', 7 * 24 * 3600))
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', 0.2))
+
+# Кеш пользователей в памяти: сколько записей держать
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+
+# Режим получения апдейтов: polling или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')  # публичный https-адрес, например https://bot.example.com
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')  # пусто — случайный на каждый запуск
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', os.getenv('PORT', 8080)))
+WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', 32))
+WEBHOOK_MAX_PENDING = int(os.getenv('WEBHOOK_MAX_PENDING', 1000))
+# Метрики Prometheus: GET /metrics на METRICS_HOST:METRICS_PORT (0 — эндпоинт выключен)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+# Антиспам до FSM и базы: корзина токенов на пользователя — пополнение в секунду и запас (rate 0 — без ограничений).
+# Политики: сообщения игроков, кнопки игроков, админ и ведущие комнат; повтор того же текста или кнопки
+# в пределах THROTTLE_DUPLICATE_WINDOW секунд отбрасывается; THROTTLE_SLOTS — ячеек в таблице корзин
+THROTTLE_MESSAGE_RATE = float(os.getenv('THROTTLE_MESSAGE_RATE', 1))
+THROTTLE_MESSAGE_BURST = float(os.getenv('THROTTLE_MESSAGE_BURST', 5))
+THROTTLE_CALLBACK_RATE = float(os.getenv('THROTTLE_CALLBACK_RATE', 3))
+THROTTLE_CALLBACK_BURST = float(os.getenv('THROTTLE_CALLBACK_BURST', 10))
+THROTTLE_HOST_RATE = float(os.getenv('THROTTLE_HOST_RATE', 10))
+THROTTLE_HOST_BURST = float(os.getenv('THROTTLE_HOST_BURST', 30))
+THROTTLE_DUPLICATE_WINDOW = float(os.getenv('THROTTLE_DUPLICATE_WINDOW', 1))
+THROTTLE_SLOTS = int(os.getenv('THROTTLE_SLOTS', 16384))
+# Профайлер /profile: шаг сэмплирования и предельная длительность, секунды
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.005))
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', 120))
+# Запись входящих апдейтов для повтора на стенде: путь к gzip-логу (пусто — не писать) и соль псевдонимов
+RECORD_UPDATES = os.getenv('RECORD_UPDATES', '')
+RECORD_SALT = os.getenv('RECORD_SALT', '')  # пусто — новая соль на каждый запуск
+# Свой сервер Bot API (telegram-bot-api), например http://localhost:8081; пусто — api.telegram.org
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '')
+
+# Удаление ответов игроков: через сколько секунд и сколько ещё ждать соседей для одного deleteMessages
+DELETE_ANSWER_DELAY = float(os.getenv('DELETE_ANSWER_DELAY', 2))
+DELETE_BATCH_WINDOW = float(os.getenv('DELETE_BATCH_WINDOW', 0.5))
+
+# Автоподсказки из банка вопросов: пауза между подсказками раунда, секунды (0 — только вручную)
+HINT_INTERVAL = float(os.getenv('HINT_INTERVAL', 60))
+
+# Архив: завершённые игры старше ARCHIVE_AFTER часов сворачиваются из живых таблиц пачками по ARCHIVE_BATCH
+# раз в ARCHIVE_INTERVAL секунд (0 — не архивировать); архив хранится ARCHIVE_KEEP_DAYS дней (0 — всегда)
+ARCHIVE_AFTER = float(os.getenv('ARCHIVE_AFTER', 24))
+ARCHIVE_BATCH = int(os.getenv('ARCHIVE_BATCH', 20))
+ARCHIVE_INTERVAL = float(os.getenv('ARCHIVE_INTERVAL', 600))
+ARCHIVE_KEEP_DAYS = float(os.getenv('ARCHIVE_KEEP_DAYS', 0))
+
+# Выбор вопросов игры: deck — колода без повторов, adaptive — под кривую сложности по статистике вопросов.
+# Кривая — перцентили сложности банка по раундам (0 — самый лёгкий вопрос, 1 — самый сложный)
+QUESTION_SELECTION = os.getenv('QUESTION_SELECTION', 'deck')
+DIFFICULTY_CURVE = [float(p) for p in os.getenv('DIFFICULTY_CURVE', '0.1,0.2,0.35,0.5,0.6,0.75,0.9').split(',')]
+
+# Снимок банка вопросов на диске, чтобы вопрос раунда читался без базы: путь к файлу.
+# Пусто — рядом с файлом SQLite (<база>.questions) или questions.snapshot в рабочей папке; off — без снимка
+QUESTION_SNAPSHOT = os.getenv('QUESTION_SNAPSHOT', '')
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from config import ANSWER_BATCH_SIZE, ANSWER_BATCH_DELAY
+from database.db import Database, PlayerAnswer, dialect_insert
+
+logger = logging.getLogger(__name__)
+
+_Pending = Tuple[dict, asyncio.Future]
+
+
+class AnswerWriter:
+    """Групповая запись ответов игроков.
+
+    Ответы копятся в очереди и пишутся одним многострочным INSERT на пачку:
+    пачка уходит, когда набралось max_batch ответов или прошло max_delay секунд.
+    submit() возвращается только после коммита пачки, в которую попал ответ.
+    """
+
+    def __init__(self, db: Database, max_batch: int = ANSWER_BATCH_SIZE,
+                 max_delay: float = ANSWER_BATCH_DELAY):
+        self.db = db
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: "asyncio.Queue[Optional[_Pending]]" = asyncio.Queue()
+        self._batch_full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Дописать всё, что осталось в очереди, и остановить фоновую задачу"""
+        if self._task is None:
+            return
+        # None в очереди — сигнал остановки, он встанет после всех ответов
+        self._queue.put_nowait(None)
+        self._batch_full.set()
+        await self._task
+        self._task = None
+
+    async def submit(self, user_id: int, round_id: int, answer: str):
+        """Поставить ответ в очередь и дождаться, пока он будет закоммичен"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(({"user_id": user_id, "round_id": round_id, "answer": answer}, future))
+        if self._queue.qsize() >= self.max_batch:
+            self._batch_full.set()
+        await future
+
+    def _take(self, limit: int) -> List[_Pending]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is None:
+                self._queue.put_nowait(None)
+                break
+            batch.append(item)
+        return batch
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            if self._queue.qsize() + 1 < self.max_batch:
+                # Даём соседям по времени попасть в ту же транзакцию
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+            batch = [first] + self._take(self.max_batch - 1)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[_Pending]):
+        rows = [row for row, _ in batch]
+        try:
+            await self._insert(rows)
+        except Exception:
+            logger.exception("AnswerWriter: пачка из %s ответов не записалась, пишем по одному", len(rows))
+            for row, future in batch:
+                try:
+                    await self._insert([row])
+                except Exception as e:
+                    self._resolve(future, e)
+                else:
+                    self._resolve(future)
+        else:
+            for _, future in batch:
+                self._resolve(future)
+
+    async def _insert(self, rows: List[dict]):
+        # Повторный ответ игрока в тот же раунд не ломает пачку — просто пропускается
+        stmt = dialect_insert(self.db.engine.dialect.name, PlayerAnswer).on_conflict_do_nothing(
+            index_elements=["round_id", "user_id"]
+        )
+        async with self.db.session_factory() as session:
+            await session.execute(stmt, rows)
+            await session.commit()
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, error: Optional[Exception] = None):
+        if future.done():
+            return
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
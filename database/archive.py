@@ -0,0 +1,103 @@
+"""Архив завершённых игр.
+
+Живые таблицы (раунды, ответы, ставки, таблица лидеров) нужны только идущим
+играм. Завершённая игра старше срока хранения сворачивается в одну строку
+archived_games — JSON с раундами, ответами и итогами — и удаляется из живых
+таблиц. Работа идёт пачками по несколько игр: на пачку фиксированное число
+запросов по индексам, без проходов по всей таблице.
+"""
+import json
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.db import (
+    ArchivedGame, Bet, Game, GamePlayer, GameQuestion, Payout, PlayerAnswer, Round, Standing
+)
+
+
+async def archive_games(session: AsyncSession, finished_before: datetime, limit: int) -> int:
+    """Перенести в архив до limit игр, завершённых раньше finished_before. Возвращает число игр"""
+    games = (await session.execute(
+        select(Game.id, Game.host_id, Game.created_at, Game.finished_at)
+        .where(Game.is_active == False, Game.finished_at < finished_before)
+        .order_by(Game.finished_at)
+        .limit(limit)
+    )).all()
+    if not games:
+        return 0
+    game_ids = [game.id for game in games]
+    summaries = await _summaries(session, game_ids)
+
+    await session.execute(insert(ArchivedGame), [
+        {"id": game.id, "host_id": game.host_id, "created_at": game.created_at,
+         "finished_at": game.finished_at, "summary": json.dumps(summaries[game.id], ensure_ascii=False)}
+        for game in games
+    ])
+
+    round_ids = select(Round.id).where(Round.game_id.in_(game_ids)).scalar_subquery()
+    for model in (PlayerAnswer, Bet, Payout):
+        await session.execute(delete(model).where(model.round_id.in_(round_ids)))
+    for model in (Round, Standing, GameQuestion, GamePlayer):
+        await session.execute(delete(model).where(model.game_id.in_(game_ids)))
+    await session.execute(delete(Game).where(Game.id.in_(game_ids)))
+    return len(game_ids)
+
+
+async def prune(session: AsyncSession, finished_before: datetime) -> int:
+    """Удалить из архива игры, завершённые раньше finished_before"""
+    result = await session.execute(delete(ArchivedGame).where(ArchivedGame.finished_at < finished_before))
+    return result.rowcount
+
+
+async def _summaries(session: AsyncSession, game_ids: List[int]) -> Dict[int, dict]:
+    summaries = {game_id: {"players": [], "rounds": [], "standings": []} for game_id in game_ids}
+
+    for game_id, user_id in await session.execute(
+        select(GamePlayer.game_id, GamePlayer.user_id).where(GamePlayer.game_id.in_(game_ids))
+    ):
+        summaries[game_id]["players"].append(user_id)
+
+    questions = dict(((row.game_id, row.round_number), row.question_id) for row in await session.execute(
+        select(GameQuestion.game_id, GameQuestion.round_number, GameQuestion.question_id)
+        .where(GameQuestion.game_id.in_(game_ids))
+    ))
+    rounds = {}
+    for row in await session.execute(
+        select(Round.id, Round.game_id, Round.round_number, Round.question, Round.winner_id,
+               Payout.amount.label("paid"))
+        .outerjoin(Payout, Payout.round_id == Round.id)
+        .where(Round.game_id.in_(game_ids))
+        .order_by(Round.game_id, Round.round_number)
+    ):
+        rounds[row.id] = {
+            "number": row.round_number, "question": row.question,
+            "question_id": questions.get((row.game_id, row.round_number)),
+            "winner_id": row.winner_id, "paid": row.paid or 0, "answers": [], "folded": [],
+        }
+        summaries[row.game_id]["rounds"].append(rounds[row.id])
+
+    round_ids = select(Round.id).where(Round.game_id.in_(game_ids)).scalar_subquery()
+    for round_id, user_id, answer in await session.execute(
+        select(PlayerAnswer.round_id, PlayerAnswer.user_id, PlayerAnswer.answer)
+        .where(PlayerAnswer.round_id.in_(round_ids))
+        .order_by(PlayerAnswer.id)
+    ):
+        rounds[round_id]["answers"].append([user_id, answer])
+    for round_id, user_id in await session.execute(
+        select(Bet.round_id, Bet.user_id).where(Bet.round_id.in_(round_ids), Bet.kind == "fold")
+    ):
+        rounds[round_id]["folded"].append(user_id)
+
+    for row in await session.execute(
+        select(Standing.game_id, Standing.user_id, Standing.balance, Standing.staked, Standing.won,
+               Standing.rounds_won)
+        .where(Standing.game_id.in_(game_ids))
+        .order_by(Standing.game_id, Standing.balance.desc(), Standing.user_id)
+    ):
+        summaries[row.game_id]["standings"].append(
+            [row.user_id, row.balance, row.staked, row.won, row.rounds_won]
+        )
+    return summaries
@@ -1,11 +1,18 @@
 import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Optional
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy import (
-    Column, Integer, String, Boolean, Text, DateTime,
-    ForeignKey, select, update, func, text
+    Column, Integer, BigInteger, String, Boolean, Text, DateTime, Float,
+    ForeignKey, Index, select, update, func, event, bindparam, case
 )
-from config import DATABASE_URL
+from config import DATABASE_URL, ADMIN_ID, STARTING_BALANCE, QUESTION_SNAPSHOT
+from database import stats, migrations, models
+from database.user_cache import UserCache
+from database.difficulty_index import DifficultyIndex
+from database.question_snapshot import QuestionSnapshot
 
 Base = declarative_base()
 
@@ -13,7 +20,8 @@ Base = declarative_base()
 # ==================== МОДЕЛИ ====================
 class User(Base):
     __tablename__ = 'users'
-    id = Column(Integer, primary_key=True)
+    __table_args__ = (Index('ix_users_is_ready', 'is_ready'),)
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
     username = Column(String, nullable=True)
     first_name = Column(String)
     is_ready = Column(Boolean, default=False)
@@ -22,13 +30,31 @@ class User(Base):
 
 class Game(Base):
     __tablename__ = 'games'
+    __table_args__ = (
+        Index('ix_games_is_active', 'is_active'),
+        Index('ix_games_host_active', 'host_id', 'is_active'),
+        Index('ix_games_finished_at', 'finished_at'),
+    )
     id = Column(Integer, primary_key=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=func.now())
+    host_id = Column(BigInteger, nullable=True)  # ведущий комнаты; NULL — игра админа из старых версий
+    finished_at = Column(DateTime, nullable=True)  # UTC; по нему игра уходит в архив
+
+
+class GamePlayer(Base):
+    """Участник комнаты (игры)"""
+    __tablename__ = 'game_players'
+    game_id = Column(Integer, ForeignKey('games.id'), primary_key=True)
+    user_id = Column(BigInteger, ForeignKey('users.id'), primary_key=True)
 
 
 class Round(Base):
     __tablename__ = 'rounds'
+    __table_args__ = (
+        Index('ix_rounds_game_active', 'game_id', 'is_active'),
+        Index('ix_rounds_next_hint_at', 'next_hint_at'),
+    )
     id = Column(Integer, primary_key=True)
     game_id = Column(Integer, ForeignKey('games.id'))
     round_number = Column(Integer)
@@ -37,29 +63,181 @@ class Round(Base):
     hint1 = Column(Text, default="")
     hint2 = Column(Text, default="")
     hint3 = Column(Text, default="")
-    winner_id = Column(Integer, nullable=True)
+    winner_id = Column(BigInteger, nullable=True)
+    bank = Column(Integer, nullable=False, default=0)  # фишки в банке раунда
+    next_hint_at = Column(DateTime, nullable=True)  # UTC; NULL — автоподсказок нет (пауза или кончились)
+
 
 
 class PlayerAnswer(Base):
     __tablename__ = 'player_answers'
+    __table_args__ = (Index('uq_player_answers_round_user', 'round_id', 'user_id', unique=True),)
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
+    user_id = Column(BigInteger, ForeignKey('users.id'))
     round_id = Column(Integer, ForeignKey('rounds.id'))
     answer = Column(Text)
     submitted_at = Column(DateTime, default=func.now())
 
 
+class Bet(Base):
+    """Ставка игрока в раунде: обязательная (ante), повышение (raise) или пас (fold, amount = 0)"""
+    __tablename__ = 'bets'
+    __table_args__ = (Index('ix_bets_round_user', 'round_id', 'user_id'),)
+    id = Column(Integer, primary_key=True)
+    round_id = Column(Integer, ForeignKey('rounds.id'), nullable=False)
+    user_id = Column(BigInteger, ForeignKey('users.id'), nullable=False)
+    kind = Column(String(8), nullable=False)
+    amount = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=func.now())
+
+
+class Payout(Base):
+    """Выплата банка раунда победителю"""
+    __tablename__ = 'payouts'
+    id = Column(Integer, primary_key=True)
+    round_id = Column(Integer, ForeignKey('rounds.id'), nullable=False, unique=True)
+    user_id = Column(BigInteger, ForeignKey('users.id'), nullable=False)
+    amount = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+
+class Standing(Base):
+    """Итоги игрока в игре. Меняются в той же транзакции, что и каждая ставка и выплата,
+    так что таблица лидеров читается без пересчёта истории"""
+    __tablename__ = 'standings'
+    __table_args__ = (Index('ix_standings_game_balance', 'game_id', 'balance'),)
+    game_id = Column(Integer, ForeignKey('games.id'), primary_key=True)
+    user_id = Column(BigInteger, ForeignKey('users.id'), primary_key=True)
+    balance = Column(Integer, nullable=False)
+    staked = Column(Integer, nullable=False, default=0)
+    won = Column(Integer, nullable=False, default=0)
+    rounds_won = Column(Integer, nullable=False, default=0)
+
+
 class Question(Base):
     __tablename__ = 'questions'
+    __table_args__ = (Index('uq_questions_content_hash', 'content_hash', unique=True),)
     id = Column(Integer, primary_key=True)
     question = Column(Text, nullable=False)
     answer = Column(Text, nullable=False)
     hint1 = Column(Text)
     hint2 = Column(Text)
     hint3 = Column(Text)
+    content_hash = Column(String(40), nullable=True)
+
+
+class QuestionStat(Base):
+    """Статистика вопроса по сыгранным раундам; пополняется при закрытии раунда (см. database/question_stats.py)"""
+    __tablename__ = 'question_stats'
+    __table_args__ = (Index('ix_question_stats_difficulty', 'difficulty'),)
+    question_id = Column(Integer, ForeignKey('questions.id'), primary_key=True, autoincrement=False)
+    played = Column(Integer, nullable=False, default=0)               # сыграно раундов
+    answers = Column(Integer, nullable=False, default=0)              # числовых ответов в них
+    error_sum = Column(Float, nullable=False, default=0)              # сумма |ответ − правильный|
+    relative_error_sum = Column(Float, nullable=False, default=0)     # то же относительно правильного, до 1 на ответ
+    wins = Column(Integer, nullable=False, default=0)                 # раундов с победителем
+    margin_sum = Column(Float, nullable=False, default=0)             # насколько промахнулся победитель, относительно
+    difficulty = Column(Float, nullable=True)                         # средняя относительная ошибка, 0..1
+
+
+class QuestionDeck(Base):
+    """Перетасованная колода вопросов: position — сколько карт уже вытянуто"""
+    __tablename__ = 'question_decks'
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+    size = Column(Integer, nullable=False, default=0)
+    max_question_id = Column(Integer, nullable=False, default=0)
+    shuffled_at = Column(DateTime, default=func.now())
+
+
+class QuestionDeckEntry(Base):
+    __tablename__ = 'question_deck_entries'
+    deck_id = Column(Integer, ForeignKey('question_decks.id'), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    question_id = Column(Integer, ForeignKey('questions.id'), nullable=False)
+
+
+class GameQuestion(Base):
+    """Вопросы, вытянутые из колоды для конкретной игры, по номерам раундов"""
+    __tablename__ = 'game_questions'
+    game_id = Column(Integer, ForeignKey('games.id'), primary_key=True)
+    round_number = Column(Integer, primary_key=True)
+    question_id = Column(Integer, ForeignKey('questions.id'), nullable=False)
+
+
+class ArchivedGame(Base):
+    """Завершённая игра, свёрнутая в одну строку: раунды, ответы и итоги — в JSON (см. database/archive.py)"""
+    __tablename__ = 'archived_games'
+    __table_args__ = (Index('ix_archived_games_finished_at', 'finished_at'),)
+    id = Column(Integer, primary_key=True, autoincrement=False)  # id игры из games
+    host_id = Column(BigInteger, nullable=True)
+    created_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    archived_at = Column(DateTime, default=func.now())
+    summary = Column(Text, nullable=False)
+
+
+class FsmState(Base):
+    """Состояние FSM и данные пользователя; key — bot:chat:user:thread:destiny"""
+    __tablename__ = 'fsm_states'
+    __table_args__ = (Index('ix_fsm_states_updated_at', 'updated_at'),)
+    key = Column(String, primary_key=True)
+    state = Column(String, nullable=True)
+    data = Column(Text, nullable=False, default="{}")
+    updated_at = Column(DateTime, nullable=False, default=func.now())
+
+
+class ScheduledDeletion(Base):
+    """Сообщение, которое бот обещал удалить (например, запечатанный ответ игрока)"""
+    __tablename__ = 'scheduled_deletions'
+    __table_args__ = (Index('ix_scheduled_deletions_delete_at', 'delete_at'),)
+    chat_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    message_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    delete_at = Column(DateTime, nullable=False)
 
 
 # ==================== БАЗА ====================
+def dialect_insert(dialect_name: str, model):
+    """INSERT с поддержкой ON CONFLICT для текущего диалекта"""
+    # Модуль диалекта — по требованию: боту на SQLite незачем импортировать PostgreSQL и наоборот
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+def _sqlite_on_connect(dbapi_connection, connection_record):
+    # WAL: читатели не ждут писателя, коммит — одна запись в журнал
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # Писателей много (ответы, FSM, удаления, десятки комнат) — ждём блокировку, а не падаем через 5 с
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.close()
+
+
+def _run_after_commit(session):
+    callbacks = session.info["after_commit"]
+    for callback in callbacks:
+        callback()
+    callbacks.clear()
+
+
+def _drop_after_commit(session):
+    session.info["after_commit"].clear()
+
+
+def _snapshot_path(engine) -> Optional[str]:
+    if QUESTION_SNAPSHOT == "off":
+        return None
+    if QUESTION_SNAPSHOT:
+        return QUESTION_SNAPSHOT
+    if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        return f"{engine.url.database}.questions"
+    return "questions.snapshot"
+
+
 class Database:
     def __init__(self):
         db_url = DATABASE_URL
@@ -67,106 +245,476 @@ class Database:
             db_url = db_url.replace("postgres://", "postgresql+asyncpg://", 1)
         if db_url.startswith("postgresql://"):
             db_url = db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        if db_url.startswith("sqlite://"):
+            db_url = db_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
 
         self.engine = create_async_engine(db_url, echo=False, future=True)
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine.sync_engine, "connect", _sqlite_on_connect)
+        stats.install(self.engine)
         self.session_factory = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.users = UserCache()
+        self.difficulty = DifficultyIndex()
+        path = _snapshot_path(self.engine)
+        self.questions = QuestionSnapshot(path) if path else None
 
     async def __aenter__(self):
-        async with self.engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+        await migrations.migrate(self.engine, Base.metadata)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.engine.dispose()
 
-    # === ВСЕ НЕОБХОДИМЫЕ МЕТОДЫ ===
-    async def get_or_create_user(self, user_id: int, username: str | None, first_name: str):
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["Repository"]:
+        """Репозиторий в отдельной транзакции — для кода вне обработчиков апдейтов"""
         async with self.session_factory() as session:
-            result = await session.execute(select(User).where(User.id == user_id))
-            user = result.scalar_one_or_none()
-            if not user:
-                user = User(id=user_id, username=username, first_name=first_name,
-                            is_admin=(user_id == 5456905649))
-                session.add(user)
-                await session.commit()
-            return user
+            async with session.begin():
+                yield Repository(session, self.users, self.difficulty, self.questions)
+
+
+class Repository:
+    """Все запросы к базе в рамках одной сессии.
+
+    Сессию открывает и коммитит вызывающий код (мидлварь на апдейт или
+    Database.transaction()), поэтому методы сами ничего не коммитят.
+    """
+
+    def __init__(self, session: AsyncSession, users: UserCache | None = None,
+                 difficulty: DifficultyIndex | None = None, questions: QuestionSnapshot | None = None):
+        self.session = session
+        self.users = users
+        self.difficulty = difficulty
+        self.questions = questions
+
+    def after_commit(self, callback):
+        """Обновить кеши и комнаты в памяти, когда транзакция зафиксирована; при откате — забыть"""
+        pending = self.session.info.get("after_commit")
+        if pending is None:
+            pending = self.session.info["after_commit"] = []
+            event.listen(self.session.sync_session, "after_commit", _run_after_commit)
+            event.listen(self.session.sync_session, "after_rollback", _drop_after_commit)
+        pending.append(callback)
+
+    async def commit(self):
+        """Зафиксировать изменения раньше конца апдейта (например, перед долгой рассылкой)"""
+        await self.session.commit()
+
+    # === ВСЕ НЕОБХОДИМЫЕ МЕТОДЫ ===
+    async def get_or_create_user(self, user_id: int, username: str | None, first_name: str) -> models.User:
+        """Пользователь по id: новый заводится, у известного обновляются имя и username.
+
+        Один upsert вместо SELECT + INSERT, так что одновременные /start одного
+        пользователя не ловят конфликт ключа. Знакомый пользователь с тем же
+        именем отдаётся из кеша без запроса.
+        """
+        cached = self.users.get(user_id) if self.users is not None else None
+        if cached is not None and (cached.username, cached.first_name) == (username, first_name):
+            return cached
+
+        stmt = dialect_insert(self.session.bind.dialect.name, User).values(
+            id=user_id, username=username, first_name=first_name,
+            is_ready=False, is_admin=(user_id == ADMIN_ID)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={"username": stmt.excluded.username, "first_name": stmt.excluded.first_name,
+                  "is_admin": stmt.excluded.is_admin},
+        ).returning(User.id, User.username, User.first_name, User.is_ready, User.is_admin)
+        user = models.User(**(await self.session.execute(stmt)).one()._mapping)
+        if self.users is not None:
+            self.after_commit(lambda: self.users.put(user))
+        return user
 
     async def set_user_ready(self, user_id: int, ready: bool = True):
-        async with self.session_factory() as session:
-            await session.execute(update(User).where(User.id == user_id).values(is_ready=ready))
-            await session.commit()
+        result = await self.session.execute(
+            update(User).where(User.id == user_id).values(is_ready=ready).returning(User.id)
+        )
+        user_ids = result.scalars().all()
+        if self.users is not None:
+            self.after_commit(lambda: self.users.set_ready(user_ids, ready))
 
-    async def create_game(self):
-        async with self.session_factory() as session:
-            game = Game()
-            session.add(game)
-            await session.commit()
-            await session.refresh(game)
-            return game
+    async def create_game(self, host_id: int | None = None):
+        game = Game(host_id=host_id)
+        self.session.add(game)
+        await self.session.flush()
+        return game
 
-    async def get_active_game(self):
-        async with self.session_factory() as session:
-            result = await session.execute(select(Game).where(Game.is_active == True))
-            return result.scalar_one_or_none()
+    async def get_active_games(self):
+        result = await self.session.execute(select(Game).where(Game.is_active == True))
+        return result.scalars().all()
+
+    async def add_game_players(self, game_id: int, user_ids):
+        rows = [{"game_id": game_id, "user_id": user_id} for user_id in user_ids]
+        if rows:
+            stmt = dialect_insert(self.session.bind.dialect.name, GamePlayer).on_conflict_do_nothing(
+                index_elements=["game_id", "user_id"]
+            )
+            await self.session.execute(stmt, rows)
+            await self._ensure_standings(game_id, user_ids)
+
+    async def _ensure_standings(self, game_id: int, user_ids):
+        """Стартовый баланс игрокам, у которых его в этой игре ещё нет"""
+        rows = [{"game_id": game_id, "user_id": user_id, "balance": STARTING_BALANCE} for user_id in user_ids]
+        if rows:
+            stmt = dialect_insert(self.session.bind.dialect.name, Standing).on_conflict_do_nothing(
+                index_elements=["game_id", "user_id"]
+            )
+            await self.session.execute(stmt, rows)
+
+    async def get_game_player_ids(self, game_id: int):
+        result = await self.session.execute(select(GamePlayer.user_id).where(GamePlayer.game_id == game_id))
+        return result.scalars().all()
+
+    async def get_players_by_game(self, game_ids) -> dict[int, list[int]]:
+        """Игроки нескольких игр одним запросом: game_id → user_id"""
+        players = {game_id: [] for game_id in game_ids}
+        if players:
+            result = await self.session.execute(
+                select(GamePlayer.game_id, GamePlayer.user_id).where(GamePlayer.game_id.in_(players))
+            )
+            for game_id, user_id in result:
+                players[game_id].append(user_id)
+        return players
+
+    async def get_round_player_ids(self, round_id: int):
+        result = await self.session.execute(
+            select(GamePlayer.user_id)
+            .join(Round, Round.game_id == GamePlayer.game_id)
+            .where(Round.id == round_id)
+        )
+        return result.scalars().all()
 
     async def create_round(self, game_id: int, round_number: int, question: str):
-        async with self.session_factory() as session:
-            rnd = Round(game_id=game_id, round_number=round_number, question=question)
-            session.add(rnd)
-            await session.commit()
-            await session.refresh(rnd)
-            return rnd
+        rnd = Round(game_id=game_id, round_number=round_number, question=question)
+        self.session.add(rnd)
+        await self.session.flush()
+        return rnd
+
+    async def finish_game(self, game_id: int):
+        await self.session.execute(
+            update(Game).where(Game.id == game_id).values(is_active=False, finished_at=datetime.utcnow())
+        )
+        await self.session.execute(update(Round).where(Round.game_id == game_id).values(is_active=False))
+        # Готовность подтверждается заново перед каждой игрой — только у игроков этой комнаты
+        result = await self.session.execute(
+            update(User)
+            .where(User.id.in_(select(GamePlayer.user_id).where(GamePlayer.game_id == game_id)))
+            .values(is_ready=False)
+            .returning(User.id)
+        )
+        user_ids = result.scalars().all()
+        if self.users is not None:
+            self.after_commit(lambda: self.users.set_ready(user_ids, False))
+
+    async def count_rounds(self, game_id: int) -> int:
+        result = await self.session.execute(select(func.count(Round.id)).where(Round.game_id == game_id))
+        return result.scalar_one()
+
+    async def get_round(self, round_id: int):
+        return await self.session.get(Round, round_id)
+
+    async def get_round_progress(self, game_ids) -> dict[int, tuple[int, Optional[int]]]:
+        """Сколько раундов начато и id открытого раунда — для нескольких игр одним запросом"""
+        progress = {game_id: (0, None) for game_id in game_ids}
+        if progress:
+            result = await self.session.execute(
+                select(Round.game_id, func.count(Round.id), func.max(case((Round.is_active == True, Round.id))))
+                .where(Round.game_id.in_(progress))
+                .group_by(Round.game_id)
+            )
+            progress.update((game_id, (count, active)) for game_id, count, active in result)
+        return progress
 
     async def get_current_round(self, game_id: int):
-        async with self.session_factory() as session:
-            result = await session.execute(select(Round).where(Round.game_id == game_id, Round.is_active == True))
-            return result.scalar_one_or_none()
+        result = await self.session.execute(select(Round).where(Round.game_id == game_id, Round.is_active == True))
+        return result.scalar_one_or_none()
 
     async def set_hint(self, round_id: int, hint_num: int, text: str):
-        async with self.session_factory() as session:
-            await session.execute(update(Round).where(Round.id == round_id).values(**{f"hint{hint_num}": text}))
-            await session.commit()
+        await self.session.execute(update(Round).where(Round.id == round_id).values(**{f"hint{hint_num}": text}))
+
+    async def schedule_hint(self, round_id: int, at: Optional[datetime]):
+        await self.session.execute(update(Round).where(Round.id == round_id).values(next_hint_at=at))
+
+    async def get_scheduled_hints(self):
+        """Открытые раунды с запланированной подсказкой: (id, next_hint_at)"""
+        result = await self.session.execute(
+            select(Round.id, Round.next_hint_at).where(Round.is_active == True, Round.next_hint_at.is_not(None))
+        )
+        return result.all()
 
     async def submit_answer(self, user_id: int, round_id: int, answer: str):
-        async with self.session_factory() as session:
-            ans = PlayerAnswer(user_id=user_id, round_id=round_id, answer=answer)
-            session.add(ans)
-            await session.commit()
+        # Повторный ответ в тот же раунд игнорируется: менять ответ нельзя
+        stmt = dialect_insert(self.session.bind.dialect.name, PlayerAnswer).values(
+            user_id=user_id, round_id=round_id, answer=answer
+        ).on_conflict_do_nothing(index_elements=["round_id", "user_id"])
+        await self.session.execute(stmt)
 
     async def get_round_answers(self, round_id: int):
-        async with self.session_factory() as session:
-            result = await session.execute(
-                select(PlayerAnswer.answer, User.first_name)
-                .join(User)
-                .where(PlayerAnswer.round_id == round_id)
+        result = await self.session.execute(
+            select(PlayerAnswer.id, PlayerAnswer.user_id, PlayerAnswer.answer, User.first_name)
+            .join(User)
+            .where(PlayerAnswer.round_id == round_id)
+            .order_by(PlayerAnswer.id)
+        )
+        return result.all()
+
+    async def get_round_answer_user_ids(self, round_id: int):
+        result = await self.session.execute(
+            select(PlayerAnswer.user_id).where(PlayerAnswer.round_id == round_id).distinct()
+        )
+        return result.scalars().all()
+
+    async def get_answer(self, answer_id: int):
+        result = await self.session.execute(
+            select(PlayerAnswer.round_id, PlayerAnswer.user_id, User.username, User.first_name)
+            .join(User)
+            .where(PlayerAnswer.id == answer_id)
+        )
+        return result.one_or_none()
+
+    # === СТАВКИ И БАНК ===
+    async def collect_antes(self, round_id: int, game_id: int, user_ids, ante: int) -> int:
+        """Обязательная ставка со всех игроков раунда; у кого меньше — ставит остаток. Возвращает банк"""
+        user_ids = list(user_ids)
+        await self._ensure_standings(game_id, user_ids)
+        result = await self.session.execute(
+            select(Standing.user_id, Standing.balance)
+            .where(Standing.game_id == game_id, Standing.user_id.in_(user_ids))
+        )
+        bets = [
+            {"round_id": round_id, "user_id": user_id, "kind": "ante", "amount": min(ante, balance)}
+            for user_id, balance in result if balance > 0
+        ]
+        if bets:
+            await self.session.execute(Bet.__table__.insert(), bets)
+            standings = Standing.__table__
+            await self.session.execute(
+                standings.update()
+                .where(standings.c.game_id == game_id, standings.c.user_id == bindparam("u"))
+                .values(balance=standings.c.balance - bindparam("a"), staked=standings.c.staked + bindparam("a")),
+                [{"u": bet["user_id"], "a": bet["amount"]} for bet in bets]
             )
-            return result.all()
+        result = await self.session.execute(
+            update(Round).where(Round.id == round_id)
+            .values(bank=Round.bank + sum(bet["amount"] for bet in bets))
+            .returning(Round.bank)
+        )
+        return result.scalar_one()
 
-    async def set_round_winner(self, round_id: int, winner_id: int | None):
-        async with self.session_factory() as session:
-            await session.execute(update(Round).where(Round.id == round_id).values(is_active=False, winner_id=winner_id))
-            await session.commit()
+    async def carry_bank(self, game_id: int, round_id: int, round_number: int) -> int:
+        """Банк прошлого раунда без победителя переходит в новый раунд"""
+        result = await self.session.execute(
+            select(Round.id, Round.bank).where(
+                Round.game_id == game_id, Round.round_number == round_number - 1,
+                Round.winner_id.is_(None), Round.bank > 0
+            )
+        )
+        previous = result.one_or_none()
+        if previous is None:
+            return 0
+        await self.session.execute(update(Round).where(Round.id == previous.id).values(bank=0))
+        await self.session.execute(update(Round).where(Round.id == round_id).values(bank=Round.bank + previous.bank))
+        return previous.bank
 
-    async def get_ready_players(self):
-        async with self.session_factory() as session:
-            result = await session.execute(select(User).where(User.is_ready == True))
-            return result.scalars().all()
+    async def place_bet(self, round_id: int, game_id: int, user_id: int, amount: int) -> int | None:
+        """Повысить ставку. Возвращает новый баланс; None — раунд закрыт, игрок спасовал или фишек не хватает"""
+        if await self.has_folded(round_id, user_id):
+            return None
+        # Оба UPDATE с условием: раунд открыт и фишек хватает — проверка и списание атомарны
+        result = await self.session.execute(
+            update(Round).where(Round.id == round_id, Round.is_active == True)
+            .values(bank=Round.bank + amount).returning(Round.id)
+        )
+        if result.first() is None:
+            return None
+        result = await self.session.execute(
+            update(Standing)
+            .where(Standing.game_id == game_id, Standing.user_id == user_id, Standing.balance >= amount)
+            .values(balance=Standing.balance - amount, staked=Standing.staked + amount)
+            .returning(Standing.balance)
+        )
+        balance = result.scalar_one_or_none()
+        if balance is None:
+            await self.session.execute(update(Round).where(Round.id == round_id).values(bank=Round.bank - amount))
+            return None
+        self.session.add(Bet(round_id=round_id, user_id=user_id, kind="raise", amount=amount))
+        return balance
 
-    async def reset_game_state(self):
-        async with self.session_factory() as session:
-            await session.execute(update(Round).where(Round.is_active == True).values(is_active=False))
-            await session.execute(update(Game).where(Game.is_active == True).values(is_active=False))
-            await session.execute(update(User).values(is_ready=False))
-            await session.execute(text("DELETE FROM player_answers"))
-            await session.commit()
+    async def fold(self, round_id: int, user_id: int):
+        """Пас: поставленное остаётся в банке, выиграть раунд игрок уже не может"""
+        if not await self.has_folded(round_id, user_id):
+            self.session.add(Bet(round_id=round_id, user_id=user_id, kind="fold", amount=0))
 
-    async def load_questions(self, questions_list):
-        async with self.session_factory() as session:
-            for q in questions_list:
-                session.add(Question(**q))
-            await session.commit()
+    async def has_folded(self, round_id: int, user_id: int) -> bool:
+        result = await self.session.execute(
+            select(Bet.id).where(Bet.round_id == round_id, Bet.user_id == user_id, Bet.kind == "fold").limit(1)
+        )
+        return result.first() is not None
 
-    async def get_random_questions(self, count=7):
-        async with self.session_factory() as session:
-            result = await session.execute(select(Question).order_by(func.random()).limit(count))
-            return result.scalars().all()
+    async def get_folded_user_ids(self, round_id: int):
+        result = await self.session.execute(
+            select(Bet.user_id).where(Bet.round_id == round_id, Bet.kind == "fold")
+        )
+        return result.scalars().all()
+
+    async def settle_round(self, round_id: int, winner_id: int | None) -> int | None:
+        """Закрыть раунд и выплатить банк победителю. Без победителя банк ждёт следующего раунда.
+
+        Возвращает выплату; None — раунд уже был закрыт (повторное нажатие не платит дважды).
+        """
+        result = await self.session.execute(
+            update(Round).where(Round.id == round_id, Round.is_active == True)
+            .values(is_active=False, winner_id=winner_id, next_hint_at=None)
+            .returning(Round.game_id, Round.bank)
+        )
+        closed = result.one_or_none()
+        if closed is None:
+            return None
+        if winner_id is None or closed.bank <= 0:
+            return 0
+        self.session.add(Payout(round_id=round_id, user_id=winner_id, amount=closed.bank))
+        await self.session.execute(
+            update(Standing)
+            .where(Standing.game_id == closed.game_id, Standing.user_id == winner_id)
+            .values(balance=Standing.balance + closed.bank, won=Standing.won + closed.bank,
+                    rounds_won=Standing.rounds_won + 1)
+        )
+        await self.session.execute(update(Round).where(Round.id == round_id).values(bank=0))
+        return closed.bank
+
+    async def get_standings(self, game_id: int, limit: int | None = None):
+        """Таблица лидеров игры: читается готовой, без агрегации по ставкам"""
+        result = await self.session.execute(
+            select(Standing.user_id, User.first_name, Standing.balance, Standing.rounds_won)
+            .join(User, User.id == Standing.user_id)
+            .where(Standing.game_id == game_id)
+            .order_by(Standing.balance.desc(), Standing.user_id)
+            .limit(limit)
+        )
+        return result.all()
+
+    async def get_ready_players(self) -> list[models.User]:
+        """Готовые игроки; пока идут игры, список собирается из кеша без запросов"""
+        ready_ids = await self.get_ready_player_ids()
+        players, missing = [], []
+        for user_id in ready_ids:
+            user = self.users.get(user_id) if self.users is not None else None
+            if user is None:
+                missing.append(user_id)
+            else:
+                players.append(user)
+        if missing:
+            result = await self.session.execute(
+                select(User.id, User.username, User.first_name, User.is_admin).where(User.id.in_(missing))
+            )
+            for row in result:
+                user = models.User(**row._mapping, is_ready=True)
+                players.append(user)
+                if self.users is not None:
+                    self.users.put(user)
+        return players
+
+    async def get_ready_player_ids(self) -> list[int]:
+        query = select(User.id).where(User.is_ready == True)
+        if self.users is None:
+            return list((await self.session.execute(query)).scalars())
+        if self.users.ready_loaded:
+            return self.users.ready_ids()
+        version = self.users.version
+        # В кеш — из своей короткой сессии: снимок транзакции апдейта мог быть сделан
+        # до чужого коммита готовности, и устаревшее множество прошло бы проверку версии
+        async with AsyncSession(self.session.bind) as session:
+            user_ids = (await session.execute(query)).scalars().all()
+        self.users.load_ready(user_ids, version)
+        return list(user_ids)
+
+    async def import_questions(self, stream):
+        """Потоковый импорт вопросов из JSON (см. database/question_import.py)"""
+        from database import question_import
+        report = await question_import.import_questions(self.session, stream)
+        if self.questions is not None:
+            self.after_commit(self.questions.refresh_later)
+        return report
+
+    async def archive_finished_games(self, finished_before: datetime, limit: int) -> int:
+        """Свернуть в архив завершённые игры (см. database/archive.py)"""
+        from database import archive
+        return await archive.archive_games(self.session, finished_before, limit)
+
+    async def prune_archive(self, finished_before: datetime) -> int:
+        from database import archive
+        return await archive.prune(self.session, finished_before)
+
+    async def draw_questions(self, count: int = 7, deck_name: str = "default"):
+        from database import question_deck
+        return await question_deck.draw(self.session, count, deck_name)
+
+    async def pick_questions(self, curve, deck_name: str = "default"):
+        """Вопросы игры под кривую сложности (перцентили от 0 до 1, по точке на раунд).
+
+        Берутся вопросы со статистикой; раунды, для которых такого не нашлось, добираются из колоды
+        """
+        from database import question_stats
+        if self.difficulty is None:
+            return await self.draw_questions(len(curve), deck_name)
+        if not self.difficulty.loaded:
+            self.difficulty.load(await question_stats.load_difficulty(self.session))
+
+        picked = self.difficulty.pick(curve)
+        missing = picked.count(None)
+        if missing:
+            extra = iter(q.id for q in await self.draw_questions(len(picked), deck_name)
+                         if q.id not in picked)
+            picked = [qid if qid is not None else next(extra, None) for qid in picked]
+        picked = [qid for qid in picked if qid is not None]
+        questions = {q.id: q for q in (await self.session.execute(
+            select(Question).where(Question.id.in_(picked))
+        )).scalars()}
+        return [questions[qid] for qid in picked if qid in questions]
+
+    async def record_question_stats(self, question_id: int, truth: float, values, winner_value=None):
+        """Учесть сыгранный раунд в статистике вопроса (см. database/question_stats.py)"""
+        from database import question_stats
+        difficulty, played = await question_stats.record(self.session, question_id, truth, values, winner_value)
+        if self.difficulty is not None:
+            self.after_commit(lambda: self.difficulty.update(question_id, difficulty, played))
+
+    async def get_question_extremes(self, limit: int = 5):
+        from database import question_stats
+        return await question_stats.extremes(self.session, limit)
+
+    async def assign_game_questions(self, game_id: int, questions):
+        self.session.add_all(
+            GameQuestion(game_id=game_id, round_number=number, question_id=q.id)
+            for number, q in enumerate(questions, start=1)
+        )
+
+    async def get_question_ids_by_game(self, game_ids) -> dict[int, list[int]]:
+        """Вопросы нескольких игр по порядку раундов: game_id → [question_id, ...]"""
+        questions = {game_id: [] for game_id in game_ids}
+        if questions:
+            result = await self.session.execute(
+                select(GameQuestion.game_id, GameQuestion.question_id)
+                .where(GameQuestion.game_id.in_(questions))
+                .order_by(GameQuestion.game_id, GameQuestion.round_number)
+            )
+            for game_id, question_id in result:
+                questions[game_id].append(question_id)
+        return questions
+
+    async def get_question(self, question_id: int):
+        """Вопрос по id: из снимка на диске, а если его там нет — из базы"""
+        question = self.questions.get(question_id) if self.questions is not None else None
+        return question or await self.session.get(Question, question_id)
+
+    async def get_game_question(self, game_id: int, round_number: int, question_id: Optional[int] = None):
+        """Вопрос раунда игры; question_id уже известен (из комнаты) — без поиска по game_questions"""
+        if question_id is not None:
+            return await self.get_question(question_id)
+        result = await self.session.execute(
+            select(Question)
+            .join(GameQuestion, GameQuestion.question_id == Question.id)
+            .where(GameQuestion.game_id == game_id, GameQuestion.round_number == round_number)
+        )
+        return result.scalar_one_or_none()
@@ -0,0 +1,85 @@
+"""Сложность вопросов в памяти процесса — для подбора вопросов под кривую сложности.
+
+Вопросы, у которых уже есть статистика (question_stats), лежат в списке,
+отсортированном по сложности. Цель раунда задаётся перцентилем: 0 — самый
+лёгкий вопрос банка, 1 — самый сложный, так что кривая не зависит от того,
+насколько в среднем ошибаются игроки. Подбор — бинарный поиск и просмотр
+нескольких соседей на раунд, без запросов к базе. Как и кеш пользователей,
+индекс меняет только Repository после коммита.
+"""
+import bisect
+import random
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Сколько соседей по сложности рассматривать: из них берётся реже всех сыгранный
+CANDIDATES = 16
+
+
+class DifficultyIndex:
+    def __init__(self, candidates: int = CANDIDATES):
+        self.candidates = candidates
+        self.loaded = False
+        self._sorted: List[Tuple[float, int]] = []  # (сложность, question_id)
+        self._difficulty: Dict[int, float] = {}
+        self._played: Dict[int, int] = {}
+        self._random = random.Random()
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def get(self, question_id: int) -> Optional[float]:
+        return self._difficulty.get(question_id)
+
+    def load(self, rows: Iterable[Tuple[int, float, int]]):
+        """Заполнить из базы: (question_id, сложность, сколько раз сыгран)"""
+        rows = [row for row in rows if row[1] is not None]
+        self._difficulty = {qid: difficulty for qid, difficulty, _ in rows}
+        self._played = {qid: played for qid, _, played in rows}
+        self._sorted = sorted((difficulty, qid) for qid, difficulty in self._difficulty.items())
+        self.loaded = True
+
+    def update(self, question_id: int, difficulty: Optional[float], played: int):
+        if not self.loaded:
+            return
+        old = self._difficulty.pop(question_id, None)
+        if old is not None:
+            del self._sorted[bisect.bisect_left(self._sorted, (old, question_id))]
+        if difficulty is not None:
+            self._difficulty[question_id] = difficulty
+            bisect.insort(self._sorted, (difficulty, question_id))
+        self._played[question_id] = played
+
+    def pick(self, curve: Sequence[float], exclude: Set[int] = frozenset()) -> List[Optional[int]]:
+        """По вопросу на каждую точку кривой; None — подходящего вопроса со статистикой нет"""
+        taken = set(exclude)
+        picked: List[Optional[int]] = []
+        total = len(self._sorted)
+        # В маленьком банке соседей меньше, чтобы точки кривой не сливались в одну
+        width = max(1, min(self.candidates, total // (2 * max(len(curve), 1))))
+        for target in curve:
+            window = self._nearest(round(min(max(target, 0.0), 1.0) * (total - 1)), width, taken)
+            if not window:
+                picked.append(None)
+                continue
+            # Из близких по сложности — реже всех сыгранный, чтобы вопросы не приедались
+            qid = min(window, key=lambda q: (self._played.get(q, 0), self._random.random()))
+            taken.add(qid)
+            picked.append(qid)
+        return picked
+
+    def _nearest(self, center: int, width: int, taken: Set[int]) -> List[int]:
+        """До width ещё не взятых вопросов, ближайших к позиции center в порядке сложности"""
+        found: List[int] = []
+        left, right = center - 1, center
+        while len(found) < width and (left >= 0 or right < len(self._sorted)):
+            if right < len(self._sorted):
+                qid = self._sorted[right][1]
+                if qid not in taken:
+                    found.append(qid)
+                right += 1
+            if left >= 0 and len(found) < width:
+                qid = self._sorted[left][1]
+                if qid not in taken:
+                    found.append(qid)
+                left -= 1
+        return found
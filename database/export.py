@@ -0,0 +1,222 @@
+"""Потоковая выгрузка истории игр для аналитики.
+
+Одна строка на ответ игрока: игра, раунд, вопрос и правильный ответ, ответ
+игрока, победитель раунда и выплата. Завершённые игры читаются и из живых
+таблиц, и из архива (archived_games), курсором по BATCH_SIZE строк
+(session.stream + yield_per) и сразу пишутся в CSV или Parquet — в памяти
+лежит только текущая пачка, сколько бы игр ни было в истории.
+
+Выгрузка инкрементальная: берутся игры, завершённые в (since, until].
+until по умолчанию — минуту назад, чтобы не потерять игру, чья транзакция
+ещё не закоммичена; его и надо передать как since в следующий раз
+(--watermark хранит его в файле). Оба источника читаются в одном снимке
+базы, так что игра, которую архиватор переносит прямо во время выгрузки,
+не пропадёт и не задвоится.
+
+Выгрузка без бота:
+    python -m database.export history.csv
+    python -m database.export history.parquet --watermark export.watermark
+"""
+import argparse
+import asyncio
+import csv
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
+
+from sqlalchemy import and_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.db import (
+    ArchivedGame, Database, Game, GameQuestion, Payout, PlayerAnswer, Question, Round
+)
+
+BATCH_SIZE = 5000
+# Игры моложе этого ещё могут дописываться — их заберёт следующая выгрузка
+SETTLE_DELAY = timedelta(minutes=1)
+
+COLUMNS = ("game_id", "finished_at", "round_number", "question_id", "question", "correct_answer",
+           "user_id", "answer", "winner_id", "is_winner", "paid")
+
+Row = Tuple
+
+
+@dataclass
+class ExportReport:
+    rows: int = 0
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+    def summary(self) -> str:
+        since = self.since.isoformat(sep=" ", timespec="seconds") if self.since else "начала"
+        return (f"📤 Выгружено ответов: {self.rows} "
+                f"(игры, завершённые с {since} по {self.until.isoformat(sep=' ', timespec='seconds')})")
+
+
+async def iter_rows(session: AsyncSession, since: Optional[datetime], until: datetime,
+                    batch_size: int = BATCH_SIZE) -> AsyncIterator[List[Row]]:
+    """Пачки строк выгрузки: сначала архив, потом живые таблицы"""
+    async for batch in _archived_rows(session, since, until, batch_size):
+        yield batch
+    async for batch in _live_rows(session, since, until, batch_size):
+        yield batch
+
+
+def _finished_between(column, since: Optional[datetime], until: datetime):
+    return and_(column > since, column <= until) if since is not None else column <= until
+
+
+def live_query(since: Optional[datetime], until: datetime):
+    """Ответы завершённых игр из живых таблиц"""
+    return (
+        select(Game.id, Game.finished_at, Round.round_number, GameQuestion.question_id, Round.question,
+               Question.answer, PlayerAnswer.user_id, PlayerAnswer.answer, Round.winner_id, Payout.amount)
+        .select_from(PlayerAnswer)
+        .join(Round, Round.id == PlayerAnswer.round_id)
+        .join(Game, Game.id == Round.game_id)
+        .outerjoin(GameQuestion, and_(GameQuestion.game_id == Game.id,
+                                      GameQuestion.round_number == Round.round_number))
+        .outerjoin(Question, Question.id == GameQuestion.question_id)
+        .outerjoin(Payout, Payout.round_id == Round.id)
+        .where(Game.is_active == False, _finished_between(Game.finished_at, since, until))
+        .order_by(Game.finished_at, Game.id, Round.round_number, PlayerAnswer.id)
+    )
+
+
+async def _live_rows(session: AsyncSession, since: Optional[datetime], until: datetime,
+                     batch_size: int) -> AsyncIterator[List[Row]]:
+    result = await session.stream(live_query(since, until).execution_options(yield_per=batch_size))
+    async for partition in result.partitions():
+        yield [
+            (game_id, finished_at, number, question_id, question, correct, user_id, answer, winner_id,
+             user_id == winner_id, paid if user_id == winner_id and paid else 0)
+            for game_id, finished_at, number, question_id, question, correct, user_id, answer, winner_id, paid
+            in partition
+        ]
+
+
+async def _archived_rows(session: AsyncSession, since: Optional[datetime], until: datetime,
+                         batch_size: int) -> AsyncIterator[List[Row]]:
+    # В строке архива — вся игра, поэтому игр на пачку берём меньше, чем строк
+    stmt = (
+        select(ArchivedGame.id, ArchivedGame.finished_at, ArchivedGame.summary)
+        .where(_finished_between(ArchivedGame.finished_at, since, until))
+        .order_by(ArchivedGame.finished_at, ArchivedGame.id)
+        .execution_options(yield_per=max(1, batch_size // 100))
+    )
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        games = [(game_id, finished_at, json.loads(summary)) for game_id, finished_at, summary in partition]
+        # Правильные ответы в архив не копируются — подтягиваем их одним запросом на пачку
+        question_ids = {r["question_id"] for _, _, s in games for r in s["rounds"] if r["question_id"]}
+        correct = dict((await session.execute(
+            select(Question.id, Question.answer).where(Question.id.in_(question_ids))
+        )).all()) if question_ids else {}
+        yield [
+            (game_id, finished_at, r["number"], r["question_id"], r["question"], correct.get(r["question_id"]),
+             user_id, answer, r["winner_id"], user_id == r["winner_id"],
+             r["paid"] if user_id == r["winner_id"] else 0)
+            for game_id, finished_at, summary in games
+            for r in summary["rounds"]
+            for user_id, answer in r["answers"]
+        ]
+
+
+class _CsvWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def write(self, rows: List[Row]):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Для выгрузки в Parquet нужен pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.schema = pa.schema([
+            ("game_id", pa.int64()), ("finished_at", pa.timestamp("us")), ("round_number", pa.int32()),
+            ("question_id", pa.int64()), ("question", pa.string()), ("correct_answer", pa.string()),
+            ("user_id", pa.int64()), ("answer", pa.string()), ("winner_id", pa.int64()),
+            ("is_winner", pa.bool_()), ("paid", pa.int64()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows: List[Row]):
+        # Каждая пачка — отдельная row group: файл растёт, память — нет
+        columns = list(zip(*rows))
+        self.writer.write_batch(self.pa.RecordBatch.from_arrays(
+            [self.pa.array(column, type=field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema
+        ))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {"csv": _CsvWriter, "parquet": _ParquetWriter}
+
+
+async def export(db: Database, path: str, fmt: str = "csv", since: Optional[datetime] = None,
+                 until: Optional[datetime] = None, batch_size: int = BATCH_SIZE) -> ExportReport:
+    """Выгрузить в файл ответы из игр, завершённых в (since, until]"""
+    report = ExportReport(since=since, until=until or datetime.utcnow() - SETTLE_DELAY)
+    writer = WRITERS[fmt](path)
+    try:
+        async with db.session_factory() as session:
+            async with session.begin():
+                # Оба источника — в одном снимке базы
+                if db.engine.dialect.name == "postgresql":
+                    await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+                else:
+                    # pysqlite не открывает транзакцию перед SELECT сам
+                    await session.execute(text("BEGIN"))
+                async for batch in iter_rows(session, report.since, report.until, batch_size):
+                    if batch:
+                        writer.write(batch)
+                        report.rows += len(batch)
+    finally:
+        writer.close()
+    return report
+
+
+def _read_watermark(path: str) -> Optional[datetime]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return datetime.fromisoformat(f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+async def _main(args):
+    since = datetime.fromisoformat(args.since) if args.since else None
+    if since is None and args.watermark:
+        since = _read_watermark(args.watermark)
+    fmt = args.format or ("parquet" if args.path.endswith(".parquet") else "csv")
+
+    async with Database() as db:
+        report = await export(db, args.path, fmt, since)
+    # Метку двигаем только после успешной выгрузки
+    if args.watermark:
+        with open(args.watermark, "w", encoding="utf-8") as f:
+            f.write(report.until.isoformat())
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="файл .csv или .parquet")
+    parser.add_argument("--format", choices=sorted(WRITERS))
+    parser.add_argument("--since", help="выгрузить игры, завершённые после этого момента (UTC, ISO 8601)")
+    parser.add_argument("--watermark", help="файл с меткой прошлой выгрузки: читается как --since и обновляется")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,192 @@
+"""FSM-хранилище aiogram в базе бота.
+
+Состояния и данные пользователей лежат в таблице fsm_states и переживают
+рестарт. Горячие ключи держатся в LRU-кеше, так что обычный апдейт не ходит
+в базу за состоянием; изменения пишутся в базу пачкой в фоне.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy import delete
+
+from config import FSM_CACHE_SIZE, FSM_TTL, FSM_FLUSH_INTERVAL
+from database.db import Database, FsmState, dialect_insert
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+FSM_CACHE = REGISTRY.counter("bot_fsm_cache_total", "Чтения FSM-состояния: из кеша или из базы", ("result",))
+_HITS, _MISSES = FSM_CACHE.labels("hit"), FSM_CACHE.labels("miss")
+
+
+@dataclass
+class _Record:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    touched: float = field(default_factory=time.monotonic)
+
+
+class SQLAlchemyStorage(BaseStorage):
+    """Промах кеша — один SELECT по первичному ключу. Записи уходят в базу
+    раз в flush_interval секунд (0 — сразу). Кто молчит дольше ttl, забывается.
+    """
+
+    def __init__(self, db: Database, cache_size: int = FSM_CACHE_SIZE,
+                 ttl: float = FSM_TTL, flush_interval: float = FSM_FLUSH_INTERVAL):
+        self.db = db
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self._cache: "OrderedDict[str, _Record]" = OrderedDict()
+        self._dirty: Set[str] = set()
+        self._flushing: Set[str] = set()
+        # Загрузки из базы в полёте: одновременные промахи по ключу ждут одну
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._last_expire = time.monotonic()
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:{key.destiny}"
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get(self._key(key))
+        record.state = state.state if isinstance(state, State) else state
+        await self._mark_dirty(self._key(key))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._get(self._key(key))).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._get(self._key(key))
+        record.data = data.copy()
+        await self._mark_dirty(self._key(key))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._get(self._key(key))).data.copy()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _get(self, key: str) -> _Record:
+        record = self._cache.get(key)
+        now = time.monotonic()
+        if record is not None and now - record.touched <= self.ttl:
+            self._cache.move_to_end(key)
+            record.touched = now
+            _HITS.inc()
+            return record
+
+        _MISSES.inc()
+        task = self._loading.get(key)
+        if task is None:
+            task = self._loading[key] = asyncio.create_task(self._load_into_cache(key))
+        # shield: отмена одного апдейта не должна срывать загрузку остальным
+        return await asyncio.shield(task)
+
+    async def _load_into_cache(self, key: str) -> _Record:
+        # Запись кладётся в кеш один раз, до того как проснётся кто-то из ждущих:
+        # иначе второй промах затёр бы запись, в которую первый уже что-то записал
+        try:
+            record = await self._load(key)
+        finally:
+            del self._loading[key]
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._evict()
+        return record
+
+    async def _load(self, key: str) -> _Record:
+        async with self.db.session_factory() as session:
+            row = await session.get(FsmState, key)
+        if row is None or row.updated_at < datetime.utcnow() - timedelta(seconds=self.ttl):
+            return _Record()
+        return _Record(state=row.state, data=json.loads(row.data) if row.data else {})
+
+    def _evict(self):
+        # Несохранённые записи вытеснять нельзя — их заберёт ближайший flush
+        for key in list(self._cache):
+            if len(self._cache) <= self.cache_size:
+                break
+            if key not in self._dirty and key not in self._flushing:
+                del self._cache[key]
+
+    async def _mark_dirty(self, key: str):
+        self._dirty.add(key)
+        if self.flush_interval <= 0:
+            await self.flush()
+        elif self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_expire > min(self.ttl, 3600):
+                    await self.expire()
+            except Exception:
+                logger.exception("FSM storage: не удалось сохранить состояния")
+
+    async def flush(self):
+        """Записать в базу все изменённые состояния одной транзакцией"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            keys, self._dirty = self._dirty, set()
+            self._flushing = keys
+            upserts, deletes = [], []
+            now = datetime.utcnow()
+            for key in keys:
+                record = self._cache.get(key)
+                if record is None or (record.state is None and not record.data):
+                    deletes.append(key)
+                else:
+                    upserts.append({"key": key, "state": record.state,
+                                    "data": json.dumps(record.data, ensure_ascii=False), "updated_at": now})
+            try:
+                async with self.db.transaction() as repo:
+                    if deletes:
+                        await repo.session.execute(delete(FsmState).where(FsmState.key.in_(deletes)))
+                    if upserts:
+                        stmt = dialect_insert(self.db.engine.dialect.name, FsmState)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=["key"],
+                            set_={"state": stmt.excluded.state, "data": stmt.excluded.data,
+                                  "updated_at": stmt.excluded.updated_at},
+                        )
+                        await repo.session.execute(stmt, upserts)
+            except Exception:
+                # Не потерять изменения: попробуем ещё раз в следующий flush
+                self._dirty |= keys
+                raise
+            finally:
+                self._flushing = set()
+
+    async def expire(self):
+        """Забыть пользователей, которые молчат дольше ttl"""
+        self._last_expire = time.monotonic()
+        deadline = time.monotonic() - self.ttl
+        for key in [k for k, r in self._cache.items() if r.touched < deadline and k not in self._dirty]:
+            del self._cache[key]
+        async with self.db.transaction() as repo:
+            await repo.session.execute(
+                delete(FsmState).where(FsmState.updated_at < datetime.utcnow() - timedelta(seconds=self.ttl))
+            )
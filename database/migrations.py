@@ -0,0 +1,165 @@
+"""Версионированные миграции схемы для SQLite и PostgreSQL.
+
+Версия схемы хранится в таблице schema_version. На старте:
+  * база актуальна — один SELECT версии, без блокировки, inspect и create_all;
+  * база пустая — create_all по моделям и сразу последняя версия;
+  * база старая — по очереди применяем недостающие шаги.
+"""
+import logging
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection, MetaData], None]
+
+
+def _create_tables(*names: str) -> Callable[[Connection, MetaData], None]:
+    """Шаг миграции, который добавляет новые таблицы из моделей"""
+    def upgrade(conn: Connection, metadata: MetaData):
+        metadata.create_all(conn, tables=[metadata.tables[name] for name in names])
+    return upgrade
+
+
+def _indexes_and_unique_answers(conn: Connection, metadata: MetaData):
+    # Дубликаты ответов мешают уникальному индексу — оставляем самый ранний
+    conn.execute(text(
+        "DELETE FROM player_answers WHERE id NOT IN "
+        "(SELECT MIN(id) FROM player_answers GROUP BY round_id, user_id)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_player_answers_round_user ON player_answers (round_id, user_id)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_rounds_game_active ON rounds (game_id, is_active)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_games_is_active ON games (is_active)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_is_ready ON users (is_ready)"))
+
+
+def _bigint_telegram_ids(conn: Connection, metadata: MetaData):
+    # Telegram id не помещаются в int4. В SQLite INTEGER и так 64-битный
+    if conn.dialect.name != "postgresql":
+        return
+    conn.execute(text("ALTER TABLE users ALTER COLUMN id TYPE BIGINT"))
+    conn.execute(text("ALTER TABLE player_answers ALTER COLUMN user_id TYPE BIGINT"))
+    conn.execute(text("ALTER TABLE rounds ALTER COLUMN winner_id TYPE BIGINT"))
+
+
+def _question_content_hash(conn: Connection, metadata: MetaData):
+    from database.question_import import content_hash
+
+    conn.execute(text("ALTER TABLE questions ADD COLUMN content_hash VARCHAR(40)"))
+    seen, rows = set(), []
+    for qid, question, answer in conn.execute(text("SELECT id, question, answer FROM questions ORDER BY id")):
+        digest = content_hash(question, answer)
+        # У уже существующих дубликатов хеш остаётся пустым
+        if digest not in seen:
+            seen.add(digest)
+            rows.append({"id": qid, "digest": digest})
+    if rows:
+        conn.execute(text("UPDATE questions SET content_hash = :digest WHERE id = :id"), rows)
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_questions_content_hash ON questions (content_hash)"))
+
+
+def _rooms(conn: Connection, metadata: MetaData):
+    conn.execute(text("ALTER TABLE games ADD COLUMN host_id BIGINT"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_games_host_active ON games (host_id, is_active)"))
+    metadata.create_all(conn, tables=[metadata.tables["game_players"]])
+    # В идущей игре старой версии играли все, кто нажал «готов»
+    conn.execute(text(
+        "INSERT INTO game_players (game_id, user_id) "
+        "SELECT g.id, u.id FROM games g, users u WHERE g.is_active = :yes AND u.is_ready = :yes"
+    ), {"yes": True})
+
+
+def _stakes(conn: Connection, metadata: MetaData):
+    conn.execute(text("ALTER TABLE rounds ADD COLUMN bank INTEGER NOT NULL DEFAULT 0"))
+    metadata.create_all(conn, tables=[metadata.tables[name] for name in ("bets", "payouts", "standings")])
+
+
+def _hint_schedule(conn: Connection, metadata: MetaData):
+    conn.execute(text("ALTER TABLE rounds ADD COLUMN next_hint_at TIMESTAMP"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_rounds_next_hint_at ON rounds (next_hint_at)"))
+
+
+def _archive(conn: Connection, metadata: MetaData):
+    conn.execute(text("ALTER TABLE games ADD COLUMN finished_at TIMESTAMP"))
+    # У игр, завершённых до миграции, времени окончания нет — считаем им время создания
+    conn.execute(text("UPDATE games SET finished_at = created_at WHERE is_active = :no"), {"no": False})
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_games_finished_at ON games (finished_at)"))
+    metadata.create_all(conn, tables=[metadata.tables["archived_games"]])
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "индексы на горячие выборки, уникальный ответ на раунд", _indexes_and_unique_answers),
+    Migration(2, "BIGINT для Telegram id", _bigint_telegram_ids),
+    Migration(3, "колода вопросов без повторов",
+              _create_tables("question_decks", "question_deck_entries", "game_questions")),
+    Migration(4, "хеш содержимого вопроса для импорта без дубликатов", _question_content_hash),
+    Migration(5, "FSM-состояния в базе вместо памяти", _create_tables("fsm_states")),
+    Migration(6, "отложенное удаление сообщений переживает рестарт", _create_tables("scheduled_deletions")),
+    Migration(7, "комнаты: ведущий у игры и список её игроков", _rooms),
+    Migration(8, "ставки, выплаты и таблица лидеров", _stakes),
+    Migration(9, "автоподсказки по таймеру", _hint_schedule),
+    Migration(10, "архив завершённых игр", _archive),
+    Migration(11, "статистика сложности вопросов", _create_tables("question_stats")),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def _current_version(conn: Connection) -> Optional[int]:
+    """None — пустая база, 0 — таблицы есть, но версии ещё нет"""
+    tables = set(inspect(conn).get_table_names())
+    if "schema_version" in tables:
+        return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+    return 0 if "users" in tables else None
+
+
+def _upgrade(conn: Connection, metadata: MetaData) -> int:
+    if conn.dialect.name == "postgresql":
+        # Несколько инстансов бота не должны мигрировать одновременно
+        conn.execute(text("SELECT pg_advisory_xact_lock(7001)"))
+
+    current = _current_version(conn)
+    if current == LATEST_VERSION:
+        return current
+
+    if current is None:
+        metadata.create_all(conn)
+        logger.info("Схема создана с нуля, версия %s", LATEST_VERSION)
+    else:
+        for migration in MIGRATIONS:
+            if migration.version > current:
+                logger.info("Миграция %s: %s", migration.version, migration.description)
+                migration.upgrade(conn, metadata)
+
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    conn.execute(text("DELETE FROM schema_version"))
+    conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": LATEST_VERSION})
+    return LATEST_VERSION
+
+
+async def _stored_version(engine: AsyncEngine) -> Optional[int]:
+    """Версия из schema_version одним запросом; None — таблицы нет или прочитать не удалось"""
+    async with engine.connect() as conn:
+        try:
+            return (await conn.execute(text("SELECT MAX(version) FROM schema_version"))).scalar()
+        except DBAPIError:
+            return None
+
+
+async def migrate(engine: AsyncEngine, metadata: MetaData) -> int:
+    """Довести схему до последней версии и вернуть её номер"""
+    # Обычный рестарт: схема уже последняя — хватает чтения версии
+    if await _stored_version(engine) == LATEST_VERSION:
+        return LATEST_VERSION
+    async with engine.begin() as conn:
+        return await conn.run_sync(_upgrade, metadata)
@@ -0,0 +1,100 @@
+"""Колода вопросов без повторов.
+
+Для колоды хранится перестановка id вопросов (question_deck_entries) и позиция.
+Вытянуть k вопросов — прочитать по первичному ключу диапазон [position, position + k)
+и сдвинуть позицию. Перетасовка нужна только когда колода кончилась или в базу
+добавили новые вопросы: тогда ещё не сыгранные вопросы (и новые) идут первыми.
+Если в банке вопросов не больше, чем просят, колода отдаётся целиком без перетасовки.
+"""
+import random
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.db import Question, QuestionDeck, QuestionDeckEntry, dialect_insert
+
+
+async def draw(session: AsyncSession, count: int, deck_name: str = "default") -> List[Question]:
+    """Вытянуть следующие count вопросов из колоды"""
+    deck = await _lock_deck(session, deck_name)
+    max_question_id = (await session.execute(select(func.max(Question.id)))).scalar() or 0
+
+    if max_question_id != deck.max_question_id:
+        await _reshuffle(session, deck, max_question_id)
+    if count >= deck.size:
+        # Игре нужно больше вопросов, чем есть: весь банк в случайном порядке, колода остаётся как есть
+        result = await session.execute(
+            select(Question).join(QuestionDeckEntry, QuestionDeckEntry.question_id == Question.id)
+            .where(QuestionDeckEntry.deck_id == deck.id)
+        )
+        questions = list(result.scalars())
+        random.shuffle(questions)
+        return questions
+    if deck.position + count > deck.size:
+        await _reshuffle(session, deck, max_question_id)
+
+    result = await session.execute(
+        select(Question)
+        .join(QuestionDeckEntry, QuestionDeckEntry.question_id == Question.id)
+        .where(
+            QuestionDeckEntry.deck_id == deck.id,
+            QuestionDeckEntry.position >= deck.position,
+            QuestionDeckEntry.position < deck.position + count,
+        )
+        .order_by(QuestionDeckEntry.position)
+    )
+    questions = result.scalars().all()
+    deck.position = min(deck.position + count, deck.size)
+    return questions
+
+
+async def _lock_deck(session: AsyncSession, deck_name: str) -> QuestionDeck:
+    # Две игры не должны вытянуть одни и те же вопросы: позицию колоды читает
+    # только тот, кто держит блокировку, до коммита своей транзакции
+    query = select(QuestionDeck).where(QuestionDeck.name == deck_name)
+    if session.bind.dialect.name == "postgresql":
+        query = query.with_for_update()
+    else:
+        # В SQLite нет FOR UPDATE: первая запись берёт блокировку базы на запись до коммита,
+        # а конкурент ждёт её (busy_timeout) и читает уже сдвинутую позицию
+        await session.execute(
+            update(QuestionDeck).where(QuestionDeck.name == deck_name).values(position=QuestionDeck.position)
+        )
+    deck: Optional[QuestionDeck] = (await session.execute(query)).scalar_one_or_none()
+    if deck is None:
+        # Колоду заводят две игры сразу: вторая вставка не падает на уникальном имени,
+        # а ждёт коммита первой и читает (и блокирует) уже её колоду
+        await session.execute(
+            dialect_insert(session.bind.dialect.name, QuestionDeck)
+            .values(name=deck_name, position=0, size=0, max_question_id=0)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        deck = (await session.execute(query)).scalar_one()
+    return deck
+
+
+async def _reshuffle(session: AsyncSession, deck: QuestionDeck, max_question_id: int):
+    played = set((await session.execute(
+        select(QuestionDeckEntry.question_id)
+        .where(QuestionDeckEntry.deck_id == deck.id, QuestionDeckEntry.position < deck.position)
+    )).scalars())
+    all_ids = (await session.execute(select(Question.id))).scalars().all()
+
+    fresh = [qid for qid in all_ids if qid not in played]
+    stale = [qid for qid in all_ids if qid in played]
+    random.shuffle(fresh)
+    random.shuffle(stale)
+    order = fresh + stale
+
+    await session.execute(delete(QuestionDeckEntry).where(QuestionDeckEntry.deck_id == deck.id))
+    if order:
+        await session.execute(insert(QuestionDeckEntry), [
+            {"deck_id": deck.id, "position": position, "question_id": qid}
+            for position, qid in enumerate(order)
+        ])
+
+    deck.position = 0
+    deck.size = len(order)
+    deck.max_question_id = max_question_id
+    deck.shuffled_at = func.now()
@@ -0,0 +1,238 @@
+"""Потоковый импорт банка вопросов.
+
+JSON-массив читается из файла/буфера кусками и разбирается по одному объекту,
+так что в памяти одновременно лежит только текущий кусок и текущая пачка строк.
+Формат — как в questions.json: {"question", "answer", "hints": [...]};
+поля hint1..hint3 тоже понимаются. Дубликаты отсекаются по хешу содержимого
+(уникальный индекс questions.content_hash), запись — пачками:
+executemany на SQLite, COPY во временную таблицу на PostgreSQL.
+
+Импорт из файла без бота:
+    python -m database.question_import questions.json
+"""
+import asyncio
+import codecs
+import hashlib
+import json
+import sys
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.db import Question, dialect_insert
+
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 2000
+# Элемент больше этого (в символах) считается битым: иначе ради него буферизовался бы весь файл
+MAX_ITEM_SIZE = 1024 * 1024
+# Сколько символов в конце куска может занимать оборванный литерал, число или \u-escape
+_TOKEN_TAIL = 64
+
+_COLUMNS = ("question", "answer", "hint1", "hint2", "hint3", "content_hash")
+
+
+class InvalidJSON(ValueError):
+    pass
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    error: Optional[str] = None
+
+    def summary(self) -> str:
+        text = (f"Добавлено: {self.inserted}, дубликатов: {self.duplicates}, "
+                f"с ошибками: {self.invalid}")
+        if self.error:
+            text += f"\n⚠️ Файл прочитан не до конца: {self.error}"
+        return text
+
+
+def content_hash(question: str, answer: str) -> str:
+    """Хеш вопроса и ответа без учёта регистра и лишних пробелов"""
+    normalized = " ".join(question.lower().split()) + "\x1f" + " ".join(answer.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def iter_json_array(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[object]:
+    """Отдавать элементы JSON-массива по одному, читая поток кусками"""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    buf, pos, eof = "", 0, False
+    offset = 0  # сколько байт файла уже выброшено из буфера
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof, offset
+        if eof:
+            return False
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        if not buf and chunk.startswith(codecs.BOM_UTF8):
+            offset = len(codecs.BOM_UTF8)
+        offset += len(buf[:pos].encode("utf-8"))
+        buf = buf[pos:] + utf8.decode(chunk or b"", final=eof)
+        pos = 0
+        return True
+
+    def broken_item(at: int) -> InvalidJSON:
+        return InvalidJSON(f"Не удалось разобрать элемент массива (байт {offset + len(buf[:at].encode('utf-8'))})")
+
+    def skip_ws() -> bool:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf):
+                return True
+            if not fill():
+                return False
+
+    if not skip_ws() or buf[pos] != "[":
+        raise InvalidJSON("Ожидался JSON-массив")
+    pos += 1
+
+    expect_item = True
+    while True:
+        if not skip_ws():
+            raise InvalidJSON("Файл оборвался посреди массива")
+        char = buf[pos]
+        if char == "]":
+            return
+        if char == ",":
+            if expect_item:
+                raise InvalidJSON("Лишняя запятая в массиве")
+            pos += 1
+            expect_item = True
+            continue
+        if not expect_item:
+            raise InvalidJSON("Пропущена запятая между элементами")
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                # Ошибка далеко от конца буфера — элемент битый (кроме незакрытой строки: она
+                # сообщает о своём начале). Иначе объект не влез — дочитываем, но не бесконечно
+                if len(buf) - e.pos > _TOKEN_TAIL and not e.msg.startswith("Unterminated string"):
+                    raise broken_item(e.pos)
+                if len(buf) - pos > MAX_ITEM_SIZE or not fill():
+                    raise broken_item(pos)
+                continue
+            if end == len(buf) and not eof and not isinstance(item, (dict, list, str)):
+                # Число могло оборваться на границе куска
+                fill()
+                continue
+            break
+        pos = end
+        expect_item = False
+        yield item
+
+
+def to_row(item: object) -> Optional[dict]:
+    """Привести элемент файла к строке таблицы questions (None — элемент битый)"""
+    if not isinstance(item, dict):
+        return None
+    question, answer = item.get("question"), item.get("answer")
+    if not isinstance(question, str) or not question.strip():
+        return None
+    if isinstance(answer, (int, float)) and not isinstance(answer, bool):
+        answer = str(answer)
+    if not isinstance(answer, str) or not answer.strip():
+        return None
+
+    hints = item.get("hints")
+    if hints is None:
+        hints = [item.get(f"hint{i}") for i in range(1, 4)]
+    if not isinstance(hints, list):
+        return None
+    hints = [str(h) if h is not None else None for h in hints[:3]] + [None] * (3 - min(len(hints), 3))
+
+    return {
+        "question": question.strip(),
+        "answer": answer.strip(),
+        "hint1": hints[0],
+        "hint2": hints[1],
+        "hint3": hints[2],
+        "content_hash": content_hash(question, answer),
+    }
+
+
+async def import_questions(session: AsyncSession, stream: BinaryIO, batch_size: int = BATCH_SIZE) -> ImportReport:
+    """Залить вопросы из потока в базу. Коммит — на вызывающем коде.
+
+    Если файл оборван или испорчен, всё, что успели разобрать до ошибки,
+    остаётся: повторный импорт исправленного файла просто пропустит дубликаты.
+    """
+    report = ImportReport()
+    writer = _copy_batch if session.bind.dialect.name == "postgresql" else _insert_batch
+    batch: List[dict] = []
+
+    try:
+        for item in iter_json_array(stream):
+            row = to_row(item)
+            if row is None:
+                report.invalid += 1
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                inserted = await writer(session, batch)
+                report.inserted += inserted
+                report.duplicates += len(batch) - inserted
+                batch = []
+    except InvalidJSON as e:
+        report.error = str(e)
+    if batch:
+        inserted = await writer(session, batch)
+        report.inserted += inserted
+        report.duplicates += len(batch) - inserted
+    return report
+
+
+async def _insert_batch(session: AsyncSession, rows: List[dict]) -> int:
+    stmt = (
+        dialect_insert(session.bind.dialect.name, Question)
+        .on_conflict_do_nothing(index_elements=["content_hash"])
+        .returning(Question.id)
+    )
+    result = await session.execute(stmt, rows)
+    return len(result.all())
+
+
+async def _copy_batch(session: AsyncSession, rows: List[dict]) -> int:
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    await session.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS questions_import "
+        "(question TEXT, answer TEXT, hint1 TEXT, hint2 TEXT, hint3 TEXT, content_hash VARCHAR(40)) "
+        "ON COMMIT DROP"
+    ))
+    await raw.driver_connection.copy_records_to_table(
+        "questions_import", records=[tuple(row[c] for c in _COLUMNS) for row in rows], columns=_COLUMNS
+    )
+    result = await session.execute(text(
+        "INSERT INTO questions (question, answer, hint1, hint2, hint3, content_hash) "
+        "SELECT DISTINCT ON (content_hash) question, answer, hint1, hint2, hint3, content_hash "
+        "FROM questions_import ON CONFLICT (content_hash) DO NOTHING RETURNING id"
+    ))
+    inserted = len(result.all())
+    await session.execute(text("TRUNCATE questions_import"))
+    return inserted
+
+
+async def _main(path: str):
+    from database.db import Database
+
+    async with Database() as db:
+        async with db.transaction() as repo:
+            with open(path, "rb") as stream:
+                report = await repo.import_questions(stream)
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Использование: python -m database.question_import questions.json")
+    asyncio.run(_main(sys.argv[1]))
@@ -0,0 +1,180 @@
+"""Снимок банка вопросов на диске — вопрос раунда без запроса к базе.
+
+Файл собирается из таблицы questions фоном после старта бота и после
+импорта вопросов, а читается через mmap: при открытии в память ничего не
+грузится, вопрос находится бинарным поиском по индексу id прямо в файле,
+страницы подтягивает ОС. Формат:
+
+    заголовок  MAGIC, число вопросов, максимальный id, смещение индекса
+    данные     JSON [вопрос, ответ, подсказка 1, 2, 3] на вопрос, подряд
+    индекс     (id, смещение, длина) по возрастанию id
+
+Вопросы после импорта не меняются и не удаляются, поэтому устаревший
+снимок не врёт — в нём просто нет новых вопросов, их отдаёт база.
+Число вопросов и максимальный id в заголовке — метка, по которой видно,
+что снимок пора пересобрать.
+"""
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select
+
+from database.models import Question
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SKQSNAP1"
+HEADER = struct.Struct("<8sIqQ")   # MAGIC, число вопросов, максимальный id, смещение индекса
+ENTRY = struct.Struct("<qQI")      # id, смещение, длина
+# Сборка идёт в цикле событий бота: пачки мелкие, чтобы не задерживать апдейты
+BATCH_SIZE = 500
+
+
+class QuestionSnapshot:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._count = 0
+        self._index = 0
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._corrupt = False
+        self._db = None
+        self._task: Optional[asyncio.Task] = None
+        self._stale = False
+
+    @property
+    def stamp(self) -> Optional[Tuple[int, int]]:
+        """(число вопросов, максимальный id) снимка; None — снимка нет"""
+        self._open()
+        return self._stamp
+
+    def get(self, question_id: int) -> Optional[Question]:
+        """Вопрос из снимка или None, если его там нет"""
+        if not self._open() or not self._count:
+            return None
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            entry_id, offset, length = ENTRY.unpack_from(self._map, self._index + middle * ENTRY.size)
+            if entry_id < question_id:
+                low = middle + 1
+            elif entry_id > question_id:
+                high = middle
+            else:
+                question, answer, hint1, hint2, hint3 = json.loads(self._map[offset:offset + length])
+                return Question(id=question_id, question=question, answer=answer,
+                                hint1=hint1, hint2=hint2, hint3=hint3)
+        return None
+
+    def _open(self) -> bool:
+        if self._map is not None:
+            return True
+        try:
+            self._file = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self._count, max_id, self._index = HEADER.unpack_from(self._map)
+        except (ValueError, struct.error):
+            magic = None
+        if magic != MAGIC:
+            if not self._corrupt:
+                logger.warning("Снимок вопросов %s повреждён — вопросы берутся из базы", self.path)
+            self._corrupt = True
+            self.close_file()
+            return False
+        self._corrupt = False
+        self._stamp = (self._count, max_id)
+        return True
+
+    def close_file(self):
+        """Отпустить файл; следующий get откроет снимок заново"""
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = self._map = None
+        self._count = 0
+        self._stamp = None
+
+    # ==================== СБОРКА ====================
+    async def refresh(self, db) -> bool:
+        """Пересобрать снимок, если в базе появились вопросы. True — файл записан заново"""
+        from database.db import Question as QuestionRow
+
+        async with db.session_factory() as session:
+            count, max_id = (await session.execute(
+                select(func.count(QuestionRow.id), func.max(QuestionRow.id))
+            )).one()
+            if self.stamp == (count, max_id or 0):
+                return False
+            written = await self._build(session)
+        logger.info("Снимок вопросов %s: %s вопросов", self.path, written)
+        return True
+
+    async def _build(self, session) -> int:
+        from database.db import Question as QuestionRow
+
+        # Пишем во временный файл и подменяем разом: читатели видят либо старый снимок, либо новый
+        temporary = f"{self.path}.tmp"
+        entries = []
+        max_id = 0
+        with open(temporary, "wb") as f:
+            f.write(bytes(HEADER.size))
+            result = await session.stream(
+                select(QuestionRow.id, QuestionRow.question, QuestionRow.answer,
+                       QuestionRow.hint1, QuestionRow.hint2, QuestionRow.hint3)
+                .order_by(QuestionRow.id)
+                .execution_options(yield_per=BATCH_SIZE)
+            )
+            async for partition in result.partitions():
+                for question_id, *fields in partition:
+                    data = json.dumps(fields, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                    entries.append(ENTRY.pack(question_id, f.tell(), len(data)))
+                    f.write(data)
+                    max_id = question_id
+            index = f.tell()
+            f.write(b"".join(entries))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, len(entries), max_id, index))
+        os.replace(temporary, self.path)
+        self.close_file()
+        return len(entries)
+
+    # ==================== ФОНОВОЕ ОБНОВЛЕНИЕ ====================
+    async def start(self, db):
+        """Сверить снимок с базой и при необходимости пересобрать — фоном, старт бота его не ждёт"""
+        self._db = db
+        self.refresh_later()
+
+    def refresh_later(self):
+        """Пересобрать снимок в фоне (после импорта вопросов); до start — ничего не делает"""
+        if self._db is None:
+            return
+        self._stale = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        # Импорт во время сборки снова помечает снимок устаревшим — соберём ещё раз
+        while self._stale:
+            self._stale = False
+            try:
+                await self.refresh(self._db)
+            except Exception:
+                logger.exception("Не удалось собрать снимок вопросов %s", self.path)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._db = None
+        self.close_file()
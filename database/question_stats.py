@@ -0,0 +1,79 @@
+"""Статистика вопросов: насколько игроки ошибаются на каждом вопросе.
+
+Строка question_stats пополняется одним upsert, когда раунд закрывается:
+сколько раз вопрос сыгран, сумма абсолютных и относительных ошибок
+числовых ответов, сколько раз был победитель и насколько он промахнулся.
+Сложность — средняя относительная ошибка (0 — все угадали, 1 — ошиблись
+в разы) — пересчитывается тем же запросом, так что читать её можно
+готовой, не просматривая player_answers.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.db import Question, QuestionStat, dialect_insert
+
+
+def relative_error(value: float, truth: float) -> float:
+    """Ошибка относительно правильного ответа, не больше 1: промах в разы весит как промах на 100%"""
+    if truth == 0:
+        return 0.0 if value == 0 else 1.0
+    return min(1.0, abs(value - truth) / abs(truth))
+
+
+async def record(session: AsyncSession, question_id: int, truth: float, values: Sequence[float],
+                 winner_value: Optional[float]) -> Tuple[Optional[float], int]:
+    """Добавить сыгранный раунд. Возвращает новую сложность и сколько раз вопрос сыгран"""
+    relative = [relative_error(value, truth) for value in values]
+    stmt = dialect_insert(session.bind.dialect.name, QuestionStat).values(
+        question_id=question_id,
+        played=1,
+        answers=len(values),
+        error_sum=sum(abs(value - truth) for value in values),
+        relative_error_sum=sum(relative),
+        wins=int(winner_value is not None),
+        margin_sum=relative_error(winner_value, truth) if winner_value is not None else 0.0,
+        difficulty=sum(relative) / len(relative) if relative else None,
+    )
+    stats, new = QuestionStat.__table__.c, stmt.excluded
+    answers = stats.answers + new.answers
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["question_id"],
+        set_={
+            "played": stats.played + new.played,
+            "answers": answers,
+            "error_sum": stats.error_sum + new.error_sum,
+            "relative_error_sum": stats.relative_error_sum + new.relative_error_sum,
+            "wins": stats.wins + new.wins,
+            "margin_sum": stats.margin_sum + new.margin_sum,
+            "difficulty": case((answers > 0, (stats.relative_error_sum + new.relative_error_sum) / answers),
+                               else_=None),
+        },
+    ).returning(QuestionStat.difficulty, QuestionStat.played)
+    return tuple((await session.execute(stmt)).one())
+
+
+async def load_difficulty(session: AsyncSession) -> List[Tuple[int, float, int]]:
+    """(question_id, сложность, сыграно) всех вопросов со статистикой — для DifficultyIndex"""
+    result = await session.execute(
+        select(QuestionStat.question_id, QuestionStat.difficulty, QuestionStat.played)
+        .where(QuestionStat.difficulty.is_not(None))
+    )
+    return result.all()
+
+
+async def extremes(session: AsyncSession, limit: int):
+    """Самые лёгкие и самые сложные вопросы: (лёгкие, сложные)"""
+    query = (
+        select(Question.question, QuestionStat.played, QuestionStat.difficulty,
+               (QuestionStat.error_sum / QuestionStat.answers).label("mean_error"),
+               case((QuestionStat.wins > 0, QuestionStat.margin_sum / QuestionStat.wins), else_=None)
+               .label("winner_margin"))
+        .join(Question, Question.id == QuestionStat.question_id)
+        .where(QuestionStat.difficulty.is_not(None))
+        .limit(limit)
+    )
+    easiest = (await session.execute(query.order_by(QuestionStat.difficulty))).all()
+    hardest = (await session.execute(query.order_by(QuestionStat.difficulty.desc()))).all()
+    return easiest, hardest
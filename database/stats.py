@@ -0,0 +1,78 @@
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from utils.metrics import REGISTRY, Histogram
+
+QUERY_SECONDS = REGISTRY.histogram("bot_db_query_seconds", "Время SQL-запроса по виду запроса и таблице", ("query",))
+
+# Метка запроса — глагол и первая таблица: "SELECT users", "INSERT player_answers", "BEGIN"
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN|TABLE)\s+"?(\w+)', re.IGNORECASE)
+# Серия гистограммы на текст запроса: SQLAlchemy переиспользует строки закешированных запросов
+_series_by_statement: Dict[str, Histogram] = {}
+MAX_STATEMENTS = 2000
+
+
+@dataclass
+class QueryStats:
+    """Сколько запросов и времени в базе ушло на одно обновление"""
+    statements: int = 0
+    seconds: float = 0.0
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def collect() -> Iterator[QueryStats]:
+    """Считать запросы, выполненные в текущей asyncio-задаче"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def query_label(statement: str) -> str:
+    words = statement.split(None, 1)
+    verb = words[0].upper() if words else "?"
+    match = _TABLE.search(statement)
+    return f"{verb} {match.group(1).lower()}" if match else verb
+
+
+def _query_series(statement: str):
+    series = _series_by_statement.get(statement)
+    if series is None:
+        # Запросы с IN (...) разной длины — разные строки; кеш не растёт без предела, метки и так ограничены
+        if len(_series_by_statement) >= MAX_STATEMENTS:
+            _series_by_statement.clear()
+        series = _series_by_statement[statement] = QUERY_SECONDS.labels(query_label(statement))
+    return series
+
+
+def install(engine: AsyncEngine):
+    """Повесить хуки на движок: время каждого запроса — в метрики и в collect()"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        _query_series(statement).observe(elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.seconds += elapsed
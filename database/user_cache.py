@@ -0,0 +1,68 @@
+"""Кеш пользователей в памяти процесса.
+
+Повторный /start и сбор лобби не ходят в базу: записи пользователей лежат
+в LRU-кеше, а множество готовых игроков — целиком в памяти. Кеш меняет только
+Repository и только после коммита транзакции, так что откат не оставляет
+в памяти того, чего нет в базе. Рассчитан на один процесс бота.
+"""
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Set
+
+from config import USER_CACHE_SIZE
+from database.models import User
+
+
+class UserCache:
+    def __init__(self, size: int = USER_CACHE_SIZE):
+        self.size = size
+        self._users: "OrderedDict[int, User]" = OrderedDict()
+        self._ready: Optional[Set[int]] = None  # None — ещё не загружено из базы
+        self.version = 0  # растёт на каждое изменение готовности
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def get(self, user_id: int) -> Optional[User]:
+        user = self._users.get(user_id)
+        if user is not None:
+            self._users.move_to_end(user_id)
+        return user
+
+    def put(self, user: User):
+        self._users[user.id] = user
+        self._users.move_to_end(user.id)
+        while len(self._users) > self.size:
+            self._users.popitem(last=False)
+
+    @property
+    def ready_loaded(self) -> bool:
+        return self._ready is not None
+
+    def ready_ids(self) -> List[int]:
+        return list(self._ready or ())
+
+    def load_ready(self, user_ids: Iterable[int], version: int):
+        """Множество готовых целиком — из одного SELECT.
+
+        version — значение self.version до запроса: если готовность успела
+        поменяться, пока шёл SELECT, результат мог устареть и не запоминается.
+        """
+        if version == self.version:
+            self._ready = set(user_ids)
+
+    def set_ready(self, user_ids: Iterable[int], ready: bool):
+        self.version += 1
+        for user_id in user_ids:
+            user = self._users.get(user_id)
+            if user is not None:
+                user.is_ready = ready
+            if self._ready is not None:
+                if ready:
+                    self._ready.add(user_id)
+                else:
+                    self._ready.discard(user_id)
+
+    def clear(self):
+        self.version += 1
+        self._users.clear()
+        self._ready = None
@@ -1,23 +1,42 @@
 from aiogram import Router, F, Bot
-from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
-from aiogram.filters import Command
+from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.filters import Command, CommandObject
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from config import ADMIN_ID
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from config import ADMIN_ID, MAX_ROUNDS, PROFILE_MAX_SECONDS
 from keyboards.admin_kb import (
     get_admin_start_keyboard, get_round_control_keyboard, 
-    get_next_round_keyboard, get_winner_selection_keyboard
+    get_next_round_keyboard, get_last_round_keyboard, get_winner_selection_keyboard
 )
 from utils.messages import (
-    ADMIN_GAME_STARTED, ADMIN_ALL_ANSWERED, ADMIN_ROUND_COMPLETED, ADMIN_NO_WINNER
+    ADMIN_GAME_STARTED, ADMIN_ALL_ANSWERED, ADMIN_ROUND_COMPLETED, ADMIN_NO_WINNER,
+    PLAYER_QUESTION_MESSAGE, PLAYER_STAKE_MESSAGE, PLAYER_HINT_BROADCAST, PLAYER_WINNER_ANNOUNCEMENT,
+    PLAYER_GAME_END, escape_markdown
 )
 from utils.game_logic import GameManager
-from database.db import Database
+from utils.broadcast import Broadcaster, BroadcastResult
+from utils.answer_tracker import AnswerTracker
+from utils.hint_scheduler import HintScheduler
+from utils.ranking import format_number
+from utils.stakes import ante_for_round, format_standings
+from utils.rooms import IsHost, Room, RoomRegistry, RoundAnswers
+from utils.profiler import SamplingProfiler
+from database.db import Database, Repository
+from database import export as history_export
+from handlers.player import PlayerGameStates
 import asyncio
-from aiogram.filters import StateFilter
+import os
+import tempfile
+from datetime import datetime
+from aiogram.filters import StateFilter, or_f
 
 router = Router()
 
+# Больше документа бот в Telegram не отправит
+EXPORT_MAX_DOCUMENT = 50 * 1024 * 1024
+
 class AdminStates(StatesGroup):
     waiting_hint1 = State()
     waiting_hint2 = State()
@@ -25,7 +44,7 @@ class AdminStates(StatesGroup):
     waiting_questions_file = State()
 
 @router.message(Command("admin"))
-async def admin_panel(message: Message, db: Database):
+async def admin_panel(message: Message):
     if message.from_user.id != ADMIN_ID:
         await message.answer("Доступ запрещён. Только для админа.")
         return
@@ -37,46 +56,166 @@ async def admin_panel(message: Message, db: Database):
         parse_mode="Markdown"
     )
 
-@router.callback_query(F.data == "admin_start_game")
-async def start_new_game(callback: CallbackQuery, state: FSMContext, db: Database):
-    if callback.from_user.id != ADMIN_ID:
-        await callback.answer("Доступ запрещён.")
+# Профиль живого бота: /profile [секунды] — стеки для flamegraph и отчёт о горячих функциях
+@router.message(Command("profile"))
+async def cmd_profile(message: Message, command: CommandObject, profiler: SamplingProfiler):
+    if message.from_user.id != ADMIN_ID:
+        return
+    try:
+        seconds = float(command.args or 10)
+    except ValueError:
+        await message.answer(f"Использование: /profile [секунды, до {PROFILE_MAX_SECONDS:g}]")
+        return
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        await message.answer(f"Профилировать можно от 0 до {PROFILE_MAX_SECONDS:g} секунд")
+        return
+    if profiler.running:
+        await message.answer("Профайлер уже запущен — дождитесь результата")
         return
-    game_manager = GameManager(db)
     
-    if await game_manager.start_new_game():
-        players_count = await game_manager.get_ready_players_count()
-        
+    await message.answer(f"Профилирую {seconds:g} с...")
+    profile = await profiler.run(seconds)
+    
+    directory = tempfile.mkdtemp()
+    stamp = f"{datetime.utcnow():%Y%m%d-%H%M%S}"
+    folded = os.path.join(directory, f"profile-{stamp}.folded")
+    report = os.path.join(directory, f"profile-{stamp}.txt")
+    try:
+        with open(folded, "w", encoding="utf-8") as f:
+            f.write(profile.folded())
+        with open(report, "w", encoding="utf-8") as f:
+            f.write(profile.report())
+        # Без Markdown: в именах функций есть подчёркивания
+        await message.answer_document(FSInputFile(folded),
+                                      caption=profile.summary() + "\n\nflamegraph.pl или speedscope.app")
+        await message.answer_document(FSInputFile(report), caption="Горячие функции и задачи")
+    finally:
+        for path in (folded, report):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(directory)
+
+async def send_question_to_players(broadcaster: Broadcaster, storage: BaseStorage,
+                                   player_ids: list, round_obj, bank: int = 0) -> BroadcastResult:
+    """Разослать вопрос раунда и перевести игроков в ожидание ответа"""
+    bot = broadcaster.bot
+    text = PLAYER_QUESTION_MESSAGE.format(round_num=round_obj.round_number, question=round_obj.question)
+    text += PLAYER_STAKE_MESSAGE.format(ante=ante_for_round(round_obj.round_number), bank=bank)
+    
+    async def send(chat_id: int):
+        # Раунд, в который пойдёт ответ, берётся из комнаты игрока — в состоянии его не храним
+        player_state = FSMContext(storage=storage, key=StorageKey(bot_id=bot.id, chat_id=chat_id, user_id=chat_id))
+        await player_state.set_state(PlayerGameStates.waiting_answer)
+        await bot.send_message(chat_id, text, parse_mode="Markdown")
+    
+    return await broadcaster.run(player_ids, send)
+
+async def launch_round(message: Message, state: FSMContext, repo: Repository, broadcaster: Broadcaster,
+                       answer_tracker: AnswerTracker, hint_scheduler: HintScheduler, game_manager: GameManager):
+    """Взять вопрос из базы, создать раунд и разослать его игрокам"""
+    question = await game_manager.next_question()
+    if not question:
+        await message.answer("Вопросы для этой игры закончились. Загрузите новые через /loadquestions")
+        return
+    
+    round_obj = await game_manager.start_round(question.question)
+    if not round_obj:
+        await message.answer("Все раунды сыграны.")
+        return
+    
+    player_ids = list(game_manager.room.players)
+    bank = await game_manager.collect_stakes(round_obj)
+    answer_tracker.start_round(round_obj.id, player_ids)
+    # Раунд должен быть в базе до того, как игроки начнут отвечать
+    await repo.commit()
+    result = await send_question_to_players(broadcaster, state.storage, player_ids, round_obj, bank)
+    # Интервал до первой подсказки считается от момента, когда вопрос дошёл до игроков
+    await hint_scheduler.plan(round_obj.id, hint_scheduler.interval)
+    
+    await state.set_state(AdminStates.waiting_hint1)
+    auto_hints = (f"Подсказки из вопроса придут сами каждые {hint_scheduler.interval:g} с "
+                  "(сразу, как ответят все). Можно написать свою или выбрать действие:"
+                  if hint_scheduler.enabled else "Напишите текст первой подсказки или выберите действие:")
+    await message.answer(
+        f"🎯 Раунд {round_obj.round_number}/{MAX_ROUNDS}: вопрос разослан.\n{result.summary()}\n\n{auto_hints}",
+        reply_markup=get_round_control_keyboard(round_obj.id, True if hint_scheduler.enabled else None)
+    )
+
+def room_invite_link(bot_username: str, room: Room) -> str:
+    return f"https://t.me/{bot_username}?start=room_{room.game_id}"
+
+@router.message(Command("newroom"))
+async def cmd_new_room(message: Message, bot: Bot, repo: Repository, room_registry: RoomRegistry):
+    """Открыть комнату: игроки заходят в неё по ссылке, ведущий запускает игру кнопкой"""
+    async with room_registry.host_lock(message.from_user.id):
+        room = room_registry.hosted_by(message.from_user.id)
+        if room is not None and room.current_round > 0:
+            await message.answer("У вас уже идёт игра. Завершите её, чтобы открыть новую комнату.")
+            return
+        if room is None:
+            room = await GameManager(repo).start_new_game(room_registry, message.from_user.id)
+            # Комната должна быть в базе до того, как по ссылке придут игроки
+            await repo.commit()
+    
+    me = await bot.me()
+    await message.answer(
+        f"🚪 Комната {room.game_id}\n\n"
+        f"Ссылка для игроков:\n{room_invite_link(me.username, room)}\n\n"
+        "Когда все зайдут, нажмите кнопку:",
+        # Без Markdown: подчёркивания в ссылке сломали бы разметку
+        reply_markup=get_admin_start_keyboard()
+    )
+
+@router.callback_query(F.data == "admin_start_game")
+async def start_new_game(callback: CallbackQuery, state: FSMContext, repo: Repository, broadcaster: Broadcaster,
+                         answer_tracker: AnswerTracker, hint_scheduler: HintScheduler, room_registry: RoomRegistry):
+    host_id = callback.from_user.id
+    # Пока открывается игра, повторное нажатие ждёт и потом видит уже открытую комнату
+    async with room_registry.host_lock(host_id):
+        room = room_registry.hosted_by(host_id)
+        if host_id != ADMIN_ID and room is None:
+            await callback.answer("Сначала откройте комнату: /newroom")
+            return
+        game_manager = GameManager(repo, room)
+
+        if room is None or room.current_round > 0:
+            # Админ играет со всеми, кто нажал «готов» и не сидит в чужой комнате.
+            # Список берём до закрытия прежней игры — она сбрасывает готовность своих игроков
+            lobby = []
+            if host_id == ADMIN_ID:
+                lobby = [
+                    user_id for user_id in await repo.get_ready_player_ids()
+                    if room_registry.room_of(user_id) in (None, room)
+                ]
+            room = await game_manager.start_new_game(room_registry, host_id)
+            await game_manager.add_players(room_registry, lobby)
+            # Комната и её игроки попадают в реестр при коммите — до первого раунда
+            await repo.commit()
+    
+    async with room.lock:
+        if room.current_round > 0:
+            await callback.answer("Игра уже идёт")
+            return
         await callback.message.edit_text(
-            ADMIN_GAME_STARTED.format(count=players_count),
+            ADMIN_GAME_STARTED.format(count=game_manager.get_players_count()),
             parse_mode="Markdown"
         )
         
-        # Загружаем вопрос из базы для первого раунда
-        questions = await db.get_questions(1)
-        if questions:
-            question = questions[0].question
-            await game_manager.start_round(question)
-            await send_question_to_players(callback.bot, db, game_manager, question)
-        
-        await state.set_state(AdminStates.waiting_hint1)
-        
-    else:
-        await callback.answer("Ошибка при запуске игры")
+        await launch_round(callback.message, state, repo, broadcaster, answer_tracker, hint_scheduler, game_manager)
 
 # Команда загрузки вопросов
 @router.message(Command("loadquestions"))
-async def cmd_load_questions(message: Message, db: Database):
+async def cmd_load_questions(message: Message, state: FSMContext):
     if message.from_user.id != ADMIN_ID:
         return
     await message.answer(
         "Пришли мне файл questions.json с вопросами\n"
         "(можно просто переслать как документ)"
     )
-    await AdminStates.waiting_questions_file.set()
+    await state.set_state(AdminStates.waiting_questions_file)
 
 @router.message(AdminStates.waiting_questions_file, F.document)
-async def receive_questions_file(message: Message, db: Database, state: FSMContext):
+async def receive_questions_file(message: Message, repo: Repository, state: FSMContext):
     if message.from_user.id != ADMIN_ID:
         return
     
@@ -86,18 +225,69 @@ async def receive_questions_file(message: Message, db: Database, state: FSMConte
     
     await message.answer("Файл получен! Загружаю вопросы в базу...")
     
-    # Скачиваем файл
-    file = await message.bot.download(message.document)
+    # Скачиваем файл в память и разбираем его потоково
+    buffer = await message.bot.download(message.document)
+    report = await repo.import_questions(buffer)
     
-    # Загружаем в базу
-    count = await db.load_questions_from_file(file.name)
-    
-    await message.answer(f"Готово! Загружено {count} вопросов в базу.\nТеперь можно начинать игру!")
+    await message.answer(f"Готово! {report.summary()}\nТеперь можно начинать игру!")
     await state.clear()
 
+# Выгрузка истории для аналитики: /export [csv|parquet] [с какой даты, UTC]
+@router.message(Command("export"))
+async def cmd_export(message: Message, command: CommandObject, db: Database):
+    if message.from_user.id != ADMIN_ID:
+        return
+    fmt, since = "csv", None
+    for arg in (command.args or "").split():
+        if arg in history_export.WRITERS:
+            fmt = arg
+            continue
+        try:
+            since = datetime.fromisoformat(arg)
+        except ValueError:
+            await message.answer("Использование: /export [csv|parquet] [2024-01-31]")
+            return
+    
+    await message.answer("Выгружаю историю игр...")
+    path = os.path.join(tempfile.mkdtemp(), f"stockknow-{datetime.utcnow():%Y%m%d-%H%M}.{fmt}")
+    try:
+        report = await history_export.export(db, path, fmt, since)
+        if os.path.getsize(path) > EXPORT_MAX_DOCUMENT:
+            await message.answer(f"{report.summary()}\nФайл больше 50 МБ — выгрузите его из консоли: "
+                                 f"python -m database.export")
+            return
+        await message.answer_document(FSInputFile(path), caption=report.summary())
+    except RuntimeError as e:
+        await message.answer(str(e))
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+        os.rmdir(os.path.dirname(path))
+
+# Какие вопросы банка слишком лёгкие и слишком сложные
+@router.message(Command("qstats"))
+async def cmd_question_stats(message: Message, repo: Repository):
+    if message.from_user.id != ADMIN_ID:
+        return
+    easiest, hardest = await repo.get_question_extremes()
+    if not easiest:
+        await message.answer("Статистики по вопросам пока нет: она копится по мере сыгранных раундов.")
+        return
+    
+    def lines(rows):
+        return "\n".join(
+            f"• {row.question[:60]} — ошибка {row.difficulty:.0%}, "
+            f"у победителя {row.winner_margin:.0%}, сыгран {row.played} раз" if row.winner_margin is not None else
+            f"• {row.question[:60]} — ошибка {row.difficulty:.0%}, сыгран {row.played} раз"
+            for row in rows
+        )
+    
+    # Без Markdown: в тексте вопросов могут быть любые символы
+    await message.answer(f"📊 Самые лёгкие вопросы:\n{lines(easiest)}\n\n📊 Самые сложные вопросы:\n{lines(hardest)}")
+
 # Остальные хендлеры (подсказки, ответы, победитель) — как в твоём текущем коде
-@router.callback_query(F.data.startswith("admin_hint"), F.from_user.id == ADMIN_ID)
-async def admin_set_hint(callback: CallbackQuery, state: FSMContext, db: Database):
+@router.callback_query(F.data.startswith("admin_hint"), IsHost())
+async def admin_set_hint(callback: CallbackQuery, state: FSMContext, repo: Repository):
     _, hint_type, round_id = callback.data.split("_")
     
     hint_num = int(hint_type[-1])  # 1, 2 или 3
@@ -115,10 +305,29 @@ async def admin_set_hint(callback: CallbackQuery, state: FSMContext, db: Databas
         parse_mode="Markdown"
     )
 
-@router.message(StateFilter(AdminStates.waiting_hint1, AdminStates.waiting_hint2, AdminStates.waiting_hint3), F.from_user.id == ADMIN_ID)
-async def receive_admin_hint(message: Message, state: FSMContext, db: Database, bot: Bot):
-    state_data = await state.get_data()
-    round_id = state_data.get("current_round_id", 1)
+@router.callback_query(F.data.startswith("admin_autohint_"), IsHost())
+async def admin_toggle_auto_hints(callback: CallbackQuery, repo: Repository, hint_scheduler: HintScheduler,
+                                  room: Room):
+    _, _, action, round_id = callback.data.split("_")
+    round_id = int(round_id)
+    if room.round_id != round_id:
+        await callback.answer("Раунд уже закрыт")
+        return
+    
+    if action == "pause":
+        await hint_scheduler.pause(round_id)
+        await callback.answer("Автоподсказки на паузе")
+    else:
+        await hint_scheduler.resume(round_id)
+        await callback.answer("Автоподсказки продолжатся")
+    await callback.message.edit_reply_markup(
+        reply_markup=get_round_control_keyboard(round_id, hint_scheduler.is_running(round_id))
+    )
+
+@router.message(StateFilter(AdminStates.waiting_hint1, AdminStates.waiting_hint2, AdminStates.waiting_hint3), IsHost())
+async def receive_admin_hint(message: Message, state: FSMContext, repo: Repository, broadcaster: Broadcaster,
+                             hint_scheduler: HintScheduler, room: Room):
+    round_id = room.round_id
     current_state = await state.get_state()
     
     if not round_id:
@@ -133,20 +342,28 @@ async def receive_admin_hint(message: Message, state: FSMContext, db: Database,
     else:
         hint_num = 3
     
-    await db.set_hint(round_id, hint_num, message.text)
+    # Под замком комнаты: автоподсказка не займёт тот же номер одновременно.
+    # Если номер уже заняла автоподсказка — берём следующий свободный
+    async with room.lock:
+        round_obj = await repo.get_round(round_id)
+        free = [n for n in range(1, 4) if not getattr(round_obj, f"hint{n}")] if round_obj else []
+        hint_num = next((n for n in free if n >= hint_num), free[0] if free else None)
+        if hint_num is not None:
+            await repo.set_hint(round_id, hint_num, message.text)
+            await repo.commit()
+    if hint_num is None:
+        await message.answer("Все три подсказки этого раунда уже отправлены.")
+        await state.clear()
+        return
+    await hint_scheduler.after_manual_hint(round_id)
     
-    ready_players = await db.get_ready_players()
-    for player in ready_players:
-        try:
-            await bot.send_message(
-                player.id,
-                f"💡 **Подсказка {hint_num}/3**\n\n{message.text}",
-                parse_mode="Markdown"
-            )
-        except:
-            pass
+    result = await broadcaster.send_message(
+        list(room.players),
+        PLAYER_HINT_BROADCAST.format(hint_num=hint_num, hint_text=message.text),
+        parse_mode="Markdown"
+    )
     
-    await message.answer(f"✅ Подсказка {hint_num} отправлена!")
+    await message.answer(f"✅ Подсказка {hint_num} отправлена!\n{result.summary()}")
     
     if hint_num < 3:
         next_state = getattr(AdminStates, f"waiting_hint{hint_num+1}")
@@ -154,4 +371,165 @@ async def receive_admin_hint(message: Message, state: FSMContext, db: Database,
     else:
         await state.clear()
 
-# ... (остальные хендлеры для показа ответов, выбора победителя, следующего раунда — они уже в твоём коде, добавь их, если нужно)
+async def get_room_round(repo: Repository, room: Room, round_id: int):
+    """Раунд, если он из игры этой комнаты: чужие раунды ведущему не видны"""
+    round_obj = await repo.get_round(round_id) if round_id else None
+    return round_obj if round_obj and round_obj.game_id == room.game_id else None
+
+def answers_text(view: RoundAnswers) -> str:
+    """Заголовок списка ответов: правильный ответ и кто ближе всех"""
+    # Имена и ответы игроков — без Markdown, чтобы их символы не ломали разметку
+    ranking, answers = view.ranking, view.answers
+    if ranking.suggested is not None:
+        return (f"📝 Ответы игроков ({len(answers)})\n\n🎯 Правильный ответ: {format_number(ranking.truth)}\n"
+                f"🏆 Ближе всех: {answers[0]['username']} — {answers[0]['answer']}\n\n"
+                "Подтвердите победителя или выберите другого:")
+    if ranking.is_tie:
+        tied = ", ".join(answers[i]["username"] for i in range(len(ranking.winners)))
+        return (f"📝 Ответы игроков ({len(answers)})\n\n🎯 Правильный ответ: {format_number(ranking.truth)}\n"
+                f"🤝 Ничья: {tied}\n\nВыберите победителя раунда:")
+    return f"📝 Ответы игроков ({len(answers)})\n\nВыберите победителя раунда:"
+
+async def show_answers_page(message: Message, view: RoundAnswers, page: int):
+    """Показать страницу ответов в том же сообщении"""
+    suggested = view.answers[0] if view.ranking.suggested is not None else None
+    await message.edit_text(
+        answers_text(view),
+        reply_markup=get_winner_selection_keyboard(view.answers, suggested, view.round_id, page)
+    )
+
+@router.callback_query(F.data.startswith("admin_show_answers_"), IsHost())
+async def admin_show_answers(callback: CallbackQuery, repo: Repository, room: Room):
+    round_id = int(callback.data.rsplit("_", 1)[1])
+    round_obj = await get_room_round(repo, room, round_id)
+    if not round_obj:
+        await callback.answer("Раунд не найден")
+        return
+    # Каждый показ читает ответы заново: могли прийти новые
+    view = await GameManager(repo, room).rank_round_answers(round_obj)
+    
+    if not view.answers:
+        await callback.answer("Ответов пока нет")
+        return
+    
+    await show_answers_page(callback.message, view, 0)
+
+@router.callback_query(F.data.startswith("admin_answers_"), IsHost())
+async def admin_answers_page(callback: CallbackQuery, repo: Repository, room: Room):
+    _, _, round_id, page = callback.data.split("_")
+    round_id, page = int(round_id), int(page)
+    view = room.answers
+    if view is None or view.round_id != round_id:
+        # После рестарта список в памяти потерян — собираем заново
+        round_obj = await get_room_round(repo, room, round_id)
+        if not round_obj:
+            await callback.answer("Раунд не найден")
+            return
+        view = await GameManager(repo, room).rank_round_answers(round_obj)
+    
+    try:
+        await show_answers_page(callback.message, view, page)
+    except TelegramBadRequest:
+        # Старая кнопка листалки на ту же страницу: сообщение не изменилось
+        pass
+    await callback.answer()
+
+@router.callback_query(F.data == "admin_noop")
+async def admin_noop(callback: CallbackQuery):
+    await callback.answer()
+
+async def finish_round(message: Message, round_number: int, text: str):
+    """Показать админу итог раунда и следующий шаг"""
+    if round_number < MAX_ROUNDS:
+        await message.edit_text(text, reply_markup=get_next_round_keyboard(round_number), parse_mode="Markdown")
+    else:
+        await message.edit_text(
+            text + "\n\nЭто был последний раунд.",
+            reply_markup=get_last_round_keyboard(),
+            parse_mode="Markdown"
+        )
+
+@router.callback_query(F.data.startswith("admin_select_winner_"), IsHost())
+async def admin_select_winner(callback: CallbackQuery, state: FSMContext, repo: Repository, broadcaster: Broadcaster,
+                              answer_tracker: AnswerTracker, hint_scheduler: HintScheduler, room: Room):
+    answer_id = int(callback.data.rsplit("_", 1)[1])
+    answer = await repo.get_answer(answer_id)
+    round_obj = await get_room_round(repo, room, answer.round_id) if answer else None
+    if not round_obj:
+        await callback.answer("Ответ не найден")
+        return
+    
+    paid = await GameManager(repo, room).select_winner(round_obj.id, answer.user_id)
+    if paid is None:
+        await callback.answer("Раунд уже завершён")
+        return
+    answer_tracker.forget(round_obj.id)
+    hint_scheduler.cancel(round_obj.id)
+    await state.clear()
+    
+    # Имя — в Markdown-сообщениях: "_" из ника иначе сломал бы рассылку всем игрокам
+    username = escape_markdown(answer.username or answer.first_name)
+    standings = await repo.get_standings(room.game_id)
+    await repo.commit()
+    result = await broadcaster.send_message(
+        list(room.players),
+        PLAYER_WINNER_ANNOUNCEMENT.format(round_num=round_obj.round_number, username=username, bank=paid),
+        parse_mode="Markdown"
+    )
+    
+    await finish_round(
+        callback.message, round_obj.round_number,
+        ADMIN_ROUND_COMPLETED.format(round_num=round_obj.round_number, username=username) + result.summary()
+        + "\n\n" + format_standings(standings)
+    )
+
+@router.callback_query(or_f(F.data == "admin_no_winner", F.data.startswith("admin_skip_round_")),
+                       IsHost())
+async def admin_no_winner(callback: CallbackQuery, state: FSMContext, repo: Repository,
+                          answer_tracker: AnswerTracker, hint_scheduler: HintScheduler, room: Room):
+    if callback.data.startswith("admin_skip_round_"):
+        round_id = int(callback.data.rsplit("_", 1)[1])
+    else:
+        round_id = room.round_id
+    
+    round_obj = await get_room_round(repo, room, round_id)
+    if not round_obj:
+        await callback.answer("Раунд не найден")
+        return
+    
+    if await GameManager(repo, room).select_winner(round_obj.id, None) is None:
+        await callback.answer("Раунд уже завершён")
+        return
+    answer_tracker.forget(round_obj.id)
+    hint_scheduler.cancel(round_obj.id)
+    await state.clear()
+    standings = await repo.get_standings(room.game_id)
+    await finish_round(callback.message, round_obj.round_number,
+                       ADMIN_NO_WINNER + "\n\n" + format_standings(standings))
+
+@router.callback_query(F.data.startswith("admin_next_round_"), IsHost())
+async def admin_next_round(callback: CallbackQuery, state: FSMContext, repo: Repository, broadcaster: Broadcaster,
+                           answer_tracker: AnswerTracker, hint_scheduler: HintScheduler, room: Room):
+    round_number = int(callback.data.rsplit("_", 1)[1])
+    async with room.lock:
+        # Повторное нажатие той же кнопки не должно запустить ещё один раунд
+        if room.current_round != round_number:
+            await callback.answer("Раунд уже запущен")
+            return
+        await callback.message.edit_reply_markup(reply_markup=None)
+        await launch_round(callback.message, state, repo, broadcaster, answer_tracker, hint_scheduler,
+                           GameManager(repo, room))
+
+@router.callback_query(F.data == "admin_end_game", IsHost())
+async def admin_end_game(callback: CallbackQuery, state: FSMContext, repo: Repository, broadcaster: Broadcaster,
+                         room_registry: RoomRegistry, room: Room):
+    async with room.lock:
+        players = list(room.players)
+        standings = format_standings(await repo.get_standings(room.game_id))
+        await GameManager(repo, room).finish_game(room_registry)
+        await repo.commit()
+    await state.clear()
+    
+    result = await broadcaster.send_message(players, PLAYER_GAME_END + "\n" + standings, parse_mode="Markdown")
+    
+    await callback.message.edit_text(f"🏁 Игра завершена!\n{result.summary()}\n\n{standings}", parse_mode="Markdown")
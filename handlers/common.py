@@ -1,22 +1,47 @@
 from aiogram import Router, F
 from aiogram.types import Message
-from aiogram.filters import CommandStart
+from aiogram.filters import CommandStart, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from config import GAME_RULES
 from keyboards.player_kb import get_player_start_keyboard
-from database.db import Database
+from database.db import Repository
 from database.models import User
+from utils.game_logic import GameManager
+from utils.rooms import RoomRegistry
 
 router = Router()
 
 class PlayerStates(StatesGroup):
     waiting_for_ready = State()
 
+@router.message(CommandStart(deep_link=True, magic=F.args.regexp(r"^room_\d+$")))
+async def cmd_start_room(message: Message, command: CommandObject, state: FSMContext, repo: Repository,
+                         room_registry: RoomRegistry):
+    """Вход в комнату по ссылке ведущего"""
+    room = room_registry.get(int(command.args.split("_", 1)[1]))
+    if room is None:
+        await message.answer("Комната не найдена — игра уже закончилась. Попросите у ведущего новую ссылку.")
+        return
+    
+    await repo.get_or_create_user(
+        user_id=message.from_user.id,
+        username=message.from_user.username,
+        first_name=message.from_user.first_name or "Без имени"
+    )
+    await GameManager(repo, room).add_players(room_registry, [message.from_user.id])
+    await repo.commit()
+    await state.clear()
+    
+    await message.answer(
+        GAME_RULES + f"\n\n✅ Вы в комнате {room.game_id}. Ожидайте вопроса от ведущего.",
+        parse_mode="Markdown"
+    )
+
 @router.message(CommandStart())
-async def cmd_start(message: Message, state: FSMContext, db: Database):
+async def cmd_start(message: Message, state: FSMContext, repo: Repository):
     """Обработка команды /start"""
-    user = await db.get_or_create_user(
+    user = await repo.get_or_create_user(
         user_id=message.from_user.id,
         username=message.from_user.username,
         first_name=message.from_user.first_name or "Без имени"
@@ -38,9 +63,9 @@ async def cmd_start(message: Message, state: FSMContext, db: Database):
     await state.set_state(PlayerStates.waiting_for_ready)
 
 @router.message(F.text == "✅ Я готов играть!")
-async def player_ready(message: Message, state: FSMContext, db: Database):
+async def player_ready(message: Message, state: FSMContext, repo: Repository):
     """Игрок готов к игре"""
-    await db.set_user_ready(message.from_user.id, True)
+    await repo.set_user_ready(message.from_user.id, True)
     
     await message.answer(
         "✅ Отлично! Вы готовы к игре.\n"
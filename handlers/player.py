@@ -1,14 +1,21 @@
-from aiogram import Router, F
+from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from utils.messages import (
-    PLAYER_QUESTION_MESSAGE, PLAYER_ANSWER_ACCEPTED, 
-    PLAYER_HINT_MESSAGE, PLAYER_WINNER_ANNOUNCEMENT, PLAYER_GAME_END
+    PLAYER_QUESTION_MESSAGE, PLAYER_ANSWER_ACCEPTED, PLAYER_ANSWER_TEXT_ONLY, PLAYER_STAKE_CHOICE,
+    PLAYER_HINT_MESSAGE, PLAYER_WINNER_ANNOUNCEMENT, PLAYER_GAME_END, ADMIN_ALL_ANSWERED
 )
-from database.db import Database
-from utils.game_logic import GameManager
+from config import DELETE_ANSWER_DELAY
+from database.db import Repository
+from database.answer_writer import AnswerWriter
+from utils.answer_tracker import AnswerTracker
+from utils.deletion_scheduler import DeletionScheduler
+from utils.hint_scheduler import HintScheduler
+from keyboards.player_kb import get_stake_keyboard
+from utils.rooms import RoomRegistry
+from utils.stakes import ante_for_round
 
 router = Router()
 
@@ -16,73 +23,93 @@ class PlayerGameStates(StatesGroup):
     waiting_answer = State()
     waiting_hints = State()
 
-@router.message(StateFilter(PlayerGameStates.waiting_answer))
-async def receive_player_answer(message: Message, state: FSMContext, db: Database):
+@router.message(StateFilter(PlayerGameStates.waiting_answer), F.text)
+async def receive_player_answer(message: Message, state: FSMContext, bot: Bot, repo: Repository,
+                                answer_writer: AnswerWriter, answer_tracker: AnswerTracker,
+                                deletion_scheduler: DeletionScheduler, hint_scheduler: HintScheduler,
+                                room_registry: RoomRegistry):
     """Получить ответ игрока"""
-    # Сохраняем ответ в состоянии для передачи в БД
-    await state.update_data(answer=message.text)
-    
-    # Удаляем сообщение игрока через 2 секунды
-    asyncio.create_task(delete_message_after_delay(message, 2))
+    # Удаляем сообщение игрока через 2 секунды — ответ должен остаться тайной
+    deletion_scheduler.schedule(message.chat.id, message.message_id, DELETE_ANSWER_DELAY)
     
-    # Сохраняем в БД
-    data = await state.get_data()
-    current_round_id = data.get("current_round_id")
+    # Ответ идёт в открытый раунд комнаты игрока
+    room = room_registry.room_of(message.from_user.id)
+    current_round_id = room.round_id if room else None
     
     if current_round_id:
-        answer_obj = await db.submit_answer(
+        # Возвращается только после коммита пачки с этим ответом
+        await answer_writer.submit(
             user_id=message.from_user.id,
             round_id=current_round_id,
             answer=message.text
         )
         
         await message.answer(
-            PLAYER_ANSWER_ACCEPTED,
+            PLAYER_ANSWER_ACCEPTED + PLAYER_STAKE_CHOICE,
+            reply_markup=get_stake_keyboard(current_round_id, ante_for_round(room.current_round)),
             parse_mode="Markdown"
         )
         
-        # Проверяем, все ли ответили
-        game_manager = GameManager(db)
-        if await game_manager.all_players_answered(current_round_id):
-            # Уведомляем админа
-            admin_message = await bot.send_message(
-                ADMIN_ID,
-                "📝 **Все ответы получены!**\n\nТеперь доступно управление раундом.",
-                parse_mode="Markdown"
-            )
+        # Проверяем, все ли ответили — уведомление уходит админу один раз
+        if await answer_tracker.record(repo, current_round_id, message.from_user.id):
+            await bot.send_message(room.host_id, ADMIN_ALL_ANSWERED, parse_mode="Markdown")
+            await hint_scheduler.hurry(current_round_id)
     
     await state.set_state(PlayerGameStates.waiting_hints)
 
-async def delete_message_after_delay(message, delay: int):
-    """Удалить сообщение через указанное время"""
-    await asyncio.sleep(delay)
-    try:
-        await message.delete()
-    except:
-        pass
+@router.message(StateFilter(PlayerGameStates.waiting_answer))
+async def ask_text_answer(message: Message):
+    """Стикер, фото или голосовое — не ответ: ответ должен быть текстом"""
+    await message.answer(PLAYER_ANSWER_TEXT_ONLY)
 
 @router.message(StateFilter(PlayerGameStates.waiting_hints))
 async def ignore_messages_during_hints(message: Message):
     """Игнорируем сообщения во время подсказок"""
     pass
 
+@router.callback_query(F.data.startswith("stake_"))
+async def player_stake(callback: CallbackQuery, repo: Repository, room_registry: RoomRegistry):
+    """Повысить ставку, оставить её или спасовать"""
+    _, action, round_id = callback.data.split("_")
+    round_id = int(round_id)
+    user_id = callback.from_user.id
+    
+    room = room_registry.room_of(user_id)
+    if room is None or room.round_id != round_id:
+        await callback.answer("Раунд уже закрыт")
+        await callback.message.edit_reply_markup(reply_markup=None)
+        return
+    
+    if action == "raise":
+        amount = ante_for_round(room.current_round)
+        balance = await repo.place_bet(round_id, room.game_id, user_id, amount)
+        if balance is None:
+            await callback.answer("Повысить нельзя: не хватает фишек или вы спасовали", show_alert=True)
+        else:
+            await callback.answer(f"Ставка повышена на {amount} 🪙. Осталось: {balance} 🪙")
+    elif action == "hold":
+        await callback.message.edit_reply_markup(reply_markup=None)
+        await callback.answer("Ставка остаётся прежней")
+    else:
+        await repo.fold(round_id, user_id)
+        await callback.message.edit_reply_markup(reply_markup=None)
+        await callback.answer("Вы спасовали в этом раунде")
+
 @router.callback_query(F.data.startswith("hint_"))
-async def show_hint_to_player(callback: CallbackQuery, state: FSMContext, db: Database):
+async def show_hint_to_player(callback: CallbackQuery, state: FSMContext, repo: Repository):
     """Показать подсказку игроку"""
     _, hint_num, round_id = callback.data.split("_")
     hint_num = int(hint_num)
     
     # Получаем подсказку из БД
-    cursor = await db.db.execute(
-        f"SELECT hint{hint_num} FROM rounds WHERE id = ?", (round_id,)
-    )
-    row = await cursor.fetchone()
+    round_obj = await repo.get_round(int(round_id))
+    hint_text = getattr(round_obj, f"hint{hint_num}", None) if round_obj else None
     
-    if row and row[0]:
+    if hint_text:
         await callback.message.edit_text(
             PLAYER_HINT_MESSAGE.format(
                 hint_num=hint_num,
-                hint_text=row[0]
+                hint_text=hint_text
             ),
             parse_mode="Markdown"
         )
@@ -1,16 +1,29 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Sequence
+from config import MAX_ROUNDS
+from utils.ranking import format_number
 
+# Сколько ответов на одной странице выбора победителя: Telegram ограничивает число кнопок
+ANSWERS_PAGE_SIZE = 8
+# Длина ответа и имени на кнопке, остальное обрезается
+BUTTON_ANSWER_LENGTH = 32
+BUTTON_NAME_LENGTH = 20
+
+# Статичные клавиатуры не меняются между вызовами — собираем один раз и отдаём готовый объект.
+# Клавиатуры с id раунда собираются заново: кеш по id только копил бы сыгранные раунды
+
+@lru_cache(maxsize=1)
 def get_admin_start_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для админа в начале"""
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🎮 Начать игру (7 раундов)", callback_data="admin_start_game")]
+        [InlineKeyboardButton(text=f"🎮 Начать игру ({MAX_ROUNDS} раундов)", callback_data="admin_start_game")]
     ])
     return keyboard
 
-def get_round_control_keyboard(round_id: int) -> InlineKeyboardMarkup:
-    """Клавиатура управления раундом"""
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+def get_round_control_keyboard(round_id: int, auto_hints: Optional[bool] = None) -> InlineKeyboardMarkup:
+    """Клавиатура управления раундом; auto_hints — идут ли автоподсказки (None — выключены совсем)"""
+    inline_keyboard = [
         [
             InlineKeyboardButton(text="💡 Подсказка 1", callback_data=f"admin_hint1_{round_id}"),
             InlineKeyboardButton(text="💡 Подсказка 2", callback_data=f"admin_hint2_{round_id}")
@@ -20,34 +33,76 @@ def get_round_control_keyboard(round_id: int) -> InlineKeyboardMarkup:
             InlineKeyboardButton(text="📝 Показать ответы", callback_data=f"admin_show_answers_{round_id}")
         ],
         [InlineKeyboardButton(text="⏭️ Пропустить раунд", callback_data=f"admin_skip_round_{round_id}")]
-    ])
-    return keyboard
+    ]
+    if auto_hints is not None:
+        inline_keyboard.insert(2, [
+            InlineKeyboardButton(text="⏸ Пауза автоподсказок", callback_data=f"admin_autohint_pause_{round_id}")
+            if auto_hints else
+            InlineKeyboardButton(text="▶️ Продолжить автоподсказки", callback_data=f"admin_autohint_resume_{round_id}")
+        ])
+    return InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
 
-def get_next_round_keyboard(game_id: int) -> InlineKeyboardMarkup:
+@lru_cache(maxsize=MAX_ROUNDS + 1)
+def get_next_round_keyboard(round_number: int) -> InlineKeyboardMarkup:
     """Клавиатура после раунда"""
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [
             InlineKeyboardButton(
-                text=f"▶️ Начать раунд {game_id + 1}/7", 
-                callback_data=f"admin_next_round_{game_id}"
+                text=f"▶️ Начать раунд {round_number + 1}/{MAX_ROUNDS}",
+                callback_data=f"admin_next_round_{round_number}"
             )
         ],
         [InlineKeyboardButton(text="🏁 Завершить игру", callback_data="admin_end_game")]
     ])
     return keyboard
 
-def get_winner_selection_keyboard(answers: list) -> InlineKeyboardMarkup:
-    """Клавиатура выбора победителя"""
+@lru_cache(maxsize=1)
+def get_last_round_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура после последнего раунда"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🏁 Завершить игру", callback_data="admin_end_game")]
+    ])
+
+def _shorten(text: Optional[str], limit: int) -> str:
+    # Ответ без текста хранится в базе как NULL
+    text = text or ""
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+def _answer_button(answer: dict, prefix: str = "👑") -> InlineKeyboardButton:
+    username = _shorten(answer.get('username') or f"Игрок {answer['user_id']}", BUTTON_NAME_LENGTH)
+    text = f"{prefix} {username}: {_shorten(answer['answer'], BUTTON_ANSWER_LENGTH)}"
+    if answer.get('distance') is not None:
+        text += f" (±{format_number(answer['distance'])})"
+    # В callback_data только id ответа: имя и текст берутся из базы при выборе
+    return InlineKeyboardButton(text=text, callback_data=f"admin_select_winner_{answer['id']}")
+
+def get_winner_selection_keyboard(answers: Sequence[dict], suggested: Optional[dict] = None,
+                                  round_id: Optional[int] = None, page: int = 0,
+                                  page_size: int = ANSWERS_PAGE_SIZE) -> InlineKeyboardMarkup:
+    """Клавиатура выбора победителя: одна страница ответов и листалка.
+
+    answers — уже отсортированный список всех ответов; на кнопки идёт только срез
+    страницы, так что стоимость не зависит от числа ответов. suggested — ближайший
+    ответ, на первой странице его можно подтвердить одной кнопкой.
+    """
+    pages = max(1, -(-len(answers) // page_size))
+    page = min(max(page, 0), pages - 1)
     inline_keyboard = []
-    
-    for answer in answers:
-        username = answer.get('username', f"Игрок {answer['user_id']}")
-        callback_data = f"admin_select_winner_{answer['id']}"
-        button = InlineKeyboardButton(
-            text=f"👑 {username}: {answer['answer']}", 
-            callback_data=callback_data
-        )
-        inline_keyboard.append([button])
-    
+
+    if suggested is not None and page == 0:
+        inline_keyboard.append([_answer_button(suggested, prefix="✅ Подтвердить:")])
+
+    for answer in answers[page * page_size:(page + 1) * page_size]:
+        inline_keyboard.append([_answer_button(answer)])
+
+    if pages > 1 and round_id is not None:
+        navigation = []
+        if page > 0:
+            navigation.append(InlineKeyboardButton(text="◀️", callback_data=f"admin_answers_{round_id}_{page - 1}"))
+        navigation.append(InlineKeyboardButton(text=f"{page + 1}/{pages}", callback_data="admin_noop"))
+        if page < pages - 1:
+            navigation.append(InlineKeyboardButton(text="▶️", callback_data=f"admin_answers_{round_id}_{page + 1}"))
+        inline_keyboard.append(navigation)
+
     inline_keyboard.append([InlineKeyboardButton(text="❌ Без победителя", callback_data="admin_no_winner")])
-    return InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
\ No newline at end of file
+    return InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
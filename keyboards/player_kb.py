@@ -1,5 +1,7 @@
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
+from functools import lru_cache
 
+@lru_cache(maxsize=1)
 def get_player_start_keyboard() -> ReplyKeyboardMarkup:
     """Клавиатура для игрока в начале"""
     keyboard = ReplyKeyboardMarkup(
@@ -7,4 +9,14 @@ def get_player_start_keyboard() -> ReplyKeyboardMarkup:
         resize_keyboard=True,
         one_time_keyboard=True
     )
-    return keyboard
\ No newline at end of file
+    return keyboard
+
+def get_stake_keyboard(round_id: int, raise_amount: int) -> InlineKeyboardMarkup:
+    """Решение игрока после ответа: повысить, оставить или пас"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=f"⬆️ Повысить (+{raise_amount})", callback_data=f"stake_raise_{round_id}")],
+        [
+            InlineKeyboardButton(text="✋ Оставить", callback_data=f"stake_hold_{round_id}"),
+            InlineKeyboardButton(text="🏳️ Пас", callback_data=f"stake_fold_{round_id}")
+        ]
+    ])
@@ -1,48 +1,193 @@
 import asyncio
 import logging
+import secrets
+import signal
+from contextlib import suppress
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 
-from config import BOT_TOKEN, ADMIN_ID
+from config import (
+    BOT_TOKEN, ADMIN_ID, BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT,
+    TELEGRAM_API_URL, METRICS_HOST, METRICS_PORT, RECORD_UPDATES, RECORD_SALT
+)
 from handlers import common, admin, player
 from database.db import Database
+from database.answer_writer import AnswerWriter
+from database.fsm_storage import SQLAlchemyStorage
+from middlewares.db import CommitBeforeRequestMiddleware, DbSessionMiddleware
+from middlewares.metrics import ApiMetricsMiddleware, HandlerMetricsMiddleware
+from middlewares.recorder import UpdateRecorderMiddleware
+from middlewares.throttling import ThrottlingMiddleware
+from utils.broadcast import Broadcaster
+from utils.answer_tracker import AnswerTracker
+from utils.archiver import GameArchiver
+from utils.deletion_scheduler import DeletionScheduler
+from utils.hint_scheduler import HintScheduler
+from utils.metrics import REGISTRY, MetricsServer
+from utils.profiler import SamplingProfiler
+from utils.rooms import RoomRegistry
+from utils.update_log import UpdateLog
 
 logging.basicConfig(level=logging.INFO)
 
 # Глобальная переменная с базой (самый простой и надёжный способ)
 db = None
 
-async def main():
-    global db
-    
-    print("Запускаем бота...")
-    
-    bot = Bot(token=BOT_TOKEN)
-    storage = MemoryStorage()
+
+async def on_startup(db: Database, answer_writer: AnswerWriter, deletion_scheduler: DeletionScheduler,
+                     hint_scheduler: HintScheduler, game_archiver: GameArchiver, room_registry: RoomRegistry,
+                     metrics_server: MetricsServer, update_log: UpdateLog):
+    # Комнаты идущих игр переживают рестарт
+    async with db.transaction() as repo:
+        await room_registry.load(repo, default_host_id=ADMIN_ID)
+    await answer_writer.start()
+    await deletion_scheduler.start()
+    # Таймеры подсказок — после комнат: подсказка уходит игрокам комнаты
+    await hint_scheduler.start()
+    await game_archiver.start()
+    if db.questions is not None:
+        await db.questions.start(db)
+    await metrics_server.start()
+    await update_log.start()
+
+
+async def on_shutdown(db: Database, answer_writer: AnswerWriter, deletion_scheduler: DeletionScheduler,
+                      hint_scheduler: HintScheduler, game_archiver: GameArchiver, metrics_server: MetricsServer,
+                      update_log: UpdateLog):
+    await update_log.close()
+    await metrics_server.close()
+    if db.questions is not None:
+        await db.questions.close()
+    await game_archiver.close()
+    await hint_scheduler.close()
+    await answer_writer.close()
+    await deletion_scheduler.close()
+
+
+def create_dispatcher(bot: Bot, db: Database) -> Dispatcher:
+    """Собрать диспетчер со всеми роутерами и зависимостями"""
+    # Состояния переживают рестарт бота: игроки посреди раунда не теряют контекст
+    storage = SQLAlchemyStorage(db)
     dp = Dispatcher(storage=storage)
-    
-    # Подключаемся к базе
-    db = Database()
-    await db.__aenter__()
-    print("Подключено к PostgreSQL ✅")
-    
+    dp["db"] = db
+    dp["broadcaster"] = Broadcaster(bot)
+    dp["room_registry"] = RoomRegistry()
+    dp["answer_tracker"] = AnswerTracker()
+    dp["answer_writer"] = AnswerWriter(db)
+    dp["deletion_scheduler"] = DeletionScheduler(db, dp["broadcaster"])
+    dp["hint_scheduler"] = HintScheduler(db, dp["broadcaster"], dp["room_registry"])
+    dp["game_archiver"] = GameArchiver(db)
+    dp["metrics_server"] = MetricsServer(METRICS_HOST, METRICS_PORT)
+    dp["update_log"] = UpdateLog(RECORD_UPDATES, RECORD_SALT, ADMIN_ID)
+    dp["profiler"] = SamplingProfiler()
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+
     # Регистрируем роутеры
     dp.include_router(common.router)
     dp.include_router(admin.router)
     dp.include_router(player.router)
-    
-    # Вшиваем базу в каждый роутер через dependency (aiogram 3.x так любит)
-    common.router.message.outer_middleware()(lambda handler, event, data: data.update(db=db) or handler(event, data))
-    common.router.callback_query.outer_middleware()(lambda handler, event, data: data.update(db=db) or handler(event, data))
-    admin.router.message.outer_middleware()(lambda handler, event, data: data.update(db=db) or handler(event, data))
-    admin.router.callback_query.outer_middleware()(lambda handler, event, data: data.update(db=db) or handler(event, data))
-    player.router.message.outer_middleware()(lambda handler, event, data: data.update(db=db) or handler(event, data))
-    player.router.callback_query.outer_middleware()(lambda handler, event, data: data.update(db=db) or handler(event, data))
-    
+
+    # FSMContextMiddleware диспетчер вешает сам; запись и антиспам должны стоять перед ним,
+    # поэтому он снимается и возвращается следом
+    dp.update.outer_middleware.unregister(dp.fsm)
+    # Запись апдейтов для повтора — снаружи всего остального, чтобы в лог попадали и упавшие и отброшенные апдейты
+    if dp["update_log"].enabled:
+        dp.update.outer_middleware(UpdateRecorderMiddleware(dp["update_log"]))
+    # Флуд отбрасывается до чтения состояния и до сессии базы
+    dp["throttle"] = ThrottlingMiddleware(dp["room_registry"])
+    dp.update.outer_middleware(dp["throttle"])
+    dp.update.outer_middleware(dp.fsm)
+
+    # Одна сессия и транзакция базы на каждый апдейт, обработчики получают repo;
+    # записанное обработчиком коммитится до его запросов к Bot API
+    dp.update.outer_middleware(DbSessionMiddleware(db))
+    bot.session.middleware(CommitBeforeRequestMiddleware())
+
+    # Метрики: время обработчиков, запросы к Bot API и размеры очередей (SQL меряют хуки движка)
+    handler_metrics = HandlerMetricsMiddleware()
+    dp.message.middleware(handler_metrics)
+    dp.callback_query.middleware(handler_metrics)
+    bot.session.middleware(ApiMetricsMiddleware())
+    REGISTRY.gauge("bot_rooms", "Идущие игры", lambda: len(dp["room_registry"]))
+    REGISTRY.gauge("bot_answer_queue", "Ответы, ждущие записи в базу", lambda: dp["answer_writer"].pending)
+    REGISTRY.gauge("bot_pending_deletions", "Сообщения, ждущие удаления", lambda: dp["deletion_scheduler"].pending)
+    REGISTRY.gauge("bot_user_cache_size", "Пользователи в кеше", lambda: len(db.users))
+    return dp
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """Принимать апдейты через webhook до SIGTERM/SIGINT.
+
+    Остановка — как у polling: webhook перестаёт принимать апдейты, воркеры
+    дорабатывают принятые, затем on_shutdown сбрасывает в базу ответы и FSM.
+    """
+    # aiohttp.web нужен только webhook-режиму — в polling его не импортируем
+    from aiohttp import web
+    from utils.webhook import create_webhook_app
+
+    if not WEBHOOK_URL:
+        raise RuntimeError("Для BOT_MODE=webhook нужен WEBHOOK_URL")
+    secret = WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    app = create_webhook_app(bot, dp, WEBHOOK_PATH, secret)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        # На Windows сигналы в цикле событий не поддерживаются
+        with suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop.set)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        await bot.set_webhook(
+            WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+            secret_token=secret,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        print(f"Webhook слушает {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+        await stop.wait()
+        print("Останавливаем webhook...")
+    finally:
+        # Порядок остановки задан в create_webhook_app: апдейты, потом dp.emit_shutdown
+        await runner.cleanup()
+        await bot.session.close()
+
+
+async def main():
+    global db
+
+    print("Запускаем бота...")
+
+    if TELEGRAM_API_URL:
+        bot = Bot(token=BOT_TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)))
+    else:
+        bot = Bot(token=BOT_TOKEN)
+
+    # Подключаемся к базе; запросы к Bot API, нужные до первого апдейта, идут параллельно
+    db = Database()
+    startup = [db.__aenter__(), bot.me()]
+    if BOT_MODE != "webhook":
+        # Переход обратно на polling: Telegram не отдаёт getUpdates, пока стоит webhook
+        startup.append(bot.delete_webhook())
+    await asyncio.gather(*startup)
+    print("Подключено к PostgreSQL ✅")
+
+    dp = create_dispatcher(bot, db)
+
     print("Bot Stock & Know запущен!")
     print(f"Админ ID: {ADMIN_ID}")
-    
-    await dp.start_polling(bot)
+
+    try:
+        if BOT_MODE == "webhook":
+            await run_webhook(bot, dp)
+        else:
+            await dp.start_polling(bot)
+    finally:
+        await db.__aexit__(None, None, None)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import Update
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import stats
+from database.db import Database, Repository
+
+logger = logging.getLogger(__name__)
+
+# Сессия апдейта и задача, которая её ведёт
+_update_session: ContextVar[Optional[Tuple[AsyncSession, asyncio.Task]]] = ContextVar("update_session", default=None)
+
+
+# Была ли в транзакции запись: в SQLite с первой записи до коммита база заблокирована на запись
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["writes"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info["writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_writes(session):
+    session.info.pop("writes", None)
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Одна сессия и одна транзакция на апдейт.
+
+    Обработчики получают repo: Repository, привязанный к этой сессии.
+    В конце апдейта — коммит, при ошибке — откат. Если обработчик уже
+    что-то записал и идёт в Bot API, записанное коммитится перед запросом
+    (CommitBeforeRequestMiddleware): блокировка базы не ждёт сети.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        with stats.collect() as query_stats:
+            async with self.db.session_factory() as session:
+                data["repo"] = Repository(session, self.db.users, self.db.difficulty, self.db.questions)
+                data["query_stats"] = query_stats
+                token = _update_session.set((session, asyncio.current_task()))
+                try:
+                    result = await handler(event, data)
+                except Exception:
+                    await session.rollback()
+                    raise
+                finally:
+                    _update_session.reset(token)
+                await session.commit()
+
+        logger.debug("Update %s: %s запросов, %.1f мс в базе",
+                     event.update_id, query_stats.statements, query_stats.seconds * 1000)
+        return result
+
+
+class CommitBeforeRequestMiddleware(BaseRequestMiddleware):
+    """Запрос к Bot API из обработчика: сначала коммит того, что он записал.
+
+    Иначе ответ игроку (сетевой запрос) шёл бы с открытой пишущей транзакцией,
+    и в SQLite все остальные писатели ждали бы его в busy_timeout. Задачи,
+    порождённые обработчиком (рассылки), сессию не трогают — она не их.
+    """
+
+    async def __call__(self, make_request, bot, method):
+        current = _update_session.get()
+        if current is not None:
+            session, task = current
+            if task is asyncio.current_task() and session.info.get("writes"):
+                await session.commit()
+        return await make_request(bot, method)
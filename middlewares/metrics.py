@@ -0,0 +1,88 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError, TelegramRetryAfter
+)
+from aiogram.types import TelegramObject
+
+from utils.metrics import REGISTRY
+
+HANDLER_SECONDS = REGISTRY.histogram("bot_handler_seconds", "Время обработчика апдейта", ("handler",))
+HANDLER_ERRORS = REGISTRY.counter("bot_handler_errors_total", "Обработчик завершился исключением", ("handler",))
+API_SECONDS = REGISTRY.histogram("bot_api_request_seconds", "Запросы к Bot API по методу и исходу",
+                                 ("method", "outcome"))
+
+# Исход запроса к Bot API по классу исключения; остальные ошибки — "error"
+_OUTCOMES = (
+    (TelegramRetryAfter, "retry_after"),
+    (TelegramForbiddenError, "forbidden"),
+    (TelegramBadRequest, "bad_request"),
+    (TelegramNetworkError, "network"),
+    (asyncio.CancelledError, "cancelled"),
+)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Время каждого обработчика — гистограмма с меткой handler (модуль.функция).
+
+    Вешается внутренней мидлварью на наблюдатели диспетчера, поэтому видит,
+    какой обработчик выбран. Серии заводятся один раз на обработчик.
+    """
+
+    def __init__(self):
+        self._series: Dict[Callable, tuple] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        callback = data["handler"].callback
+        series = self._series.get(callback)
+        if series is None:
+            name = f"{callback.__module__}.{callback.__qualname__}"
+            series = self._series[callback] = (HANDLER_SECONDS.labels(name), HANDLER_ERRORS.labels(name))
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            series[1].inc()
+            raise
+        finally:
+            series[0].observe(time.perf_counter() - started)
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Каждый запрос к Bot API (и рассылки, и ответы обработчиков): метод, исход и время"""
+
+    def __init__(self):
+        self._series: Dict[type, Dict[str, Any]] = {}
+
+    async def __call__(self, make_request, bot, method):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await make_request(bot, method)
+        except BaseException as error:
+            outcome = _outcome(error)
+            raise
+        finally:
+            by_outcome = self._series.get(type(method))
+            if by_outcome is None:
+                by_outcome = self._series[type(method)] = {}
+            series = by_outcome.get(outcome)
+            if series is None:
+                series = by_outcome[outcome] = API_SECONDS.labels(method.__api_method__, outcome)
+            series.observe(time.perf_counter() - started)
+
+
+def _outcome(error: BaseException) -> str:
+    for kind, outcome in _OUTCOMES:
+        if isinstance(error, kind):
+            return outcome
+    return "error"
@@ -0,0 +1,26 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from utils.update_log import UpdateLog
+
+
+class UpdateRecorderMiddleware(BaseMiddleware):
+    """Каждый входящий апдейт — в лог для повтора (RECORD_UPDATES).
+
+    Вешается первой внешней мидлварью: апдейт попадает в лог, даже если
+    обработка потом упала. Сам апдейт только кладётся в очередь лога.
+    """
+
+    def __init__(self, update_log: UpdateLog):
+        self.update_log = update_log
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        self.update_log.append(event)
+        return await handler(event, data)
@@ -0,0 +1,109 @@
+import time
+from array import array
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+from config import (
+    ADMIN_ID, THROTTLE_SLOTS, THROTTLE_DUPLICATE_WINDOW,
+    THROTTLE_MESSAGE_RATE, THROTTLE_MESSAGE_BURST, THROTTLE_CALLBACK_RATE, THROTTLE_CALLBACK_BURST,
+    THROTTLE_HOST_RATE, THROTTLE_HOST_BURST
+)
+from utils.metrics import REGISTRY
+from utils.rooms import RoomRegistry
+
+THROTTLED = REGISTRY.counter("bot_throttled_total", "Апдейты, отброшенные антиспамом", ("policy", "reason"))
+
+
+class TokenBuckets:
+    """Корзины токенов пользователей в массивах фиксированного размера.
+
+    Ячейка — user_id % slots; если в ней чужой пользователь, корзина
+    заводится заново и полной. Коллизия поэтому только прощает флуд, но
+    никогда не режет честного игрока, а память не растёт с числом игроков.
+    Рядом с корзиной хранится хеш последнего пропущенного события: тот же
+    текст или та же кнопка в пределах duplicate_window схлопываются.
+    """
+
+    def __init__(self, rate: float, burst: float, slots: int = THROTTLE_SLOTS,
+                 duplicate_window: float = THROTTLE_DUPLICATE_WINDOW):
+        self.rate = rate
+        self.burst = burst
+        self.slots = slots
+        self.duplicate_window = duplicate_window
+        self._users = array("q", bytes(8 * slots))
+        self._tokens = array("d", bytes(8 * slots))
+        self._updated = array("d", bytes(8 * slots))
+        self._last_key = array("q", bytes(8 * slots))
+        self._last_seen = array("d", bytes(8 * slots))
+
+    def take(self, user_id: int, key: int, now: float) -> Optional[str]:
+        """None — пропустить; иначе причина отказа: "duplicate" или "rate" """
+        i = user_id % self.slots
+        if self._users[i] != user_id:
+            self._users[i] = user_id
+            tokens = self.burst
+            self._last_seen[i] = 0.0
+        else:
+            if self._last_key[i] == key and now - self._last_seen[i] < self.duplicate_window:
+                return "duplicate"
+            tokens = min(self.burst, self._tokens[i] + (now - self._updated[i]) * self.rate)
+        self._updated[i] = now
+        if tokens < 1:
+            self._tokens[i] = tokens
+            return "rate"
+        self._tokens[i] = tokens - 1
+        self._last_key[i] = key
+        self._last_seen[i] = now
+        return None
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Антиспам до FSM и базы: флуд отбрасывается раньше, чем читается состояние.
+
+    Вешается внешней мидлварью на апдейты перед FSMContextMiddleware (см.
+    create_dispatcher). Три политики: сообщения игроков, кнопки игроков и
+    всё от админа и ведущих комнат. Политика с rate = 0 выключена.
+    Отброшенные апдейты не получают ответа — ни сообщения, ни answerCallbackQuery.
+    """
+
+    def __init__(self, room_registry: RoomRegistry):
+        self.room_registry = room_registry
+        self.policies = {
+            name: TokenBuckets(rate, burst) if rate > 0 else None
+            for name, rate, burst in (
+                ("message", THROTTLE_MESSAGE_RATE, THROTTLE_MESSAGE_BURST),
+                ("callback", THROTTLE_CALLBACK_RATE, THROTTLE_CALLBACK_BURST),
+                ("host", THROTTLE_HOST_RATE, THROTTLE_HOST_BURST),
+            )
+        }
+        self._dropped = {(name, reason): THROTTLED.labels(name, reason)
+                         for name in self.policies for reason in ("rate", "duplicate")}
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if event.message is not None:
+            policy, key = "message", event.message.text or event.message.caption
+        elif event.callback_query is not None:
+            policy, key = "callback", event.callback_query.data
+        else:
+            return await handler(event, data)
+        if user is None:
+            return await handler(event, data)
+        if user.id == ADMIN_ID or self.room_registry.hosted_by(user.id) is not None:
+            policy = "host"
+
+        buckets = self.policies[policy]
+        if buckets is not None:
+            # Сообщение без текста (стикер, фото) дубликатом не считается
+            reason = buckets.take(user.id, hash(key) if key else event.update_id, time.monotonic())
+            if reason is not None:
+                self._dropped[policy, reason].inc()
+                return None
+        return await handler(event, data)
@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+import pytest
+
+# config читает DATABASE_URL при импорте: тесты не должны трогать рабочую базу бота
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/tests.db"
+
+
+@pytest.fixture
+def database_url(tmp_path, monkeypatch):
+    """Свежая SQLite-база на тест: Database() после фикстуры открывает её"""
+    import database.db
+
+    url = f"sqlite:///{tmp_path}/bot.db"
+    monkeypatch.setattr(database.db, "DATABASE_URL", url)
+    return url
@@ -0,0 +1,79 @@
+import asyncio
+import itertools
+
+from aiogram.types import Update
+from sqlalchemy import func, select
+
+from benchmarks.fake_bot_api import FakeBotAPI
+from database.db import Database, Game, Question
+
+HOST_ID = 700
+_ids = itertools.count(1)
+
+
+def message(user_id: int, text: str) -> dict:
+    update_id = next(_ids)
+    return {"update_id": update_id, "message": {
+        "message_id": update_id, "date": 0, "chat": {"id": user_id, "type": "private"},
+        "from": {"id": user_id, "is_bot": False, "first_name": "Ведущий"}, "text": text,
+        "entities": [{"type": "bot_command", "offset": 0, "length": len(text)}] if text.startswith("/") else None,
+    }}
+
+
+def callback(user_id: int, data: str) -> dict:
+    update_id = next(_ids)
+    return {"update_id": update_id, "callback_query": {
+        "id": str(update_id), "chat_instance": "test", "data": data,
+        "from": {"id": user_id, "is_bot": False, "first_name": "Ведущий"},
+        "message": {"message_id": 1, "date": 0, "chat": {"id": user_id, "type": "private"}, "text": "…"},
+    }}
+
+
+async def with_dispatcher(scenario):
+    from main import create_dispatcher
+
+    api = FakeBotAPI(latency=0.01)
+    await api.start()
+    bot = api.make_bot()
+    try:
+        async with Database() as db:
+            async with db.transaction() as repo:
+                repo.session.add_all(Question(question=f"Вопрос {i}", answer=str(i)) for i in range(20))
+            dp = create_dispatcher(bot, db)
+            # Двойное нажатие здесь и проверяется: антиспам схлопнул бы его раньше обработчика
+            dp.update.outer_middleware.unregister(dp["throttle"])
+            await dp.emit_startup(bot=bot, **dp.workflow_data)
+
+            async def feed(*updates):
+                await asyncio.gather(*(dp.feed_update(bot, Update.model_validate(u, context={"bot": bot}))
+                                       for u in updates))
+
+            try:
+                await scenario(db, dp, feed)
+            finally:
+                await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+    finally:
+        await bot.session.close()
+        await api.stop()
+
+
+async def active_games(db: Database) -> int:
+    async with db.transaction() as repo:
+        return await repo.session.scalar(
+            select(func.count()).select_from(Game).where(Game.host_id == HOST_ID, Game.is_active == True)
+        )
+
+
+def test_double_presses_open_one_game(database_url):
+    # Роутеры обработчиков — модульные и цепляются к одному диспетчеру на процесс: один сценарий на файл
+    async def scenario(db, dp, feed):
+        await feed(message(HOST_ID, "/newroom"), message(HOST_ID, "/newroom"))
+        assert await active_games(db) == 1
+        room = dp["room_registry"].hosted_by(HOST_ID)
+
+        await feed(callback(HOST_ID, "admin_start_game"), callback(HOST_ID, "admin_start_game"))
+        assert dp["room_registry"].hosted_by(HOST_ID) is room
+        assert await active_games(db) == 1
+        assert room.current_round == 1
+
+    asyncio.run(with_dispatcher(scenario))
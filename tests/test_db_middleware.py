@@ -0,0 +1,49 @@
+import asyncio
+
+from aiogram import Dispatcher
+from aiogram.types import Update
+from sqlalchemy import select
+
+from benchmarks.fake_bot_api import FakeBotAPI
+from database.db import Database, Repository, User
+from middlewares.db import CommitBeforeRequestMiddleware, DbSessionMiddleware
+
+USER_ID = 42
+
+
+def test_writes_are_committed_before_bot_api_call(database_url):
+    async def scenario():
+        api = FakeBotAPI(latency=0)
+        await api.start()
+        bot = api.make_bot()
+        seen_ready = []
+        async with Database() as db:
+            async with db.transaction() as repo:
+                await repo.get_or_create_user(USER_ID, None, "Игрок")
+
+            async def probe(make_request, bot, method):
+                # Чужая сессия видит запись обработчика ещё до ответа Telegram
+                async with db.session_factory() as session:
+                    seen_ready.append(await session.scalar(select(User.is_ready).where(User.id == USER_ID)))
+                return await make_request(bot, method)
+
+            bot.session.middleware(CommitBeforeRequestMiddleware())
+            bot.session.middleware(probe)
+            dp = Dispatcher()
+            dp.update.outer_middleware(DbSessionMiddleware(db))
+
+            @dp.message()
+            async def ready(message, repo: Repository):
+                await repo.set_user_ready(USER_ID, True)
+                await message.answer("готов")
+                await message.answer("ещё раз")
+
+            await dp.feed_update(bot, Update.model_validate({"update_id": 1, "message": {
+                "message_id": 1, "date": 0, "text": "✅ Я готов играть!", "chat": {"id": USER_ID, "type": "private"},
+                "from": {"id": USER_ID, "is_bot": False, "first_name": "Игрок"},
+            }}, context={"bot": bot}))
+        await bot.session.close()
+        await api.stop()
+        assert seen_ready == [True, True]
+
+    asyncio.run(scenario())
@@ -0,0 +1,50 @@
+import asyncio
+
+from aiogram.fsm.storage.base import StorageKey
+
+from database.db import Database
+from database.fsm_storage import SQLAlchemyStorage
+
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+
+async def stored_state(db: Database, key: StorageKey):
+    return (await SQLAlchemyStorage(db)._load(SQLAlchemyStorage._key(key))).state
+
+
+def test_concurrent_misses_share_one_record(database_url):
+    async def scenario():
+        async with Database() as db:
+            storage = SQLAlchemyStorage(db, flush_interval=60)
+            # FSMContextMiddleware читает состояние, пока обработчик его уже меняет
+            await asyncio.gather(storage.set_state(KEY, "PlayerGameStates:waiting_answer"),
+                                 storage.get_state(KEY))
+            assert await storage.get_state(KEY) == "PlayerGameStates:waiting_answer"
+            await storage.close()
+            assert await stored_state(db, KEY) == "PlayerGameStates:waiting_answer"
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_writes_on_miss_keep_both(database_url):
+    async def scenario():
+        async with Database() as db:
+            storage = SQLAlchemyStorage(db, flush_interval=60)
+            await asyncio.gather(storage.set_state(KEY, "PlayerGameStates:waiting_answer"),
+                                 storage.set_data(KEY, {"round_id": 7}))
+            assert await storage.get_state(KEY) == "PlayerGameStates:waiting_answer"
+            assert await storage.get_data(KEY) == {"round_id": 7}
+            await storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_state_survives_restart(database_url):
+    async def scenario():
+        async with Database() as db:
+            storage = SQLAlchemyStorage(db, flush_interval=0)
+            await storage.set_state(KEY, "PlayerGameStates:waiting_hints")
+            await storage.close()
+            assert await SQLAlchemyStorage(db).get_state(KEY) == "PlayerGameStates:waiting_hints"
+
+    asyncio.run(scenario())
@@ -0,0 +1,63 @@
+import asyncio
+
+from sqlalchemy import select
+
+from database.db import Database, PlayerAnswer, Question, QuestionStat
+from keyboards.admin_kb import get_winner_selection_keyboard
+from utils.game_logic import GameManager
+from utils.rooms import RoomRegistry
+
+HOST_ID = 500
+PLAYERS = {1: "120", 2: None, 3: "90"}  # игрок 2 прислал стикер до фильтра F.text
+
+
+async def play_round(db: Database):
+    """Игра с одним раундом и ответами PLAYERS; возвращает комнату и раунд"""
+    async with db.transaction() as repo:
+        repo.session.add_all(Question(question=f"Вопрос {i}", answer="100") for i in range(10))
+    registry = RoomRegistry()
+    async with db.transaction() as repo:
+        for user_id in PLAYERS:
+            await repo.get_or_create_user(user_id, None, f"Игрок {user_id}")
+        manager = GameManager(repo)
+        room = await manager.start_new_game(registry, HOST_ID)
+        await manager.add_players(registry, PLAYERS)
+        round_obj = await manager.start_round("Вопрос")
+        repo.session.add_all(PlayerAnswer(user_id=user_id, round_id=round_obj.id, answer=answer)
+                             for user_id, answer in PLAYERS.items())
+    return room, round_obj
+
+
+def test_null_answer_is_ranked_last(database_url):
+    async def scenario():
+        async with Database() as db:
+            room, round_obj = await play_round(db)
+            async with db.transaction() as repo:
+                view = await GameManager(repo, room).rank_round_answers(round_obj)
+            assert [a["user_id"] for a in view.answers] == [3, 1, 2]
+            assert view.answers[-1]["distance"] is None
+            keyboard = get_winner_selection_keyboard(view.answers, view.answers[0], round_obj.id)
+            assert keyboard.inline_keyboard
+
+    asyncio.run(scenario())
+
+
+def test_round_with_null_answer_can_be_closed(database_url):
+    async def scenario():
+        async with Database() as db:
+            room, round_obj = await play_round(db)
+            # Победитель, «без победителя» и пропуск раунда идут через select_winner
+            for winner_id in (2, None):
+                async with db.transaction() as repo:
+                    manager = GameManager(repo, room)
+                    await manager.select_winner(round_obj.id, winner_id)
+                    round_obj = await manager.start_round("Вопрос")
+                    repo.session.add_all(PlayerAnswer(user_id=user_id, round_id=round_obj.id, answer=answer)
+                                         for user_id, answer in PLAYERS.items())
+            async with db.transaction() as repo:
+                assert await GameManager(repo, room).select_winner(round_obj.id, 1) is not None
+                stats = (await repo.session.execute(select(QuestionStat.played, QuestionStat.answers))).all()
+            # Три закрытых раунда, в каждом два числовых ответа из трёх
+            assert sorted(stats) == [(1, 2)] * 3
+
+    asyncio.run(scenario())
@@ -0,0 +1,78 @@
+import asyncio
+
+from sqlalchemy import func, insert, select
+
+from database import question_deck
+from database.db import Database, Question, QuestionDeck
+
+
+async def seed_questions(db: Database, count: int):
+    async with db.transaction() as repo:
+        repo.session.add_all(Question(question=f"Вопрос {i}", answer=str(i)) for i in range(count))
+
+
+async def draw_ids(db: Database, count: int, hold: float = 0.0):
+    """Вытянуть вопросы и подержать транзакцию открытой, как обработчик до коммита"""
+    async with db.transaction() as repo:
+        questions = await question_deck.draw(repo.session, count)
+        await asyncio.sleep(hold)
+    return [q.id for q in questions]
+
+
+def test_concurrent_draws_do_not_overlap(database_url):
+    async def scenario():
+        async with Database() as db:
+            await seed_questions(db, 20)
+            first = await draw_ids(db, 4)
+            drawn = await asyncio.gather(*(draw_ids(db, 4, hold=0.05) for _ in range(3)))
+            ids = first + [qid for game in drawn for qid in game]
+            assert len(ids) == len(set(ids)) == 16
+
+    asyncio.run(scenario())
+
+
+def test_small_bank_is_not_reshuffled_every_draw(database_url, monkeypatch):
+    reshuffles = []
+    reshuffle = question_deck._reshuffle
+
+    async def counting_reshuffle(*args):
+        reshuffles.append(args)
+        await reshuffle(*args)
+
+    monkeypatch.setattr(question_deck, "_reshuffle", counting_reshuffle)
+
+    async def scenario():
+        async with Database() as db:
+            await seed_questions(db, 3)
+            drawn = [await draw_ids(db, 7) for _ in range(3)]
+            assert all(sorted(ids) == [1, 2, 3] for ids in drawn)
+            # Один раз — когда колоду завели; дальше банк отдаётся целиком без перетасовки
+            assert len(reshuffles) == 1
+
+    asyncio.run(scenario())
+
+
+
+def test_deck_created_concurrently_is_reused(database_url):
+    async def scenario():
+        async with Database() as db:
+            await seed_questions(db, 20)
+            async with db.transaction() as repo:
+                session = repo.session
+                execute = session.execute
+
+                async def racing_execute(statement, *args, **kwargs):
+                    # Колода появляется сразу после того, как draw не нашёл её
+                    result = await execute(statement, *args, **kwargs)
+                    if statement.is_select and statement.column_descriptions[0]["entity"] is QuestionDeck:
+                        session.execute = execute
+                        await execute(insert(QuestionDeck).values(name="default", position=0, size=0, max_question_id=0))
+                    return result
+
+                session.execute = racing_execute
+                questions = await question_deck.draw(session, 4)
+            assert len(questions) == 4
+            async with db.transaction() as repo:
+                assert await repo.session.scalar(select(func.count(QuestionDeck.id))) == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,40 @@
+import io
+import json
+
+import pytest
+
+from database.question_import import InvalidJSON, iter_json_array
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+def questions(count: int) -> list:
+    return [{"question": f"Вопрос {i}", "answer": str(i), "hints": [None, True, -1.5e3]} for i in range(count)]
+
+
+def test_items_split_across_chunks():
+    items = questions(50)
+    stream = io.BytesIO(b"\xef\xbb\xbf" + json.dumps(items, ensure_ascii=False).encode("utf-8"))
+    assert list(iter_json_array(stream, chunk_size=7)) == items
+
+
+def test_malformed_item_fails_fast_with_byte_offset():
+    good = json.dumps(questions(2), ensure_ascii=False).encode("utf-8")[:-1]
+    broken = b', {"question": "\xd0\x91\xd0\xb8\xd1\x82\xd1\x8b\xd0\xb9", "answer": }'
+    tail = json.dumps(questions(10000), ensure_ascii=False).encode("utf-8")[1:]
+    stream = CountingStream(good + broken + b", " + tail)
+
+    items = iter_json_array(stream, chunk_size=1024)
+    assert len([next(items), next(items)]) == 2
+    with pytest.raises(InvalidJSON, match=f"байт {len(good) + broken.index(b'}')}"):
+        next(items)
+    # Остаток файла не дочитывался ради битого элемента
+    assert stream.reads < 5
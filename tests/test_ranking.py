@@ -0,0 +1,51 @@
+import pytest
+
+from utils.ranking import parse_number, rank_answers
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1500", 1500),
+    ("1 500", 1500),
+    ("1'000", 1000),
+    ("1,000", 1000),
+    ("12,345", 12345),
+    ("1,000,000", 1_000_000),
+    ("1,000.5", 1000.5),
+    ("1.000.000,5", 1_000_000.5),
+    ("1,5", 1.5),
+    ("0,125", 0.125),
+    ("2,50", 2.5),
+    ("1,0000", 1),
+    ("1.5", 1.5),
+    ("1e6", 1_000_000),
+    ("2.5E3", 2500),
+    ("1e-3", 0.001),
+    ("1,5 тыс.", 1500),
+    ("2 млн", 2_000_000),
+    ("около 1,000 км", 1000),
+    ("10-20", 15),
+    ("от 10 до 20", 15),
+    ("10,000-20,000", 15000),
+    ("10-20 тыс.", 15000),
+    ("двадцать пять", 25),
+    ("полторы тысячи", 1500),
+    ("минус 40", -40),
+    ("-40", -40),
+])
+def test_parse_number(text, expected):
+    assert parse_number(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text", [None, "", "не знаю", "много", "1e999"])
+def test_parse_number_rejects(text):
+    assert parse_number(text) is None
+
+
+def test_rank_answers_orders_by_distance_and_detects_ties():
+    ranking = rank_answers(["1,000", "950", "1050", "не знаю"], "1000")
+    assert ranking.order[0] == 0
+    assert ranking.order[-1] == 3
+    assert ranking.suggested == 0
+
+    tie = rank_answers(["950", "1050"], "1000")
+    assert tie.is_tie and tie.suggested is None
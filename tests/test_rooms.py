@@ -0,0 +1,75 @@
+import asyncio
+
+from database.db import Database, Question, Repository
+from utils.game_logic import GameManager
+from utils.rooms import RoomRegistry
+
+HOST_ID = 500
+
+
+async def seed_questions(db: Database, count: int = 10):
+    async with db.transaction() as repo:
+        repo.session.add_all(Question(question=f"Вопрос {i}", answer=str(i)) for i in range(count))
+
+
+def test_rolled_back_game_leaves_registry_untouched(database_url):
+    async def scenario():
+        async with Database() as db:
+            await seed_questions(db)
+            registry = RoomRegistry()
+            async with db.session_factory() as session:
+                manager = GameManager(Repository(session, db.users, db.difficulty))
+                room = await manager.start_new_game(registry, HOST_ID)
+                await manager.add_players(registry, [1, 2])
+                assert registry.hosted_by(HOST_ID) is None
+                await session.rollback()
+            assert len(registry) == 0
+            assert registry.room_of(1) is None
+            assert room.players == set()
+
+    asyncio.run(scenario())
+
+
+def test_round_opens_on_commit(database_url):
+    async def scenario():
+        async with Database() as db:
+            await seed_questions(db)
+            registry = RoomRegistry()
+            async with db.transaction() as repo:
+                manager = GameManager(repo)
+                room = await manager.start_new_game(registry, HOST_ID)
+                await manager.add_players(registry, [1, 2])
+            assert registry.hosted_by(HOST_ID) is room
+            assert registry.room_of(1) is room
+
+            async with db.session_factory() as session:
+                manager = GameManager(Repository(session, db.users, db.difficulty), room)
+                round_obj = await manager.start_round("Вопрос")
+                assert (room.current_round, room.round_id) == (0, None)
+                await session.commit()
+            assert (room.current_round, room.round_id) == (1, round_obj.id)
+
+    asyncio.run(scenario())
+
+
+def test_round_closes_on_commit(database_url):
+    async def scenario():
+        async with Database() as db:
+            await seed_questions(db)
+            registry = RoomRegistry()
+            async with db.transaction() as repo:
+                manager = GameManager(repo)
+                room = await manager.start_new_game(registry, HOST_ID)
+                round_obj = await manager.start_round("Вопрос")
+
+            async with db.session_factory() as session:
+                await GameManager(Repository(session, db.users, db.difficulty), room).select_winner(round_obj.id)
+                assert room.round_id == round_obj.id
+                await session.rollback()
+            assert room.round_id == round_obj.id
+
+            async with db.transaction() as repo:
+                await GameManager(repo, room).select_winner(round_obj.id)
+            assert room.round_id is None
+
+    asyncio.run(scenario())
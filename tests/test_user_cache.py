@@ -0,0 +1,72 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from database.db import Database, Repository, User
+
+USER_ID = 1001
+
+
+async def in_update(db: Database, body, commit: bool = True):
+    """Своя сессия на апдейт, как в DbSessionMiddleware"""
+    async with db.session_factory() as session:
+        result = await body(Repository(session, db.users))
+        if commit:
+            await session.commit()
+        else:
+            await session.rollback()
+        return result
+
+
+def start(repo: Repository):
+    return repo.get_or_create_user(USER_ID, "player", "Игрок")
+
+
+def test_concurrent_start_creates_one_user(database_url):
+    async def scenario():
+        async with Database() as db:
+            users = await asyncio.gather(*(in_update(db, start) for _ in range(20)))
+            assert {user.id for user in users} == {USER_ID}
+            async with db.transaction() as repo:
+                rows = await repo.session.scalar(select(func.count()).select_from(User).where(User.id == USER_ID))
+            assert rows == 1
+            assert len(db.users) == 1
+            assert db.users.get(USER_ID).first_name == "Игрок"
+
+    asyncio.run(scenario())
+
+
+def test_rollback_keeps_ready_set(database_url):
+    async def scenario():
+        async with Database() as db:
+            await in_update(db, start)
+            assert await in_update(db, lambda repo: repo.get_ready_player_ids()) == []
+            version = db.users.version
+
+            await in_update(db, lambda repo: repo.set_user_ready(USER_ID), commit=False)
+            assert db.users.ready_ids() == []
+            assert db.users.version == version
+            assert db.users.get(USER_ID).is_ready is False
+
+            await in_update(db, lambda repo: repo.set_user_ready(USER_ID))
+            assert db.users.ready_ids() == [USER_ID]
+            assert db.users.version == version + 1
+
+    asyncio.run(scenario())
+
+
+def test_ready_set_is_not_loaded_from_a_stale_snapshot(database_url):
+    async def scenario():
+        async with Database() as db:
+            await in_update(db, start)
+            async with db.session_factory() as session:
+                # Транзакция апдейта со снимком базы до чужого «готов»
+                connection = await session.connection()
+                await connection.exec_driver_sql("BEGIN")
+                await session.execute(select(User.id))
+                await in_update(db, lambda repo: repo.set_user_ready(USER_ID))
+                assert await Repository(session, db.users).get_ready_player_ids() == [USER_ID]
+                await session.commit()
+            assert db.users.ready_ids() == [USER_ID]
+
+    asyncio.run(scenario())
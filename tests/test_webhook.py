@@ -0,0 +1,60 @@
+import asyncio
+import os
+import signal
+import socket
+
+import aiohttp
+from aiogram import Dispatcher
+
+import main
+from benchmarks.fake_bot_api import FakeBotAPI
+from utils.webhook import SECRET_HEADER
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_sigterm_drains_accepted_updates(monkeypatch):
+    port = free_port()
+    monkeypatch.setattr(main, "WEBHOOK_URL", "https://example.invalid")
+    monkeypatch.setattr(main, "WEBHOOK_HOST", "127.0.0.1")
+    monkeypatch.setattr(main, "WEBHOOK_PORT", port)
+    monkeypatch.setattr(main, "WEBHOOK_SECRET", "secret")
+
+    async def scenario():
+        api = FakeBotAPI(latency=0)
+        await api.start()
+        dp = Dispatcher()
+        handled, at_shutdown = [], []
+
+        @dp.message()
+        async def slow_handler(message):
+            await asyncio.sleep(0.2)
+            handled.append(message.message_id)
+
+        async def on_shutdown():
+            at_shutdown.extend(handled)
+
+        dp.shutdown.register(on_shutdown)
+        server = asyncio.create_task(main.run_webhook(api.make_bot(), dp))
+        while not api.calls["setWebhook"]:
+            await asyncio.sleep(0.01)
+
+        update = {"update_id": 1, "message": {"message_id": 7, "date": 0, "text": "ответ",
+                                              "chat": {"id": 1, "type": "private"},
+                                              "from": {"id": 1, "is_bot": False, "first_name": "Игрок"}}}
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"http://127.0.0.1:{port}{main.WEBHOOK_PATH}", json=update,
+                                    headers={SECRET_HEADER: "secret"}) as response:
+                assert response.status == 200
+        # Апдейт принят, но ещё в обработке: остановка должна его дождаться
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.wait_for(server, 5)
+        await api.stop()
+        assert handled == [7]
+        assert at_shutdown == [7]
+
+    asyncio.run(scenario())
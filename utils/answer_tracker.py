@@ -0,0 +1,60 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Set
+
+from database.db import Repository
+
+
+@dataclass
+class RoundProgress:
+    expected: Set[int]
+    answered: Set[int] = field(default_factory=set)
+    notified: bool = False
+
+
+class AnswerTracker:
+    """Учёт ответов по раундам: кто должен ответить и кто уже ответил.
+
+    Список игроков фиксируется при старте раунда, каждый ответ обновляет счётчик за O(1).
+    После перезапуска состояние раунда один раз восстанавливается из базы.
+    """
+
+    def __init__(self):
+        self._rounds: Dict[int, RoundProgress] = {}
+        self._lock = asyncio.Lock()
+
+    def start_round(self, round_id: int, player_ids: Iterable[int]):
+        """Запомнить игроков, от которых ждём ответ"""
+        self._rounds[round_id] = RoundProgress(expected=set(player_ids))
+
+    def forget(self, round_id: int):
+        """Раунд закрыт — счётчик больше не нужен"""
+        self._rounds.pop(round_id, None)
+
+    async def record(self, repo: Repository, round_id: int, user_id: int) -> bool:
+        """Учесть ответ. True возвращается ровно один раз — на последнем ответе раунда"""
+        progress = self._rounds.get(round_id)
+        if progress is None:
+            progress = await self._rebuild(repo, round_id, user_id)
+
+        if user_id in progress.expected:
+            progress.answered.add(user_id)
+
+        if not progress.notified and len(progress.answered) >= len(progress.expected):
+            progress.notified = True
+            return True
+        return False
+
+    async def _rebuild(self, repo: Repository, round_id: int, user_id: int) -> RoundProgress:
+        async with self._lock:
+            progress = self._rounds.get(round_id)
+            if progress is None:
+                expected = set(await repo.get_round_player_ids(round_id))
+                answered = set(await repo.get_round_answer_user_ids(round_id))
+                # Текущий ответ уже в базе: считаем его отдельно, чтобы уведомить
+                # админа, только если раунд закрывает именно он
+                answered.discard(user_id)
+                progress = RoundProgress(expected=expected, answered=answered & expected)
+                progress.notified = len(progress.answered) >= len(expected)
+                self._rounds[round_id] = progress
+            return progress
@@ -0,0 +1,76 @@
+"""Фоновая архивация завершённых игр.
+
+Раз в interval секунд сворачивает в archived_games игры, завершённые больше
+after часов назад, пачками по batch игр — каждая пачка в своей короткой
+транзакции, чтобы не держать блокировку базы под идущими играми. Пока есть
+что переносить, пачки идут одна за другой; потом задача спит до следующего
+прохода. Архив старше keep_days дней удаляется.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from config import ARCHIVE_AFTER, ARCHIVE_BATCH, ARCHIVE_INTERVAL, ARCHIVE_KEEP_DAYS
+from database.db import Database
+
+logger = logging.getLogger(__name__)
+
+
+class GameArchiver:
+    """Переносит старые игры в архив; interval = 0 — архивация выключена"""
+
+    def __init__(self, db: Database, after: float = ARCHIVE_AFTER, batch: int = ARCHIVE_BATCH,
+                 interval: float = ARCHIVE_INTERVAL, keep_days: float = ARCHIVE_KEEP_DAYS):
+        self.db = db
+        self.after = after
+        self.batch = batch
+        self.interval = interval
+        self.keep_days = keep_days
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """Один проход: всё, что пора архивировать, и чистка старого архива. Возвращает число игр"""
+        finished_before = datetime.utcnow() - timedelta(hours=self.after)
+        archived = 0
+        while True:
+            async with self.db.transaction() as repo:
+                count = await repo.archive_finished_games(finished_before, self.batch)
+            archived += count
+            if count < self.batch:
+                break
+            # Дать дорогу обработчикам апдейтов между пачками
+            await asyncio.sleep(0)
+
+        pruned = 0
+        if self.keep_days > 0:
+            async with self.db.transaction() as repo:
+                pruned = await repo.prune_archive(datetime.utcnow() - timedelta(days=self.keep_days))
+        if archived or pruned:
+            logger.info("Архив: перенесено игр %s, удалено из архива %s", archived, pruned)
+        return archived
+
+    async def start(self):
+        if self._task is not None or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Архив: ошибка")
+            await asyncio.sleep(self.interval)
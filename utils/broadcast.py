@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramForbiddenError, TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+)
+
+from config import (
+    BROADCAST_CONCURRENCY, BROADCAST_RATE, BROADCAST_CHAT_INTERVAL, BROADCAST_MAX_RETRIES
+)
+
+logger = logging.getLogger(__name__)
+
+SendFunc = Callable[[int], Awaitable[object]]
+
+
+@dataclass
+class BroadcastResult:
+    delivered: int = 0
+    failed: int = 0
+    blocked: int = 0
+    blocked_ids: List[int] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.delivered + self.failed + self.blocked
+
+    def summary(self) -> str:
+        """Короткий отчёт для админа"""
+        return (f"📬 Доставлено: {self.delivered}, "
+                f"не доставлено: {self.failed}, "
+                f"заблокировали бота: {self.blocked}")
+
+
+class TokenBucket:
+    """Глобальный лимит Bot API: не больше rate сообщений в секунду"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated: Optional[float] = None
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        """Остановить выдачу токенов (Telegram прислал RetryAfter)"""
+        loop = asyncio.get_running_loop()
+        self._paused_until = max(self._paused_until, loop.time() + seconds)
+        self._tokens = 0
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            while True:
+                now = loop.time()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ChatLimiter:
+    """Лимит на один чат: не чаще одного сообщения в interval секунд"""
+
+    def __init__(self, interval: float, max_entries: int = 10_000):
+        self.interval = interval
+        self.max_entries = max_entries
+        self._next_slot: Dict[int, float] = {}
+
+    async def acquire(self, chat_id: int):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = self._next_slot.get(chat_id, now)
+        self._next_slot[chat_id] = max(slot, now) + self.interval
+        if len(self._next_slot) > self.max_entries:
+            self._prune(now)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _prune(self, now: float):
+        self._next_slot = {chat_id: slot for chat_id, slot in self._next_slot.items() if slot > now}
+
+
+class Broadcaster:
+    """Параллельная рассылка с учётом лимитов Telegram и повторами"""
+
+    def __init__(self, bot: Bot, concurrency: int = BROADCAST_CONCURRENCY,
+                 rate: float = BROADCAST_RATE, chat_interval: float = BROADCAST_CHAT_INTERVAL,
+                 max_retries: int = BROADCAST_MAX_RETRIES):
+        self.bot = bot
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate)
+        self.chat_limiter = ChatLimiter(chat_interval)
+
+    async def send_message(self, chat_ids: Iterable[int], text: str, **kwargs) -> BroadcastResult:
+        """Разослать одно и то же сообщение всем чатам"""
+        return await self.run(chat_ids, lambda chat_id: self.bot.send_message(chat_id, text, **kwargs))
+
+    async def run(self, chat_ids: Iterable[int], send: SendFunc) -> BroadcastResult:
+        """Вызвать send(chat_id) для каждого чата, не больше concurrency одновременно"""
+        result = BroadcastResult()
+        chat_ids = list(chat_ids)
+        queue = iter(chat_ids)
+
+        async def worker():
+            for chat_id in queue:
+                await self._deliver(chat_id, send, result)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(chat_ids)))))
+        return result
+
+    async def _deliver(self, chat_id: int, send: SendFunc, result: BroadcastResult):
+        for attempt in range(self.max_retries + 1):
+            await self.chat_limiter.acquire(chat_id)
+            await self.bucket.acquire()
+            try:
+                await send(chat_id)
+            except TelegramRetryAfter as e:
+                # Flood control действует на весь бот — притормаживаем всех
+                logger.warning("Broadcast: flood control, ждём %s с", e.retry_after)
+                self.bucket.pause(e.retry_after)
+                error = e
+            except TelegramForbiddenError:
+                result.blocked += 1
+                result.blocked_ids.append(chat_id)
+                return
+            except (TelegramNetworkError, TelegramServerError) as e:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                error = e
+            except Exception as e:
+                logger.warning("Broadcast: ошибка отправки в %s: %s", chat_id, e)
+                result.failed += 1
+                return
+            else:
+                result.delivered += 1
+                return
+        logger.warning("Broadcast: не удалось отправить в %s: %s", chat_id, error)
+        result.failed += 1
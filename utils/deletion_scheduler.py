@@ -0,0 +1,173 @@
+"""Отложенное удаление сообщений.
+
+Одна фоновая задача и куча (heap) по времени удаления вместо спящей задачи
+на каждое сообщение. Созревшие сообщения группируются по чатам и удаляются
+одним deleteMessages на чат (до 100 id за вызов) через общий Broadcaster,
+то есть с теми же лимитами и повторами, что и рассылки. Очередь дублируется
+в таблицу scheduled_deletions и поднимается из неё при старте.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+from aiogram.exceptions import TelegramBadRequest, TelegramNotFound
+from aiogram.methods.base import TelegramMethod
+from sqlalchemy import bindparam, delete, select
+
+from config import DELETE_BATCH_WINDOW
+from database.db import Database, ScheduledDeletion, dialect_insert
+from utils.broadcast import Broadcaster
+
+logger = logging.getLogger(__name__)
+
+MAX_IDS_PER_CALL = 100
+
+_Entry = Tuple[float, int, int]  # (unix-время удаления, chat_id, message_id)
+
+
+class DeleteMessages(TelegramMethod[bool]):
+    """Bot API deleteMessages (в aiogram 3.2 его ещё нет)"""
+
+    __returning__ = bool
+    __api_method__ = "deleteMessages"
+
+    chat_id: Union[int, str]
+    message_ids: List[int]
+
+
+class DeletionScheduler:
+    """Удаляет сообщения не раньше срока и не позже срока + window секунд"""
+
+    def __init__(self, db: Database, broadcaster: Broadcaster, window: float = DELETE_BATCH_WINDOW,
+                 bulk: bool = True):
+        self.db = db
+        self.broadcaster = broadcaster
+        self.window = window
+        self.bulk = bulk
+        self._heap: List[_Entry] = []
+        self._unsaved: List[dict] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, chat_id: int, message_id: int, delay: float):
+        """Удалить сообщение через delay секунд"""
+        due = time.time() + delay
+        heapq.heappush(self._heap, (due, chat_id, message_id))
+        self._unsaved.append({"chat_id": chat_id, "message_id": message_id,
+                              "delete_at": datetime.utcfromtimestamp(due)})
+        self._wakeup.set()
+
+    async def start(self):
+        """Поднять из базы то, что не успели удалить до рестарта, и запустить задачу"""
+        if self._task is not None:
+            return
+        async with self.db.session_factory() as session:
+            rows = (await session.execute(select(ScheduledDeletion))).scalars().all()
+        for row in rows:
+            due = (row.delete_at - datetime(1970, 1, 1)).total_seconds()
+            heapq.heappush(self._heap, (due, row.chat_id, row.message_id))
+        if rows:
+            logger.info("Отложенное удаление: восстановлено %s сообщений", len(rows))
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Остановить задачу; несохранённую очередь дописать в базу"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._save()
+
+    async def _run(self):
+        while True:
+            try:
+                await self._save()
+                await self._sleep_until_due()
+                due = self._pop_due()
+                if due:
+                    await self._delete(due)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Отложенное удаление: ошибка")
+                await asyncio.sleep(1)
+
+    async def _sleep_until_due(self):
+        self._wakeup.clear()
+        if self._unsaved:
+            return
+        # Ждём чуть дольше срока, чтобы соседние сообщения попали в тот же вызов
+        timeout = self._heap[0][0] + self.window - time.time() if self._heap else None
+        if timeout is not None and timeout <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _pop_due(self) -> Dict[int, List[int]]:
+        now = time.time()
+        by_chat: Dict[int, List[int]] = {}
+        while self._heap and self._heap[0][0] <= now:
+            _, chat_id, message_id = heapq.heappop(self._heap)
+            by_chat.setdefault(chat_id, []).append(message_id)
+        return by_chat
+
+    async def _delete(self, by_chat: Dict[int, List[int]]):
+        await self.broadcaster.run(by_chat, lambda chat_id: self._delete_chat(chat_id, by_chat[chat_id]))
+        # Неудачные попытки тоже забываем: повторы уже были внутри Broadcaster
+        stmt = delete(ScheduledDeletion).where(
+            ScheduledDeletion.chat_id == bindparam("c"), ScheduledDeletion.message_id == bindparam("m")
+        )
+        async with self.db.transaction() as repo:
+            connection = await repo.session.connection()
+            await connection.execute(stmt, [{"c": chat_id, "m": message_id}
+                                            for chat_id, ids in by_chat.items() for message_id in ids])
+
+    async def _delete_chat(self, chat_id: int, message_ids: List[int]):
+        bot = self.broadcaster.bot
+        if self.bulk:
+            try:
+                for start in range(0, len(message_ids), MAX_IDS_PER_CALL):
+                    if start:
+                        await self.broadcaster.bucket.acquire()
+                    chunk = message_ids[start:start + MAX_IDS_PER_CALL]
+                    await bot(DeleteMessages(chat_id=chat_id, message_ids=chunk))
+                return
+            except TelegramNotFound:
+                logger.warning("Bot API не знает deleteMessages, удаляем по одному сообщению")
+                self.bulk = False
+
+        for n, message_id in enumerate(message_ids):
+            if n:
+                await self.broadcaster.bucket.acquire()
+            try:
+                await bot.delete_message(chat_id, message_id)
+            except TelegramBadRequest:
+                # Уже удалено или старше 48 часов
+                pass
+
+    async def _save(self):
+        if not self._unsaved:
+            return
+        rows, self._unsaved = self._unsaved, []
+        try:
+            stmt = dialect_insert(self.db.engine.dialect.name, ScheduledDeletion).on_conflict_do_nothing(
+                index_elements=["chat_id", "message_id"]
+            )
+            async with self.db.transaction() as repo:
+                await repo.session.execute(stmt, rows)
+        except Exception:
+            self._unsaved = rows + self._unsaved
+            raise
@@ -1,99 +1,169 @@
-from typing import List, Dict, Optional
-from database.models import User, Round, PlayerAnswer
-from database.db import Database
+from typing import List, Dict, Iterable, Optional
+from config import MAX_ROUNDS, QUESTION_SELECTION, DIFFICULTY_CURVE
+from database.models import User, Round, PlayerAnswer, Question
+from database.db import Repository
+from utils.ranking import parse_number, rank_answers
+from utils.stakes import ante_for_round
+from utils.rooms import Room, RoomRegistry, RoundAnswers
+
+def difficulty_curve(rounds: int, points: List[float] = DIFFICULTY_CURVE) -> List[float]:
+    """Кривая сложности на rounds раундов; если точек задано другое число — растягиваем линейно"""
+    if len(points) == rounds or len(points) < 2:
+        return (list(points) * rounds)[:rounds]
+    curve = []
+    for n in range(rounds):
+        position = n * (len(points) - 1) / max(rounds - 1, 1)
+        left = min(int(position), len(points) - 2)
+        curve.append(points[left] + (points[left + 1] - points[left]) * (position - left))
+    return curve
 
 class GameManager:
-    def __init__(self, db: Database):
-        self.db = db
-        self.active_game: Optional[Dict] = None
-    
-    async def start_new_game(self) -> bool:
-        """Начать новую игру"""
-        # Сбрасываем старое состояние
-        await self.db.reset_game_state()
-        
-        # Создаём новую игру
-        game = await self.db.create_game()
-        self.active_game = {"id": game.id, "current_round": 0}
-        
-        return True
-    
-    async def get_ready_players_count(self) -> int:
-        """Получить количество готовых игроков"""
-        players = await self.db.get_ready_players()
-        return len(players)
-    
-    async def start_round(self, question: str) -> bool:
+    """Ход игры в одной комнате"""
+
+    def __init__(self, repo: Repository, room: Optional[Room] = None):
+        self.repo = repo
+        self.room = room
+
+    async def start_new_game(self, registry: RoomRegistry, host_id: int) -> Room:
+        """Начать новую игру ведущего. Прежняя игра этого ведущего закрывается, чужие не трогаем.
+
+        Комната и реестр меняются только после коммита транзакции (как кеши
+        Repository): при откате в памяти не останется игры, которой нет в базе.
+        """
+        previous = registry.hosted_by(host_id)
+        if previous is not None:
+            await self.repo.finish_game(previous.game_id)
+
+        # Создаём новую игру и сразу выбираем вопросы на все раунды
+        game = await self.repo.create_game(host_id)
+        if QUESTION_SELECTION == "adaptive":
+            questions = await self.repo.pick_questions(difficulty_curve(MAX_ROUNDS))
+        else:
+            questions = await self.repo.draw_questions(MAX_ROUNDS)
+        await self.repo.assign_game_questions(game.id, questions)
+        room = Room(game_id=game.id, host_id=host_id, question_ids=[q.id for q in questions])
+        self.repo.after_commit(lambda: registry.add(room))
+        self.room = room
+        return room
+
+    async def add_players(self, registry: RoomRegistry, player_ids: Iterable[int]):
+        """Посадить игроков в комнату"""
+        player_ids, room = list(player_ids), self.room
+        await self.repo.add_game_players(room.game_id, player_ids)
+        self.repo.after_commit(lambda: registry.join(room, player_ids))
+
+    def get_players_count(self) -> int:
+        """Получить количество игроков в комнате"""
+        return len(self.room.players) if self.room else 0
+
+    async def next_question(self) -> Optional[Question]:
+        """Вопрос для следующего раунда текущей игры"""
+        if not self.room:
+            return None
+        return await self.game_question(self.room.game_id, self.room.current_round + 1)
+
+    async def game_question(self, game_id: int, round_number: int) -> Optional[Question]:
+        """Вопрос раунда; id вопросов своей игры комната помнит — тогда он читается из снимка"""
+        question_id = self.room.question_id(round_number) if self.room and self.room.game_id == game_id else None
+        return await self.repo.get_game_question(game_id, round_number, question_id)
+
+    async def start_round(self, question: str) -> Optional[Round]:
         """Начать новый раунд"""
-        if not self.active_game:
-            return False
-        
-        current_round = self.active_game["current_round"] + 1
-        if current_round > 7:
-            return False
-        
+        if not self.room:
+            return None
+
+        current_round = self.room.current_round + 1
+        if current_round > MAX_ROUNDS:
+            return None
+
         # Создаём раунд
-        round_obj = await self.db.create_round(
-            game_id=self.active_game["id"], 
-            round_number=current_round, 
+        round_obj = await self.repo.create_round(
+            game_id=self.room.game_id,
+            round_number=current_round,
             question=question
         )
-        
-        self.active_game["current_round"] = current_round
-        return True
-    
-    async def all_players_answered(self, round_id: int) -> bool:
-        """Проверить, ответили ли все игроки"""
-        # Получаем текущий раунд
-        round_obj = await self.db.get_current_round(self.active_game["id"])
-        if not round_obj or round_obj.id != round_id:
-            return False
-        
-        # Считаем ответы
-        cursor = await self.db.db.execute(
-            "SELECT COUNT(*) FROM player_answers WHERE round_id = ?", (round_id,)
+
+        # Ответы комната начнёт принимать, когда раунд будет в базе
+        room, round_id = self.room, round_obj.id
+        self.repo.after_commit(lambda: room.open_round(current_round, round_id))
+        return round_obj
+
+    async def collect_stakes(self, round_obj) -> int:
+        """Банк раунда: невыигранный банк прошлого раунда и обязательные ставки всех игроков"""
+        await self.repo.carry_bank(self.room.game_id, round_obj.id, round_obj.round_number)
+        return await self.repo.collect_antes(
+            round_obj.id, self.room.game_id, self.room.players, ante_for_round(round_obj.round_number)
         )
-        answer_count = (await cursor.fetchone())[0]
-        
-        # Считаем готовых игроков
-        ready_count = await self.get_ready_players_count()
-        
-        return answer_count >= ready_count
-    
+
     async def set_hint(self, round_id: int, hint_num: int, hint_text: str) -> bool:
         """Установить подсказку"""
-        await self.db.set_hint(round_id, hint_num, hint_text)
+        await self.repo.set_hint(round_id, hint_num, hint_text)
         return True
-    
+
     async def get_round_answers_formatted(self, round_id: int) -> List[Dict]:
         """Получить отформатированные ответы для админа"""
-        answers = await self.db.get_round_answers(round_id)
+        answers = await self.repo.get_round_answers(round_id)
         formatted_answers = []
-        
+
         for answer in answers:
             formatted = {
                 "id": answer.id,
                 "user_id": answer.user_id,
                 "answer": answer.answer,
-                "username": f"Игрок_{answer.user_id}"  # Будет обновлено в handlers
+                "username": answer.first_name
             }
             formatted_answers.append(formatted)
-        
+
         return formatted_answers
-    
-    async def select_winner(self, round_id: int, winner_id: Optional[int] = None) -> bool:
-        """Выбрать победителя раунда"""
-        if winner_id:
-            await self.db.set_round_winner(round_id, winner_id)
-        else:
-            # Отмечаем раунд как завершённый без победителя
-            await self.db.db.execute(
-                "UPDATE rounds SET is_active = 0 WHERE id = ?", (round_id,)
-            )
-            await self.db.db.commit()
-        
-        return True
-    
+
+    async def rank_round_answers(self, round_obj) -> RoundAnswers:
+        """Ответы раунда от ближнего к правильному ответу к дальнему, с расстоянием у каждого.
+
+        Результат запоминается в комнате: страницы списка берутся из него без запросов к базе.
+        """
+        # Спасовавшие выиграть не могут — в список они не попадают
+        folded = set(await self.repo.get_folded_user_ids(round_obj.id))
+        answers = [a for a in await self.get_round_answers_formatted(round_obj.id) if a["user_id"] not in folded]
+        question = await self.game_question(round_obj.game_id, round_obj.round_number)
+        ranking = rank_answers([a["answer"] for a in answers], question.answer if question else "")
+        ordered = [{**answers[i], "distance": ranking.distances[i]} for i in ranking.order]
+        view = RoundAnswers(round_id=round_obj.id, answers=ordered, ranking=ranking)
+        if self.room:
+            self.room.answers = view
+        return view
+
+    async def select_winner(self, round_id: int, winner_id: Optional[int] = None) -> Optional[int]:
+        """Выбрать победителя раунда и выплатить ему банк. None — раунд уже был закрыт"""
+        # Без победителя раунд просто закрывается, банк переходит в следующий
+        paid = await self.repo.settle_round(round_id, winner_id)
+        if paid is not None:
+            await self.record_question_stats(round_id, winner_id)
+        if self.room:
+            room = self.room
+            self.repo.after_commit(lambda: room.close_round(round_id))
+        return paid
+
+    async def record_question_stats(self, round_id: int, winner_id: Optional[int]):
+        """Учесть ответы закрытого раунда в статистике его вопроса"""
+        round_obj = await self.repo.get_round(round_id)
+        question = await self.game_question(round_obj.game_id, round_obj.round_number)
+        truth = parse_number(question.answer) if question else None
+        if truth is None:
+            # Правильный ответ не число — ошибку не посчитать
+            return
+        # Ответ без текста (NULL) в статистику не идёт
+        values = {a.user_id: parse_number(a.answer) for a in await self.repo.get_round_answers(round_id)
+                  if a.answer is not None}
+        await self.repo.record_question_stats(
+            question.id, truth, [v for v in values.values() if v is not None], values.get(winner_id)
+        )
+
+    async def finish_game(self, registry: RoomRegistry):
+        """Закрыть игру комнаты"""
+        room = self.room
+        await self.repo.finish_game(room.game_id)
+        self.repo.after_commit(lambda: registry.close(room))
+
     async def is_game_completed(self) -> bool:
         """Проверить, завершена ли игра"""
-        return self.active_game and self.active_game["current_round"] >= 7
\ No newline at end of file
+        return bool(self.room) and self.room.current_round >= MAX_ROUNDS
@@ -0,0 +1,206 @@
+"""Автоподсказки из банка вопросов.
+
+Одна фоновая задача и куча (heap) по времени на все открытые раунды всех
+комнат. Когда срок раунда наступил, следующая по номеру незаданная подсказка
+берётся из вопроса, записывается в раунд (set_hint) и рассылается игрокам
+через общий Broadcaster. Как только ответили все, первая подсказка уходит
+сразу. Ведущий может поставить автоподсказки на паузу или отправить свою
+подсказку вручную — она займёт свой номер, автоматические пойдут дальше.
+
+Расписание хранится в rounds.next_hint_at: база — источник истины, куча в
+памяти только будит задачу. После рестарта куча строится заново из базы.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import HINT_INTERVAL
+from database.db import Database
+from utils.broadcast import Broadcaster
+from utils.messages import PLAYER_HINT_BROADCAST
+from utils.rooms import RoomRegistry
+
+logger = logging.getLogger(__name__)
+
+HINTS_PER_ROUND = 3
+
+
+def _utc(unix_time: float) -> datetime:
+    return datetime.utcfromtimestamp(unix_time)
+
+
+def _unix(moment: datetime) -> float:
+    return (moment - datetime(1970, 1, 1)).total_seconds()
+
+
+class HintScheduler:
+    """Шлёт подсказки раундов по таймеру; interval = 0 — автоподсказки выключены"""
+
+    def __init__(self, db: Database, broadcaster: Broadcaster, registry: RoomRegistry,
+                 interval: float = HINT_INTERVAL):
+        self.db = db
+        self.broadcaster = broadcaster
+        self.registry = registry
+        self.interval = interval
+        self._heap: List[Tuple[float, int]] = []  # (unix-время, round_id)
+        self._due: Dict[int, float] = {}          # актуальный срок раунда; устаревшие записи кучи пропускаются
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._firing: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def is_running(self, round_id: int) -> bool:
+        """Автоподсказки раунда идут (не на паузе и ещё не кончились)"""
+        return round_id in self._due
+
+    async def plan(self, round_id: int, delay: Optional[float]):
+        """Следующая подсказка раунда через delay секунд; None — не слать (пауза)"""
+        if not self.enabled:
+            return
+        due = time.time() + delay if delay is not None else None
+        async with self.db.transaction() as repo:
+            await repo.schedule_hint(round_id, _utc(due) if due is not None else None)
+        self._push(round_id, due)
+
+    async def hurry(self, round_id: int):
+        """Все ответили — не ждём таймера. На паузе ничего не делаем"""
+        if self.is_running(round_id):
+            await self.plan(round_id, 0)
+
+    async def pause(self, round_id: int):
+        await self.plan(round_id, None)
+
+    async def resume(self, round_id: int):
+        await self.plan(round_id, self.interval)
+
+    async def after_manual_hint(self, round_id: int):
+        """Ведущий дал подсказку сам — следующая автоматическая через полный интервал"""
+        if self.is_running(round_id):
+            await self.plan(round_id, self.interval)
+
+    def cancel(self, round_id: int):
+        """Раунд закрыт (в базе next_hint_at сбрасывает settle_round)"""
+        self._due.pop(round_id, None)
+
+    async def start(self):
+        """Поднять расписание открытых раундов из базы и запустить задачу"""
+        if self._task is not None or not self.enabled:
+            return
+        async with self.db.transaction() as repo:
+            rows = await repo.get_scheduled_hints()
+        for round_id, next_hint_at in rows:
+            self._push(round_id, _unix(next_hint_at))
+        if rows:
+            logger.info("Автоподсказки: восстановлено %s раундов", len(rows))
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is None:
+            return
+        for task in [self._task, *self._firing]:
+            task.cancel()
+        await asyncio.gather(self._task, *self._firing, return_exceptions=True)
+        self._task = None
+
+    def _push(self, round_id: int, due: Optional[float]):
+        if due is None:
+            self._due.pop(round_id, None)
+            return
+        self._due[round_id] = due
+        heapq.heappush(self._heap, (due, round_id))
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await self._sleep_until_due()
+                # Каждый раунд — своей задачей: рассылка большой комнаты не задерживает остальные
+                for round_id in self._pop_due():
+                    task = asyncio.create_task(self._fire(round_id))
+                    self._firing.add(task)
+                    task.add_done_callback(self._firing.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Автоподсказки: ошибка")
+                await asyncio.sleep(1)
+
+    async def _sleep_until_due(self):
+        self._wakeup.clear()
+        timeout = self._heap[0][0] - time.time() if self._heap else None
+        if timeout is not None and timeout <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _pop_due(self) -> List[int]:
+        now = time.time()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, round_id = heapq.heappop(self._heap)
+            if self._due.get(round_id) == when:
+                del self._due[round_id]
+                due.append(round_id)
+        return due
+
+    async def _fire(self, round_id: int):
+        try:
+            sent = await self._send_next_hint(round_id)
+        except Exception:
+            logger.exception("Автоподсказки: раунд %s", round_id)
+            # Попробуем ещё раз через интервал, чтобы раунд не остался без подсказок
+            self._push(round_id, time.time() + self.interval)
+            return
+        if sent is not None:
+            room, hint_num, text = sent
+            result = await self.broadcaster.send_message(
+                list(room.players), PLAYER_HINT_BROADCAST.format(hint_num=hint_num, hint_text=text),
+                parse_mode="Markdown"
+            )
+            await self.broadcaster.send_message(
+                [room.host_id], f"💡 Подсказка {hint_num}/{HINTS_PER_ROUND} отправлена автоматически.\n"
+                                f"{result.summary()}"
+            )
+
+    async def _send_next_hint(self, round_id: int):
+        """Записать следующую подсказку раунда; None — слать нечего"""
+        room = None
+        async with self.db.transaction() as repo:
+            round_obj = await repo.get_round(round_id)
+            if round_obj is not None:
+                room = self.registry.get(round_obj.game_id)
+            if round_obj is None or not round_obj.is_active or room is None or round_obj.next_hint_at is None:
+                return None
+            if _unix(round_obj.next_hint_at) > time.time() + 1:
+                # Срок в базе позже (например, после ручной подсказки) — ждём его
+                self._push(round_id, _unix(round_obj.next_hint_at))
+                return None
+
+        # Номер подсказки и запись — под замком комнаты, чтобы не столкнуться с ручной подсказкой
+        async with room.lock:
+            async with self.db.transaction() as repo:
+                round_obj = await repo.get_round(round_id)
+                if not round_obj.is_active:
+                    return None
+                hint_num = next((n for n in range(1, HINTS_PER_ROUND + 1)
+                                 if not getattr(round_obj, f"hint{n}")), None)
+                question = await repo.get_game_question(round_obj.game_id, round_obj.round_number,
+                                                        room.question_id(round_obj.round_number))
+                text = getattr(question, f"hint{hint_num}", None) if question and hint_num else None
+                if not text:
+                    await repo.schedule_hint(round_id, None)
+                    return None
+                await repo.set_hint(round_id, hint_num, text)
+                last = hint_num == HINTS_PER_ROUND
+                next_at = None if last else time.time() + self.interval
+                await repo.schedule_hint(round_id, _utc(next_at) if next_at else None)
+        self._push(round_id, next_at)
+        return room, hint_num, text
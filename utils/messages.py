@@ -1,5 +1,13 @@
 from config import GAME_RULES
 
+
+def escape_markdown(text: str) -> str:
+    """Экранировать имя или ник игрока для сообщения с Markdown-разметкой"""
+    for char in ("\\", "_", "*", "`", "["):
+        text = text.replace(char, "\\" + char)
+    return text
+
+
 # Сообщения для игроков
 PLAYER_START_MESSAGE = GAME_RULES + "\n\nНажмите кнопку ниже, чтобы подтвердить готовность к игре!"
 PLAYER_READY_MESSAGE = "✅ Отлично! Вы готовы к игре. Ожидайте начала первого раунда."
@@ -19,6 +27,13 @@ PLAYER_ANSWER_ACCEPTED = """
 
 ⏳ Ожидайте подсказки от ведущего...
 """
+PLAYER_ANSWER_TEXT_ONLY = "✍️ Ответ принимается только текстом — напишите его одним сообщением."
+PLAYER_STAKE_MESSAGE = "\n💰 Обязательная ставка: {ante} 🪙, в банке раунда: {bank} 🪙"
+PLAYER_STAKE_CHOICE = """
+💰 Повысить ставку, оставить как есть или спасовать?
+Пас — поставленное остаётся в банке, но выиграть раунд уже нельзя.
+"""
+PLAYER_HINT_BROADCAST = "💡 **Подсказка {hint_num}/3**\n\n{hint_text}"
 PLAYER_HINT_MESSAGE = """
 💡 **Подсказка {hint_num}/3**
 
@@ -30,7 +45,7 @@ PLAYER_WINNER_ANNOUNCEMENT = """
 🎉 **Победитель раунда {round_num} — @{username}!**
 
 Поздравляем! 🏆
-Банк раунда ваш!
+Банк раунда ({bank} 🪙) уходит победителю!
 
 ⏳ Готовьтесь к следующему раунду...
 """
@@ -68,4 +83,4 @@ ADMIN_ROUND_COMPLETED = """
 
 **Что дальше?**
 """
-ADMIN_NO_WINNER = "❌ Победитель не выбран. Раунд завершён."
\ No newline at end of file
+ADMIN_NO_WINNER = "❌ Победитель не выбран. Раунд завершён, банк переходит в следующий раунд."
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""Метрики бота в текстовом формате Prometheus.
+
+Счётчики и гистограммы живут в памяти процесса. Серия на набор меток
+создаётся один раз (labels()), а вызывающий код держит её у себя: на
+горячем пути — только bisect по заранее заданным границам и инкременты в
+заранее выделенном списке, без новых словарей и строк на каждое событие.
+Текст для Prometheus собирается, только когда его запрашивают, —
+на локальном HTTP-эндпоинте (METRICS_PORT).
+
+Что меряется и где:
+  * bot_handler_seconds, bot_handler_errors_total — middlewares/metrics.py
+  * bot_api_request_seconds — запросы к Bot API, там же
+  * bot_db_query_seconds — каждый SQL-запрос, database/stats.py
+  * bot_fsm_cache_total — кеш FSM-состояний, database/fsm_storage.py
+"""
+import bisect
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Секунды: от долей миллисекунды (запрос к SQLite) до секунд (рассылка, 429)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Histogram:
+    """Одна серия гистограммы: счётчики по корзинам выделены заранее"""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # последняя корзина — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Family:
+    """Метрика с метками: серия на каждый набор значений меток"""
+
+    def __init__(self, name: str, help: str, kind: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Серия для значений меток; создаётся при первом обращении — держите её у себя"""
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name}: ожидались метки {self.label_names}, получено {values}")
+            series = Histogram(self.buckets) if self.kind == "histogram" else Counter()
+            self._series[values] = series
+        return series
+
+    def render(self, lines: List[str]):
+        for values, series in sorted(self._series.items()):
+            labels = _labels(self.label_names, values)
+            if self.kind == "histogram":
+                cumulative = 0
+                for bound, count in zip(self.buckets, series.counts):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{_labels(self.label_names, values, le=_number(bound))} '
+                                 f'{cumulative}')
+                lines.append(f'{self.name}_bucket{_labels(self.label_names, values, le="+Inf")} {series.count}')
+                lines.append(f"{self.name}_sum{labels} {_number(series.sum)}")
+                lines.append(f"{self.name}_count{labels} {series.count}")
+            else:
+                lines.append(f"{self.name}{labels} {series.value}")
+
+
+class Registry:
+    def __init__(self):
+        self._families: Dict[str, Family] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Family:
+        return self._family(Family(name, help, "counter", labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Family:
+        return self._family(Family(name, help, "histogram", labels, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]):
+        """Значение, которое считается в момент запроса метрик (размер очереди, число комнат)"""
+        self._gauges[name] = (help, read)
+
+    def _family(self, family: Family) -> Family:
+        # Повторная регистрация (второй диспетчер в том же процессе) отдаёт уже накопленную метрику
+        existing = self._families.get(family.name)
+        if existing is not None:
+            return existing
+        self._families[family.name] = family
+        return family
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self._families.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            family.render(lines)
+        for name, (help, read) in self._gauges.items():
+            try:
+                value = read()
+            except Exception:
+                logger.exception("Метрика %s не посчиталась", name)
+                continue
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_number(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], le: Optional[str] = None) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+# Общий реестр процесса: метрики объявляются в модулях, которые их пишут
+REGISTRY = Registry()
+
+
+# ==================== HTTP-ЭНДПОИНТ ====================
+class MetricsServer:
+    """GET /metrics на отдельном порту; port=0 — эндпоинт выключен (метрики всё равно копятся)"""
+
+    def __init__(self, host: str, port: int, registry: Registry = REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._runner = None
+
+    async def start(self):
+        if self._runner is not None or not self.port:
+            return
+        from aiohttp import web
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(body=self.registry.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info("Метрики: http://%s:%s/metrics", self.host, self.port)
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
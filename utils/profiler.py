@@ -0,0 +1,181 @@
+"""Сэмплирующий профайлер живого бота (/profile).
+
+Пока профайлер не запущен, его нет: ни хуков, ни settrace, ни фоновых
+задач. Запущенный — это отдельный поток, который каждые interval секунд
+снимает стеки всех потоков процесса (sys._current_frames) и считает
+одинаковые стеки. Стек потока цикла событий начинается с asyncio-задачи,
+которая сейчас выполняется (её корутины), поэтому видно, чья работа
+держит цикл: обработка апдейта, рассылка, планировщики. Запросы
+SQLAlchemy выполняются в той же задаче, а SQLite — в потоке aiosqlite,
+он попадает в профиль отдельным корнем.
+
+Одновременно в самом цикле меряется задержка: короткий sleep проверяет,
+насколько позже срока он проснулся. В начале и в конце считаются живые
+задачи по корутинам — например, висящие задачи удаления сообщений.
+
+Результат — стеки в формате collapsed (flamegraph.pl, speedscope) и
+текстовый отчёт: самые горячие функции и задержки цикла.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import sysconfig
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from config import PROFILE_INTERVAL
+
+# Шаг проверки задержки цикла событий, секунды
+LAG_STEP = 0.05
+# Пути, которые отрезаются от имени файла в стеке: stdlib, site-packages, корень бота
+_PREFIXES = sorted({os.path.dirname(os.path.dirname(os.path.abspath(__file__))), *sysconfig.get_paths().values(),
+                    *sys.path}, key=len, reverse=True)
+
+
+def _task_name(task: asyncio.Task) -> str:
+    coro = task.get_coro()
+    return getattr(coro, "__qualname__", None) or task.get_name()
+
+
+def count_tasks() -> Counter:
+    """Живые задачи цикла событий по корутинам"""
+    return Counter(_task_name(task) for task in asyncio.all_tasks())
+
+
+@dataclass
+class Profile:
+    seconds: float
+    interval: float
+    samples: int = 0                                   # тиков сэмплера: доли в отчёте — от них
+    stacks: Counter = field(default_factory=Counter)   # "корень;вызов;...;вызов" -> число сэмплов
+    lags: List[float] = field(default_factory=list)
+    tasks_before: Counter = field(default_factory=Counter)
+    tasks_after: Counter = field(default_factory=Counter)
+
+    def folded(self) -> str:
+        """Стеки в формате collapsed: строка на стек, число сэмплов в конце"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def loop_stacks(self):
+        """Стеки потока цикла событий; остальные потоки (aiosqlite, пул to_thread) — только в folded"""
+        for stack, count in self.stacks.items():
+            if stack.startswith(("task:", "loop;")):
+                yield stack, count
+
+    def top(self, limit: int = 25) -> List[Tuple[str, int, int]]:
+        """(функция, сэмплов на ней самой, сэмплов со всеми вызванными) в цикле событий — по убыванию собственных"""
+        own, total = Counter(), Counter()
+        for stack, count in self.loop_stacks():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames[1:]):
+                total[frame] += count
+        return [(name, own[name], total[name]) for name, _ in own.most_common(limit)]
+
+    def lag_summary(self) -> str:
+        if not self.lags:
+            return "задержка цикла событий: нет замеров"
+        lags = sorted(self.lags)
+        p95 = lags[min(len(lags) - 1, int(len(lags) * 0.95))]
+        return (f"задержка цикла событий: средняя {statistics.mean(lags) * 1000:.1f} мс, "
+                f"p95 {p95 * 1000:.1f} мс, макс {lags[-1] * 1000:.1f} мс")
+
+    def summary(self) -> str:
+        return (f"{self.samples} сэмплов за {self.seconds:g} с (каждые {self.interval * 1000:g} мс)\n"
+                f"{self.lag_summary()}\n"
+                f"задач: {sum(self.tasks_after.values())} (в начале {sum(self.tasks_before.values())})")
+
+    def report(self, limit: int = 25) -> str:
+        total = max(self.samples, 1)
+        holders = Counter()
+        for stack, count in self.loop_stacks():
+            holders[stack.split(";", 1)[0]] += count
+        lines = [self.summary(), "", "Цикл событий занят (loop — ждёт событий):"]
+        for root, count in holders.most_common(limit):
+            lines.append(f"{count / total:6.1%}  {root}")
+        lines += ["", "Горячие функции цикла событий:", f"{'свои':>6} {'всего':>6}  функция"]
+        for name, own, inclusive in self.top(limit):
+            lines.append(f"{own / total:6.1%} {inclusive / total:6.1%}  {name}")
+        lines += ["", "Задачи в конце (в начале):"]
+        for name, count in self.tasks_after.most_common():
+            lines.append(f"{count:6d} ({self.tasks_before.get(name, 0)})  {name}")
+        return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """Один профиль за раз; между запусками ничего не стоит"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._running = False
+        self._labels: Dict[object, str] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    async def run(self, seconds: float) -> Profile:
+        """Снимать стеки seconds секунд; вызывается из цикла событий бота"""
+        if self._running:
+            raise RuntimeError("Профайлер уже запущен")
+        self._running = True
+        loop = asyncio.get_running_loop()
+        profile = Profile(seconds=seconds, interval=self.interval, tasks_before=count_tasks())
+        stop = threading.Event()
+        counts: Counter = Counter()
+        sampler = threading.Thread(target=self._sample, args=(loop, threading.get_ident(), stop, counts),
+                                   name="profiler", daemon=True)
+        try:
+            sampler.start()
+            deadline = loop.time() + seconds
+            while loop.time() < deadline:
+                started = loop.time()
+                await asyncio.sleep(LAG_STEP)
+                profile.lags.append(max(0.0, loop.time() - started - LAG_STEP))
+        finally:
+            stop.set()
+            await asyncio.to_thread(sampler.join)
+            self._running = False
+        profile.tasks_after = count_tasks()
+        # Доли в отчёте — от числа тиков: за тик у потока цикла событий ровно один стек
+        profile.samples = counts.pop(None, 0)
+        for (root, codes), count in counts.items():
+            # Коды — от внутреннего вызова к внешнему; в collapsed — от корня
+            frames = ";".join(self._label(code) for code in reversed(codes))
+            profile.stacks[f"{root};{frames}" if frames else root] += count
+        return profile
+
+    def _sample(self, loop: asyncio.AbstractEventLoop, loop_thread: int, stop: threading.Event, counts: Counter):
+        # В потоке сэмплера — только сбор кодов; имена функций строятся потом
+        own = threading.get_ident()
+        while not stop.wait(self.interval):
+            counts[None] += 1
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                if thread_id == loop_thread:
+                    task = asyncio.current_task(loop)
+                    root = f"task:{_task_name(task)}" if task is not None else "loop"
+                else:
+                    root = f"thread:{names.get(thread_id, thread_id)}"
+                counts[(root, tuple(codes))] += 1
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            for prefix in _PREFIXES:
+                if prefix and path.startswith(prefix + os.sep):
+                    path = path[len(prefix) + 1:]
+                    break
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{path}:{name}"
+        return label
@@ -0,0 +1,195 @@
+"""Кто ближе всех к правильному ответу.
+
+Ответ игрока разбирается в число: «1 500», «1,000», «1,5 тыс.», «2 млн», «1e6»,
+«около 300 км», «от 10 до 20» и «10-20» (берётся середина, чтобы широкий
+диапазон не давал преимущества), «двадцать пять», «полторы тысячи», «минус 40».
+Разбор кешируется: одинаковые ответы в раунде и между раундами не разбираются
+заново. Расстояния до правильного ответа считаются одним проходом по всем
+ответам раунда, равные лучшие расстояния — ничья. Если правильный ответ
+не число, ранжирования нет и победителя ведущий выбирает сам.
+"""
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+# Цифры: «1 000 000», «1'000», «1,000,000», «1,000», «1.000.000,5», «1,5», «1.5», «1e6».
+# Запятая и ровно три цифры после неё — разделитель тысяч, «0,125» и «1,0000» — дробь
+_NUMBER = (r"\d{1,3}(?:[ '’_]\d{3})+(?:[.,]\d+)?"
+           r"|[1-9]\d{0,2}(?:,\d{3})+(?:\.\d+)?(?!\d)"
+           r"|\d{1,3}(?:\.\d{3}){2,}(?:,\d+)?"
+           r"|\d+(?:[.,]\d+)?(?:e[+-]?\d+)?")
+_MULTIPLIER = (r"(?:тыс[а-я]*|млн|миллион[а-я]*|млрд|миллиард[а-я]*|трлн|триллион[а-я]*|к|k)"
+               r"\.?(?![а-яa-z])")
+_TOKEN = re.compile(rf"(?P<num>{_NUMBER})(?:\s*(?P<mult>{_MULTIPLIER}))?|(?P<word>[а-яa-z]+)|(?P<dash>-|\.\.\.?|…)")
+
+_MULTIPLIERS = {"тыс": 1e3, "к": 1e3, "k": 1e3, "млн": 1e6, "миллион": 1e6,
+                "млрд": 1e9, "миллиард": 1e9, "трлн": 1e12, "триллион": 1e12}
+
+_WORDS = {
+    "ноль": 0, "нуль": 0, "один": 1, "одна": 1, "одно": 1, "два": 2, "две": 2, "три": 3, "четыре": 4,
+    "пять": 5, "шесть": 6, "семь": 7, "восемь": 8, "девять": 9, "десять": 10,
+    "одиннадцать": 11, "двенадцать": 12, "тринадцать": 13, "четырнадцать": 14, "пятнадцать": 15,
+    "шестнадцать": 16, "семнадцать": 17, "восемнадцать": 18, "девятнадцать": 19,
+    "двадцать": 20, "тридцать": 30, "сорок": 40, "пятьдесят": 50, "шестьдесят": 60,
+    "семьдесят": 70, "восемьдесят": 80, "девяносто": 90,
+    "сто": 100, "двести": 200, "триста": 300, "четыреста": 400, "пятьсот": 500,
+    "шестьсот": 600, "семьсот": 700, "восемьсот": 800, "девятьсот": 900,
+    "полтора": 1.5, "полторы": 1.5,
+}
+# Множители словами: «тысяча», «тысячи», «тысяч», «миллиона», ...
+_WORD_MULTIPLIERS = (("тысяч", 1e3), ("миллион", 1e6), ("миллиард", 1e9), ("триллион", 1e12))
+
+_RANGE_WORDS = {"до", "по"}
+_MINUS_WORDS = {"минус"}
+
+
+def _word_multiplier(word: str) -> Optional[float]:
+    for stem, value in _WORD_MULTIPLIERS:
+        if word.startswith(stem):
+            return value
+    return None
+
+
+def _to_float(literal: str) -> float:
+    literal = re.sub(r"[ '’_]", "", literal)
+    if "," in literal and "." in literal:
+        # Последний из разделителей — десятичный
+        if literal.rfind(",") > literal.rfind("."):
+            literal = literal.replace(".", "").replace(",", ".")
+        else:
+            literal = literal.replace(",", "")
+    elif literal.count(",") > 1 or re.fullmatch(r"[1-9]\d{0,2},\d{3}", literal):
+        literal = literal.replace(",", "")
+    elif literal.count(".") > 1:
+        literal = literal.replace(".", "")
+    else:
+        literal = literal.replace(",", ".")
+    return float(literal)
+
+
+@lru_cache(maxsize=65536)
+def parse_number(text: Optional[str]) -> Optional[float]:
+    """Число из ответа игрока или None, если числа в ответе нет"""
+    if not text:
+        # Ответ без текста: в базе он NULL
+        return None
+    text = text.lower().replace("ё", "е").replace("\u00a0", " ").replace("\u202f", " ")
+    text = re.sub(r"[−–—]", "-", text)
+
+    values: List[float] = []
+    scales: List[float] = []  # множитель «тыс.»/«млн» у каждого числа, 1 — без множителя
+    is_range = negative = in_words = False
+    words_total = words_current = 0.0
+
+    def close_words():
+        nonlocal words_total, words_current, in_words
+        if in_words:
+            values.append(words_total + words_current)
+            scales.append(1.0)
+            words_total = words_current = 0.0
+            in_words = False
+
+    for match in _TOKEN.finditer(text):
+        if len(values) == 2:
+            break
+        if match.group("num") is not None:
+            close_words()
+            multiplier = match.group("mult")
+            scale = next(v for stem, v in _MULTIPLIERS.items() if multiplier.startswith(stem)) if multiplier else 1.0
+            values.append(_to_float(match.group("num")) * scale)
+            scales.append(scale)
+        elif match.group("word") is not None:
+            word = match.group("word")
+            if word in _WORDS:
+                words_current += _WORDS[word]
+                in_words = True
+            elif (multiplier := _word_multiplier(word)) is not None:
+                if in_words:
+                    words_total += (words_current or 1) * multiplier
+                    words_current = 0.0
+                elif values and scales[-1] == 1.0:
+                    # «2,5 тысячи», «3 миллиона»
+                    values[-1] *= multiplier
+                    scales[-1] = multiplier
+                elif not values or is_range:
+                    words_total, in_words = multiplier, True
+            else:
+                close_words()
+                if word in _RANGE_WORDS and values:
+                    is_range = True
+                elif word in _MINUS_WORDS and not values:
+                    negative = True
+        else:
+            close_words()
+            if values:
+                is_range = True
+            else:
+                negative = True
+    close_words()
+
+    if not values:
+        return None
+    if is_range and len(values) >= 2:
+        low, high = values[0], values[1]
+        if scales[0] == 1.0 and scales[1] > 1.0 and low * scales[1] <= high:
+            # «10-20 тыс.»: множитель относится к обоим концам
+            low *= scales[1]
+        result = (low + high) / 2
+    else:
+        result = values[0]
+    if not math.isfinite(result):
+        # «1e999» — не ответ
+        return None
+    return -result if negative else result
+
+
+def format_number(value: float) -> str:
+    """1500000.0 → «1 500 000», 2.5 → «2.5»"""
+    if value == int(value) and abs(value) < 1e15:
+        return f"{int(value):,}".replace(",", " ")
+    return f"{value:,.6g}".replace(",", " ")
+
+
+@dataclass
+class Ranking:
+    """Порядок ответов раунда: order — индексы от ближнего к дальнему, нечисловые в конце"""
+    truth: Optional[float]
+    order: List[int] = field(default_factory=list)
+    distances: List[Optional[float]] = field(default_factory=list)
+    winners: List[int] = field(default_factory=list)  # индексы с лучшим расстоянием; больше одного — ничья
+
+    @property
+    def numeric(self) -> bool:
+        return self.truth is not None
+
+    @property
+    def suggested(self) -> Optional[int]:
+        """Кого предложить ведущему: единственного лучшего, при ничьей — никого"""
+        return self.winners[0] if len(self.winners) == 1 else None
+
+    @property
+    def is_tie(self) -> bool:
+        return len(self.winners) > 1
+
+
+def rank_answers(answers: Sequence[Optional[str]], correct_answer: str) -> Ranking:
+    """Отсортировать ответы по расстоянию до правильного"""
+    truth = parse_number(correct_answer or "")
+    if truth is None:
+        return Ranking(truth=None, order=list(range(len(answers))), distances=[None] * len(answers))
+
+    distances = [None if value is None else abs(value - truth) for value in map(parse_number, answers)]
+    numeric = [i for i, distance in enumerate(distances) if distance is not None]
+    numeric.sort(key=distances.__getitem__)
+    order = numeric + [i for i, distance in enumerate(distances) if distance is None]
+
+    winners = []
+    if numeric:
+        best = distances[numeric[0]]
+        for i in numeric:
+            if not math.isclose(distances[i], best, rel_tol=1e-9, abs_tol=1e-9):
+                break
+            winners.append(i)
+    return Ranking(truth=truth, order=order, distances=distances, winners=winners)
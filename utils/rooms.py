@@ -0,0 +1,131 @@
+"""Комнаты: несколько игр одновременно в одном процессе бота.
+
+Комната — активная игра со своим ведущим и своими игроками. Реестр держит
+в памяти индексы игра → комната, ведущий → комната и игрок → комната, так что
+апдейт игрока попадает в свою комнату за O(1), без запросов к базе. На старте
+бота реестр восстанавливается из активных игр. Изменения одной комнаты
+сериализуются её собственным замком, чужие комнаты при этом не ждут.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from aiogram.filters import BaseFilter
+from aiogram.types import CallbackQuery, Message
+
+from database.db import Repository
+from utils.ranking import Ranking
+
+
+@dataclass
+class RoundAnswers:
+    """Отранжированные ответы раунда: ведущий листает страницы без запросов к базе"""
+    round_id: int
+    answers: List[dict]
+    ranking: Ranking
+
+
+@dataclass(eq=False)
+class Room:
+    game_id: int
+    host_id: int
+    players: Set[int] = field(default_factory=set)
+    current_round: int = 0          # номер последнего начатого раунда
+    round_id: Optional[int] = None  # id открытого раунда, None — ответы не принимаются
+    answers: Optional[RoundAnswers] = None  # последний показ ответов ведущему
+    question_ids: List[int] = field(default_factory=list)  # вопросы игры по раундам: вопрос берётся из снимка
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def open_round(self, round_number: int, round_id: int):
+        self.current_round, self.round_id = round_number, round_id
+
+    def close_round(self, round_id: int):
+        if self.round_id == round_id:
+            self.round_id = None
+            self.answers = None
+
+    def question_id(self, round_number: int) -> Optional[int]:
+        if 0 < round_number <= len(self.question_ids):
+            return self.question_ids[round_number - 1]
+        return None
+
+
+class RoomRegistry:
+    def __init__(self):
+        self._rooms: Dict[int, Room] = {}
+        self._by_host: Dict[int, Room] = {}
+        self._by_player: Dict[int, Room] = {}
+        self._host_locks: Dict[int, asyncio.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def get(self, game_id: int) -> Optional[Room]:
+        return self._rooms.get(game_id)
+
+    def hosted_by(self, host_id: int) -> Optional[Room]:
+        return self._by_host.get(host_id)
+
+    def room_of(self, user_id: int) -> Optional[Room]:
+        return self._by_player.get(user_id)
+
+    def host_lock(self, host_id: int) -> asyncio.Lock:
+        """Замок ведущего: двойное нажатие не должно открыть ему две игры"""
+        lock = self._host_locks.get(host_id)
+        if lock is None:
+            lock = self._host_locks[host_id] = asyncio.Lock()
+        return lock
+
+    def open(self, game_id: int, host_id: int) -> Room:
+        """Завести комнату под новую игру ведущего"""
+        return self.add(Room(game_id=game_id, host_id=host_id))
+
+    def add(self, room: Room) -> Room:
+        """Поставить в реестр готовую комнату; прежняя комната её ведущего закрывается"""
+        previous = self._by_host.get(room.host_id)
+        if previous is not None:
+            self.close(previous)
+        self._rooms[room.game_id] = room
+        self._by_host[room.host_id] = room
+        return room
+
+    def join(self, room: Room, user_ids: Iterable[int]):
+        """Посадить игроков в комнату; из прежней комнаты они выходят"""
+        for user_id in user_ids:
+            previous = self._by_player.get(user_id)
+            if previous is not None and previous is not room:
+                previous.players.discard(user_id)
+            room.players.add(user_id)
+            self._by_player[user_id] = room
+
+    def close(self, room: Room):
+        """Игра закончилась — комната и её игроки забываются"""
+        self._rooms.pop(room.game_id, None)
+        if self._by_host.get(room.host_id) is room:
+            del self._by_host[room.host_id]
+        for user_id in room.players:
+            if self._by_player.get(user_id) is room:
+                del self._by_player[user_id]
+
+    async def load(self, repo: Repository, default_host_id: int):
+        """Восстановить комнаты из активных игр после рестарта"""
+        games = await repo.get_active_games()
+        # По запросу на всё сразу, а не по три на игру: рестарт не растёт с числом идущих игр
+        game_ids = [game.id for game in games]
+        players = await repo.get_players_by_game(game_ids)
+        progress = await repo.get_round_progress(game_ids)
+        questions = await repo.get_question_ids_by_game(game_ids)
+        for game in games:
+            room = self.open(game.id, game.host_id or default_host_id)
+            self.join(room, players[game.id])
+            room.current_round, room.round_id = progress[game.id]
+            room.question_ids = questions[game.id]
+
+
+class IsHost(BaseFilter):
+    """Пропускает только ведущего комнаты и передаёт обработчику его room"""
+
+    async def __call__(self, event: Union[Message, CallbackQuery],
+                       room_registry: RoomRegistry) -> Union[bool, dict]:
+        room = room_registry.hosted_by(event.from_user.id)
+        return {"room": room} if room is not None else False
@@ -0,0 +1,19 @@
+"""Ставки по правилам игры: обязательная ставка растёт от раунда к раунду."""
+from typing import Iterable
+
+from config import ANTE_BASE, ANTE_STEP, MAX_ROUNDS
+from utils.messages import escape_markdown
+
+
+def ante_for_round(round_number: int) -> int:
+    """Обязательная ставка раунда; она же шаг повышения"""
+    return ANTE_BASE + ANTE_STEP * (min(max(round_number, 1), MAX_ROUNDS) - 1)
+
+
+def format_standings(rows: Iterable) -> str:
+    """Таблица лидеров из строк get_standings"""
+    lines = ["🏆 *Таблица лидеров*"]
+    for place, row in enumerate(rows, start=1):
+        lines.append(f"{place}. {escape_markdown(row.first_name or f'Игрок {row.user_id}')} — "
+                     f"{row.balance} 🪙 (раундов: {row.rounds_won})")
+    return "\n".join(lines)
@@ -0,0 +1,173 @@
+"""Запись входящих апдейтов для повтора на стенде (benchmarks/bench_replay.py).
+
+Апдейты пишутся в сжатый gzip-лог только дописыванием: строка JSON на
+апдейт — {"t": unix-время прихода, "update": {...}}. На горячем пути
+апдейт только кладётся в список; раз в flush_interval секунд пачка
+обезличивается, сжимается и дописывается в файл в отдельном потоке.
+После каждой пачки поток сбрасывается (sync flush), поэтому лог читается
+и после падения бота — теряется только последняя пачка.
+
+Обезличивание: id пользователей и чатов заменяются псевдонимами (HMAC с
+солью — один и тот же человек в логе остаётся одним и тем же, но по
+псевдониму его не найти), имена — на «user<псевдоним>», телефоны,
+контакты и геопозиции выбрасываются, file_id и похожие на токен бота
+строки в тексте затираются звёздочками той же длины (смещения entities
+не съезжают). Админ получает псевдоним REPLAY_ADMIN_ID.
+"""
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import re
+import secrets
+import time
+import zlib
+from typing import Any, Iterator, List, Optional, Tuple
+
+from aiogram.types import Update
+
+logger = logging.getLogger(__name__)
+
+# Под этим id админ бота попадает в лог; при повторе ADMIN_ID ставится равным ему
+REPLAY_ADMIN_ID = 1
+
+# Объекты с id человека или чата
+_PERSON_KEYS = {"from", "chat", "user", "sender_chat", "forward_from", "forward_from_chat",
+                "new_chat_members", "left_chat_member"}
+_NAME_KEYS = ("first_name", "last_name", "username", "title")
+_DROP_KEYS = {"phone_number", "contact", "location", "venue", "bio"}
+_OPAQUE_KEYS = {"file_id", "file_unique_id", "chat_instance"}
+_TEXT_KEYS = {"text", "caption", "data", "query"}
+_TOKEN = re.compile(r"\b\d{6,12}:[A-Za-z0-9_-]{30,}")
+
+
+class Pseudonyms:
+    """Стабильные псевдонимы id в пределах одной соли"""
+
+    def __init__(self, salt: bytes, admin_id: int = 0):
+        self.salt = salt
+        self.admin_id = admin_id
+
+    def id(self, value: int) -> int:
+        if not value:
+            return value
+        if value == self.admin_id:
+            return REPLAY_ADMIN_ID
+        digest = hmac.new(self.salt, str(abs(value)).encode(), hashlib.sha256).digest()
+        # Меньше 2^40 и не пересекается с REPLAY_ADMIN_ID; знак чата (группа/канал) сохраняется
+        pseudonym = int.from_bytes(digest[:5], "big") + 1_000_000
+        return -pseudonym if value < 0 else pseudonym
+
+
+def _mask(text: str) -> str:
+    return _TOKEN.sub(lambda match: "*" * len(match.group()), text)
+
+
+def anonymize(node: Any, pseudonyms: Pseudonyms, key: Optional[str] = None) -> Any:
+    """Обезличенная копия апдейта (dict из JSON Bot API)"""
+    if isinstance(node, list):
+        return [anonymize(item, pseudonyms, key) for item in node]
+    if not isinstance(node, dict):
+        if key in _OPAQUE_KEYS:
+            return "anon"
+        if key in _TEXT_KEYS and isinstance(node, str):
+            return _mask(node)
+        return node
+    result = {}
+    for name, value in node.items():
+        if name in _DROP_KEYS:
+            continue
+        result[name] = anonymize(value, pseudonyms, name)
+    if key in _PERSON_KEYS and isinstance(result.get("id"), int):
+        result["id"] = pseudonyms.id(result["id"])
+        for name in _NAME_KEYS:
+            if name in result:
+                result[name] = f"user{abs(result['id'])}"
+    return result
+
+
+class UpdateLog:
+    """Дописывает апдейты в сжатый лог; path пустой — запись выключена"""
+
+    def __init__(self, path: str, salt: str = "", admin_id: int = 0, flush_interval: float = 1.0):
+        self.path = path
+        # Без заданной соли — своя на каждый запуск: псевдонимы не сопоставить между логами
+        self.pseudonyms = Pseudonyms(salt.encode() if salt else secrets.token_bytes(16), admin_id)
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[float, Update]] = []
+        self._file = None
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def append(self, update: Update):
+        """Запомнить апдейт; обезличивание и запись — фоном"""
+        self._pending.append((time.time(), update))
+
+    async def start(self):
+        if self._task is not None or not self.enabled:
+            return
+        self._file = gzip.open(self.path, "ab")
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Апдейты пишутся в %s", self.path)
+
+    async def close(self):
+        """Дописать остаток и закрыть файл"""
+        if self._task is None:
+            return
+        # Не cancel: пачка пишется в потоке, и её нельзя бросить на середине
+        self._stop.set()
+        await self._task
+        self._task = None
+        self._file.close()
+        self._file = None
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self._flush()
+            except Exception:
+                logger.exception("Не удалось дописать лог апдейтов %s", self.path)
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        await asyncio.to_thread(self._write, batch)
+
+    def _write(self, batch: List[Tuple[float, Update]]):
+        lines = []
+        for received, update in batch:
+            raw = update.model_dump(mode="json", exclude_unset=True, by_alias=True)
+            record = {"t": round(received, 3), "update": anonymize(raw, self.pseudonyms)}
+            lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        self._file.write(("\n".join(lines) + "\n").encode("utf-8"))
+        self._file.flush(zlib.Z_SYNC_FLUSH)
+
+
+def read_log(path: str) -> Iterator[Tuple[float, dict]]:
+    """(unix-время, апдейт) по порядку записи; оборванный хвост лога пропускается"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Лог %s: оборванная строка, дальше не читаем", path)
+                    return
+                yield record["t"], record["update"]
+        except EOFError:
+            # Бот упал между пачками: всё до последнего sync flush на месте
+            logger.warning("Лог %s оборван — прочитано то, что успело записаться", path)
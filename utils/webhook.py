@@ -0,0 +1,121 @@
+"""Приём апдейтов через webhook.
+
+Telegram сам присылает апдейты POST-запросом, aiohttp-сервер проверяет
+секретный токен и сразу отвечает 200, а обработку ведёт пул воркеров:
+апдейты одного чата идут строго по очереди, разных чатов — параллельно.
+"""
+import asyncio
+import hmac
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiogram.webhook.aiohttp_server import setup_application
+
+from config import WEBHOOK_WORKERS, WEBHOOK_MAX_PENDING
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def chat_key(update: Update) -> int:
+    """Ключ очереди: чат апдейта, иначе его автор"""
+    event = update.event
+    chat = getattr(event, "chat", None) or getattr(getattr(event, "message", None), "chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None)
+    return user.id if user is not None else update.update_id
+
+
+class OrderedUpdateProcessor:
+    """Пул воркеров с порядком внутри чата.
+
+    У каждого чата своя очередь апдейтов; в очередь готовых попадает чат,
+    а не апдейт, и пока воркер обрабатывает апдейт чата, следующий апдейт
+    этого чата никто не возьмёт. max_pending ограничивает число апдейтов
+    в работе: при переполнении webhook ждёт, и Telegram придерживает отправку.
+    """
+
+    def __init__(self, bot: Bot, dp: Dispatcher, workers: int = WEBHOOK_WORKERS,
+                 max_pending: int = WEBHOOK_MAX_PENDING):
+        self.bot = bot
+        self.dp = dp
+        self.workers = workers
+        self._slots = asyncio.Semaphore(max_pending)
+        self._chats: Dict[int, Deque[Update]] = {}
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._tasks = []
+
+    async def start(self, *args):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def drain(self):
+        """Дождаться, пока обработаются все принятые апдейты"""
+        await self._ready.join()
+
+    async def close(self, *args):
+        """Доработать принятые апдейты и остановить воркеры"""
+        await self.drain()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, update: Update):
+        await self._slots.acquire()
+        key = chat_key(update)
+        queue = self._chats.get(key)
+        if queue is not None:
+            # Чат уже в работе или ждёт воркера — апдейт встанет за предыдущими
+            queue.append(update)
+            return
+        self._chats[key] = deque([update])
+        self._ready.put_nowait(key)
+
+    async def _worker(self):
+        while True:
+            key = await self._ready.get()
+            queue = self._chats[key]
+            update = queue.popleft()
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception:
+                logger.exception("Ошибка при обработке апдейта %s", update.update_id)
+            finally:
+                self._slots.release()
+                if queue:
+                    # Не держим воркер на одном чате: остальные чаты тоже ждут
+                    self._ready.put_nowait(key)
+                else:
+                    del self._chats[key]
+                self._ready.task_done()
+
+
+def create_webhook_app(bot: Bot, dp: Dispatcher, path: str, secret: str,
+                       processor: Optional[OrderedUpdateProcessor] = None) -> web.Application:
+    """aiohttp-приложение, которое принимает апдейты на path"""
+    processor = processor or OrderedUpdateProcessor(bot, dp)
+
+    async def handle(request: web.Request) -> web.Response:
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), secret):
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": bot})
+        except ValueError:
+            return web.Response(status=400)
+        await processor.submit(update)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(path, handle)
+    app["processor"] = processor
+    # Порядок важен: на остановке сначала дорабатываем апдейты, потом закрываем хранилища
+    app.on_startup.append(processor.start)
+    app.on_shutdown.append(processor.close)
+    setup_application(app, dp, bot=bot)
+    return app